@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 
@@ -8,6 +9,16 @@ import numpy as np
 import pygraphviz as pgv
 from matplotlib.colors import ListedColormap, BoundaryNorm
 
+from rbn import kauffman
+from rbn.adjacency import (
+    instance_adjacency,
+    type_adjacency,
+    write_degree_table,
+    write_edge_table,
+    write_image,
+)
+from rbn.centrality import centrality, pivots_for_error, write_centrality_table
+
 
 def run(dot_file):
     matplotlib.use("Qt5Agg")
@@ -23,6 +34,57 @@ def run(dot_file):
     show_adjacency_matrix(adj_matrix, matrix_size, node_types)
 
 
+def run_headless(dot_file, output_dir, by_type, centrality_options=None):
+    network = kauffman.KauffmanNetwork(dot_file)
+    compiled = network.compile()
+    if by_type:
+        adjacency = type_adjacency(compiled)
+        node_types = None
+    else:
+        adjacency = instance_adjacency(compiled)
+        node_types = compiled.node_types
+
+    os.makedirs(output_dir, exist_ok=True)
+    image_path = os.path.join(output_dir, "adjacency_matrix.png")
+    degrees_path = os.path.join(output_dir, "degrees.csv")
+    edges_path = os.path.join(output_dir, "edges.csv")
+    write_image(adjacency, image_path)
+    write_degree_table(adjacency, degrees_path, node_types)
+    write_edge_table(adjacency, edges_path)
+
+    print(f"Nodes: {adjacency.size()}, edges: {len(adjacency.sources)}")
+    print(f"Mutual edges: {int(adjacency.mutual().sum())}")
+    print(f"Self-loops: {int(adjacency.self_loops().sum())}")
+    print(f"Wrote {image_path}, {degrees_path} and {edges_path}")
+
+    if centrality_options is not None:
+        write_centrality(adjacency, output_dir, **centrality_options)
+
+
+def write_centrality(adjacency, output_dir, epsilon, pivots, processes, seed):
+    if pivots is None:
+        pivots = pivots_for_error(adjacency.size(), epsilon)
+    betweenness, closeness, exact = centrality(
+        adjacency, pivots, processes, np.random.default_rng(seed)
+    )
+    path = os.path.join(output_dir, "centrality.csv")
+    order = write_centrality_table(adjacency, betweenness, closeness, path)
+
+    if exact:
+        print("\nExact centrality:")
+    else:
+        print(f"\nCentrality estimated from {pivots} pivots:")
+    width = max(len(name) for name in adjacency.names) + 2
+    print(f"{'Node':<{width}} | {'Betweenness':^12} | {'Closeness':^10}")
+    print("-" * (width + 29))
+    for node in order[:10].tolist():
+        print(
+            f"{adjacency.names[node]:<{width}} | {betweenness[node]:^12.4f} | "
+            f"{closeness[node]:^10.4f}"
+        )
+    print(f"Wrote {path}")
+
+
 def create_adjacency_matrix(network, node_types):
     node_type_set = set(node_types)  # To check for existence efficiently
     # Initialize matrix
@@ -128,14 +190,57 @@ def create_centrality_table(
         )
 
 
-if __name__ == "__main__":
-    # Check if exactly one argument is passed (excluding the script name)
-    if len(sys.argv) != 2:
-        print("Usage: python adjacency_matrix.py <file.dot>")
-        sys.exit(1)
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show the adjacency matrix of the network in a .dot file."
+    )
+    parser.add_argument("dot_file", help="Input Graphviz .dot file")
+    parser.add_argument(
+        "-o",
+        "--output",
+        metavar="DIR",
+        help="Write the matrix image and degree/edge tables of the expanded "
+        "network to DIR instead of opening a window",
+    )
+    parser.add_argument(
+        "-t",
+        "--types",
+        action="store_true",
+        help="With --output, aggregate the matrix by node type",
+    )
 
-    # Get the filename from the command-line arguments
-    dot_file = sys.argv[1]
+    parser.add_argument(
+        "-c",
+        "--centrality",
+        action="store_true",
+        help="With --output, also estimate betweenness and closeness",
+    )
+    parser.add_argument(
+        "-e",
+        "--epsilon",
+        type=float,
+        default=0.1,
+        help="Largest error of the sampled betweenness, with 90%% confidence "
+        "(default: 0.1)",
+    )
+    parser.add_argument(
+        "-p",
+        "--pivots",
+        type=int,
+        help="Number of sampled pivots, overriding --epsilon",
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of worker processes for the centrality (default: 1)",
+    )
+    parser.add_argument("--seed", type=int, help="Random seed")
+
+    args = parser.parse_args()
+
+    dot_file = args.dot_file
 
     # Check if the file has a .dot extension
     if not dot_file.endswith(".dot"):
@@ -147,6 +252,21 @@ if __name__ == "__main__":
         print(f"Error: The file '{dot_file}' does not exist.")
         sys.exit(1)
 
-    # File exists and has .dot extension
-    print(f"File '{dot_file}' is valid and ready for use.")
-    run(dot_file)
+    if args.output:
+        centrality_options = None
+        if args.centrality:
+            centrality_options = {
+                "epsilon": args.epsilon,
+                "pivots": args.pivots,
+                "processes": args.processes,
+                "seed": args.seed,
+            }
+        run_headless(dot_file, args.output, args.types, centrality_options)
+    else:
+        # File exists and has .dot extension
+        print(f"File '{dot_file}' is valid and ready for use.")
+        run(dot_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from rbn import kauffman
+from rbn.basins import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_SAMPLES,
+    DEFAULT_STEPS,
+    basin_intervals,
+    estimate_basins,
+)
+
+
+def print_basins(rows, samples, resolved):
+    print(f"\nBasins of attraction ({samples} random initial states):")
+    print(f"{'Attractor':>10} | {'Length':>6} | {'Basin':>8} | {'95% interval':>19}")
+    print("-" * 52)
+    for attractor_id, attractor_state, share, low, high in rows:
+        print(
+            f"{attractor_id:>10} | {len(attractor_state):>6} | {share * 100:>7.3f}% | "
+            f"{low * 100:>7.3f}% - {high * 100:>7.3f}%"
+        )
+    if resolved < samples:
+        print(
+            f"\n{samples - resolved} initial states "
+            f"({(samples - resolved) / samples * 100:.3f}%) reached no attractor "
+            "within the steps allowed"
+        )
+
+
+def run(dot_file, samples, batch_size, steps, bias, seed):
+    network = kauffman.KauffmanNetwork(dot_file)
+    compiled = network.compile()
+    reduction = network.get_type_reduction()
+    rng = np.random.default_rng(seed)
+
+    attractors, resolved = estimate_basins(
+        compiled,
+        reduction,
+        samples,
+        rng,
+        num_steps=steps,
+        batch_size=batch_size,
+        bias=bias,
+    )
+    print_basins(basin_intervals(attractors, samples), samples, resolved)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate the basin of attraction of each attractor of the "
+        "network in a .dot file from random initial states."
+    )
+    parser.add_argument("dot_file", help="Input Graphviz .dot file")
+    parser.add_argument(
+        "-n",
+        "--samples",
+        type=int,
+        default=DEFAULT_SAMPLES,
+        help=f"Number of random initial states (default: {DEFAULT_SAMPLES})",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Number of initial states stepped together "
+        f"(default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "-t",
+        "--steps",
+        type=int,
+        default=DEFAULT_STEPS,
+        help=f"Number of steps per run (default: {DEFAULT_STEPS})",
+    )
+    parser.add_argument(
+        "-p",
+        "--bias",
+        type=float,
+        default=0.5,
+        help="Probability that a node starts healthy (default: 0.5)",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+
+    args = parser.parse_args()
+
+    dot_file = args.dot_file
+
+    # Check if the file has a .dot extension
+    if not dot_file.endswith(".dot"):
+        print(f"Error: The file '{dot_file}' does not have a .dot extension.")
+        sys.exit(1)
+
+    # Check if the file exists
+    if not os.path.exists(dot_file):
+        print(f"Error: The file '{dot_file}' does not exist.")
+        sys.exit(1)
+
+    run(dot_file, args.samples, args.batch, args.steps, args.bias, args.seed)
+
+
+if __name__ == "__main__":
+    main()
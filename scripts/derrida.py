@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from rbn import kauffman
+from rbn.derrida import classify_regime, derrida_curve, derrida_slope
+
+
+def print_curve(curve, n):
+    print(
+        f"{'d(t)':>6} | {'d(t)/N':>8} | {'d(t+1)':>10} | {'d(t+1)/N':>10} | {'Std. Err.':>10}"
+    )
+    print("-" * 56)
+    for distance, mean, error in curve:
+        print(
+            f"{distance:>6} | {distance / n:>8.4f} | {mean:>10.4f} | {mean / n:>10.4f} | {error:>10.4f}"
+        )
+
+
+def run(dot_file, max_distance, samples, batch_size, bias, seed):
+    network = kauffman.KauffmanNetwork(dot_file)
+    compiled = network.compile()
+    n = compiled.size()
+    rng = np.random.default_rng(seed)
+    distances = range(1, min(max_distance, n) + 1)
+
+    curve = derrida_curve(
+        compiled, distances, samples, rng, batch_size=batch_size, bias=bias
+    )
+    slope = derrida_slope(curve)
+
+    print(f"\nDerrida map (N = {n}, {samples} state pairs per distance):")
+    print_curve(curve, n)
+    print(f"\nSlope at origin: {slope:.4f}")
+    print(f"Regime: {classify_regime(slope)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute the Derrida map of the network in a .dot file."
+    )
+    parser.add_argument("dot_file", help="Input Graphviz .dot file")
+    parser.add_argument(
+        "-d",
+        "--distance",
+        type=int,
+        default=10,
+        help="Largest initial Hamming distance (default: 10)",
+    )
+    parser.add_argument(
+        "-n",
+        "--samples",
+        type=int,
+        default=10000,
+        help="Number of state pairs per distance (default: 10000)",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        type=int,
+        default=10000,
+        help="Number of state pairs evaluated together (default: 10000)",
+    )
+    parser.add_argument(
+        "-p",
+        "--bias",
+        type=float,
+        default=0.5,
+        help="Probability that a node starts healthy (default: 0.5)",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+
+    args = parser.parse_args()
+
+    dot_file = args.dot_file
+
+    # Check if the file has a .dot extension
+    if not dot_file.endswith(".dot"):
+        print(f"Error: The file '{dot_file}' does not have a .dot extension.")
+        sys.exit(1)
+
+    # Check if the file exists
+    if not os.path.exists(dot_file):
+        print(f"Error: The file '{dot_file}' does not exist.")
+        sys.exit(1)
+
+    run(dot_file, args.distance, args.samples, args.batch, args.bias, args.seed)
+
+
+if __name__ == "__main__":
+    main()
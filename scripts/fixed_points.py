@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+
+from rbn import kauffman
+from rbn.fixed_points import FixedPoints, fixed_point_id
+
+
+def run(dot_file, list_states):
+    network = kauffman.KauffmanNetwork(dot_file)
+    compiled = network.compile()
+    fixed_points = FixedPoints(compiled)
+
+    print(f"\nFixed points of the expanded network: {fixed_points.count()}")
+    print(f"Decision diagram nodes: {len(fixed_points.bdd)}")
+
+    normalized = fixed_points.normalized(network.get_type_reduction())
+    print(f"\nNormalized fixed points: {len(normalized)}")
+    print(f"{'Attractor':>10} | {'Expanded fixed points':>21} | Failed types")
+    print("-" * 60)
+    for state, count in sorted(normalized, key=lambda result: -result[1]):
+        failed = sorted(node_type for node_type, healthy in state if not healthy)
+        print(f"{fixed_point_id(state):>10} | {count:>21} | {', '.join(failed)}")
+
+    if list_states:
+        for state in fixed_points.states():
+            failed = [
+                name for name, healthy in zip(compiled.names, state) if not healthy
+            ]
+            print(f"\nFailed: {', '.join(failed) if failed else 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find every fixed point of the network in a .dot file symbolically."
+    )
+    parser.add_argument("dot_file", help="Input Graphviz .dot file")
+    parser.add_argument(
+        "-l",
+        "--list",
+        action="store_true",
+        help="Also list the failed nodes of every expanded fixed point",
+    )
+
+    args = parser.parse_args()
+
+    dot_file = args.dot_file
+
+    # Check if the file has a .dot extension
+    if not dot_file.endswith(".dot"):
+        print(f"Error: The file '{dot_file}' does not have a .dot extension.")
+        sys.exit(1)
+
+    # Check if the file exists
+    if not os.path.exists(dot_file):
+        print(f"Error: The file '{dot_file}' does not exist.")
+        sys.exit(1)
+
+    run(dot_file, args.list)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from rbn import kauffman
+from rbn.components import count_normalized_attractors, modular_attractors
+from rbn.watch import DEFAULT_INTERVAL, IncrementalAttractors, watch
+
+
+def run(dot_file, samples, seed):
+    network = kauffman.KauffmanNetwork(dot_file)
+    # Attractors lie beyond the transient in which constants settle
+    simplified = network.simplify()
+    rng = np.random.default_rng(seed)
+
+    attractors, components, exact = modular_attractors(simplified.network, rng, samples)
+    print_attractors(network, simplified, attractors, components, exact)
+
+
+def run_watched(dot_file, samples, seed, interval):
+    analysis = IncrementalAttractors(np.random.default_rng(seed), samples)
+    for _ in watch(dot_file, interval):
+        try:
+            network = kauffman.KauffmanNetwork(dot_file)
+            simplified = network.simplify()
+        except Exception as error:
+            # Keep watching while the file is being edited
+            print(f"\nCould not load '{dot_file}': {error}")
+            continue
+
+        try:
+            attractors, components, exact, change, reused = analysis.update(
+                simplified.network
+            )
+        except Exception as error:
+            # Report it and wait for the next save; the previous result is kept
+            print(f"\nCould not analyse '{dot_file}': {error}")
+            continue
+        if change is not None:
+            print(f"\n{'=' * 42}")
+            if not change:
+                print("No change to the simplified network")
+            else:
+                print(f"Changed types: {', '.join(change.changed_types()) or '-'}")
+                if change.removed:
+                    print(f"Removed nodes: {len(change.removed)}")
+                print(f"Types downstream: {', '.join(change.affected_types())}")
+                print(
+                    f"Reused attractors of {reused} of "
+                    f"{simplified.network.size()} nodes"
+                )
+        print_attractors(network, simplified, attractors, components, exact)
+
+
+def print_attractors(network, simplified, attractors, components, exact):
+    compiled = simplified.network
+    reduction = network.get_type_reduction()
+    sizes = [len(component) for component in components]
+    print(f"\nSimplified network: {compiled.size()} of {network.get_n()} nodes")
+    print(f"Strongly connected components: {len(components)}")
+    print(f"Largest component: {max(sizes, default=0)} of {compiled.size()} nodes")
+    print(f"Attractors of the expanded network: {len(attractors)}")
+    if not exact:
+        print(
+            "Note: some components were started from sampled states only, "
+            "attractors may be missing"
+        )
+
+    counts, lengths = count_normalized_attractors(attractors, reduction, simplified)
+
+    print(f"\nNormalized attractors: {len(counts)}")
+    print(f"{'Attractor':>10} | {'Length':>6} | {'Expanded attractors':>19}")
+    print("-" * 42)
+    for attractor_id, count in counts.most_common():
+        print(f"{attractor_id:>10} | {lengths[attractor_id]:>6} | {count:>19}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute every attractor of the network in a .dot file, one strongly connected component at a time."
+    )
+    parser.add_argument("dot_file", help="Input Graphviz .dot file")
+    parser.add_argument(
+        "-n",
+        "--samples",
+        type=int,
+        default=10000,
+        help="Starting states tried for components too large to enumerate (default: 10000)",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="Keep running, and analyse the file again whenever it is saved",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help=f"Seconds between checks of the file with --watch (default: {DEFAULT_INTERVAL})",
+    )
+
+    args = parser.parse_args()
+
+    dot_file = args.dot_file
+
+    # Check if the file has a .dot extension
+    if not dot_file.endswith(".dot"):
+        print(f"Error: The file '{dot_file}' does not have a .dot extension.")
+        sys.exit(1)
+
+    # Check if the file exists
+    if not os.path.exists(dot_file):
+        print(f"Error: The file '{dot_file}' does not exist.")
+        sys.exit(1)
+
+    if not args.watch:
+        run(dot_file, args.samples, args.seed)
+        return
+    try:
+        run_watched(dot_file, args.samples, args.seed, args.interval)
+    except KeyboardInterrupt:
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,75 @@
 #!/usr/bin/python
+import argparse
 import random
 import sys
 
+from rbn.network_generator import TOPOLOGIES, write_dot
 
-def generate_network_constraints(N, K, max_attempts=1000):
-    nodes = [f"N{i}" for i in range(N)]
-    connections = set()
-    incoming = {node: 0 for node in nodes}
-    outgoing = {node: 0 for node in nodes}
-    attempts = 0
 
-    while attempts < max_attempts:
-        source = random.choice(nodes)
-        target = random.choice(nodes)
-        # Check if adding this connection keeps both nodes within the K limit
-        # if source != target and (outgoing[source] + incoming[source]) < K and (outgoing[target] + incoming[target]) < K:
-        if source != target and incoming[target] < K:
-            connections.add((source, target))
-            incoming[target] += 1
-            attempts = 0  # Reset attempts after a successful connection
-        else:
-            attempts += 1  # Increment attempts after a failed connection attempt
-
-    return connections
-
-
-def generate_dot_string(connections, functions_list, min_instances=1, max_instances=1):
-    dot_string = "digraph RBN {\n"
-    nodes = set(
-        [source for source, _ in connections] + [target for _, target in connections]
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a random Boolean network where every node has exactly K inputs."
     )
-    node_functions = {node: random.choice(functions_list) for node in nodes}
-    for node in nodes:
-        instances = random.randint(min_instances, max_instances)
-        func = node_functions[node]
-        dot_string += (
-            f'    {node} [label="{node}", func="{func}", instances={instances}];\n'
-        )
-    for source, target in connections:
-        dot_string += f"    {source} -> {target};\n"
-    dot_string += "}\n"
-    return dot_string
-
-
-def write_dot_file(
-    filename, connections, functions_list, min_instances=1, max_instances=1
-):
-    dot_string = generate_dot_string(
-        connections, functions_list, min_instances, max_instances
+    parser.add_argument("dot_file", help="Output Graphviz .dot file ('-' for stdout)")
+    parser.add_argument("n", type=int, help="Number of nodes")
+    parser.add_argument("k", type=int, help="Number of inputs per node")
+    parser.add_argument(
+        "min_instances", type=int, nargs="?", default=1, help="(default: 1)"
+    )
+    parser.add_argument(
+        "max_instances",
+        type=int,
+        nargs="?",
+        default=None,
+        help="(default: min_instances)",
+    )
+    parser.add_argument(
+        "--topology",
+        choices=TOPOLOGIES,
+        default="random",
+        help="Wiring family (default: random)",
     )
-    with open(filename, "w") as f:
-        f.write(dot_string)
+    parser.add_argument(
+        "--modules",
+        type=int,
+        default=4,
+        help="Number of modules for the modular topology (default: 4)",
+    )
+    parser.add_argument(
+        "--intra",
+        type=float,
+        default=0.9,
+        help="Probability that an input stays within its module (default: 0.9)",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
 
+    args = parser.parse_args()
+    max_instances = (
+        args.max_instances if args.max_instances is not None else args.min_instances
+    )
+    functions = ["and", "nor", "xor", "majority"]
+    rng = random.Random(args.seed)
 
-if __name__ == "__main__":
-    if len(sys.argv) < 4 or len(sys.argv) > 6:
-        print(
-            "Usage: python script.py <dot_filename> <N> <K> [<min_instances> <max_instances>]"
+    def write(stream):
+        write_dot(
+            stream,
+            args.n,
+            args.k,
+            functions,
+            args.min_instances,
+            max_instances,
+            topology=args.topology,
+            modules=args.modules,
+            intra=args.intra,
+            rng=rng,
         )
-        sys.exit(1)
 
-    dot_filename = sys.argv[1]
-    N = int(sys.argv[2])
-    K = int(sys.argv[3])
-    min_instances = int(sys.argv[4]) if len(sys.argv) > 4 else 1
-    max_instances = int(sys.argv[5]) if len(sys.argv) > 5 else min_instances
+    if args.dot_file == "-":
+        write(sys.stdout)
+    else:
+        with open(args.dot_file, "w") as f:
+            write(f)
 
-    connections = generate_network_constraints(N, K)
-    functions = ["and", "nor", "xor", "majority"]
-    write_dot_file(dot_filename, connections, functions, min_instances, max_instances)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from rbn import kauffman
+from rbn.recovery import DEFAULT_BATCH_SIZE, analyse_recovery, stage_attractors
+from rbn.simulation import SAMPLING_METHODS, Simulation, stop_on_signals
+
+
+def format_steps(steps):
+    return "-" if steps is None else str(steps)
+
+
+def format_mean(mean):
+    return "-" if mean is None else f"{mean:.2f}"
+
+
+def summary_columns(summary, num_steps):
+    share, mean, median, p90, p99 = summary
+    columns = [format_mean(mean)] + [
+        format_steps(steps) if steps is not None else f">{num_steps}"
+        for steps in (median, p90, p99)
+    ]
+    return f"{share * 100:>9.2f}% | {columns[0]:>6} | " + " | ".join(
+        f"{column:>5}" for column in columns[1:]
+    )
+
+
+def print_header(first_column):
+    print(
+        f"{first_column:>12} | {'Recovered':>10} | {'Mean':>6} | "
+        f"{'p50':>5} | {'p90':>5} | {'p99':>5}"
+    )
+    print("-" * 60)
+
+
+def resolve_targets(simulation, compiled, reduction, symmetry, ids, samples):
+    # A generator of its own, so naming healthy attractors does not change
+    # the runs of a seeded analysis
+    rng = np.random.default_rng(simulation.seed).spawn(1)[0]
+    attractors = stage_attractors(
+        simulation, compiled, reduction, symmetry, samples, rng
+    )
+    by_id = {
+        attractors.get_hash(attractor_state): attractor_state
+        for attractor_state, _ in attractors.items()
+    }
+    missing = [attractor_id for attractor_id in ids if attractor_id not in by_id]
+    if missing:
+        print(f"Error: No attractor {', '.join(missing)} among the attractors found:")
+        print(", ".join(sorted(by_id)))
+        sys.exit(1)
+    return [by_id[attractor_id] for attractor_id in ids]
+
+
+def run(
+    dot_file,
+    stages,
+    runs,
+    steps,
+    seed,
+    symmetry,
+    sampling,
+    healthy_ids,
+    batch_size,
+    by_type,
+):
+    network = kauffman.KauffmanNetwork(dot_file)
+    simulation = Simulation(
+        stages, runs, steps, seed, cache_size=0, symmetry=symmetry, sampling=sampling
+    )
+    compiled, reduction, symmetry = simulation.prepare(network)
+
+    targets = None
+    if healthy_ids:
+        targets = resolve_targets(
+            simulation, compiled, reduction, symmetry, healthy_ids, batch_size
+        )
+        print(f"Healthy attractors: {', '.join(healthy_ids)}")
+
+    results = []
+    sampled = False
+    print(f"\nSteps to recover ({runs} runs per stage, at most {steps} steps):")
+    print_header("Stage")
+    # Ctrl-C reports the stages analysed so far
+    with stop_on_signals(simulation):
+        try:
+            for stage, exhaustive, times in analyse_recovery(
+                simulation, compiled, reduction, symmetry, targets, batch_size
+            ):
+                sampled = sampled or not exhaustive
+                label = f"{stage}{'' if exhaustive else '*'}"
+                print(f"{label:>12} | {summary_columns(times.summary(), steps)}")
+                results.append((stage, times))
+        except ValueError as error:
+            print(f"Error: {error}")
+            sys.exit(1)
+    if sampled:
+        print("(* sampled stage)")
+    if simulation.stages_run < stages:
+        print(f"Stopped after {simulation.stages_run} of {stages} stages")
+
+    if not by_type:
+        return
+    for node_type in reduction.types:
+        print(
+            f"\nSteps until {network.get_node_label(node_type) or node_type} recovers:"
+        )
+        print_header("Stage")
+        for stage, times in results:
+            print(
+                f"{stage:>12} | "
+                f"{summary_columns(times.type_summary(node_type), steps)}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how many steps the network in a .dot file takes to "
+        "recover from failures, stage by stage."
+    )
+    parser.add_argument("dot_file", help="Input Graphviz .dot file")
+    parser.add_argument(
+        "-s", "--stages", type=int, default=8, help="Number of stages (default: 8)"
+    )
+    parser.add_argument(
+        "-r",
+        "--runs",
+        type=int,
+        default=2000,
+        help="Number of runs per stage (default: 2000)",
+    )
+    parser.add_argument(
+        "-t",
+        "--steps",
+        type=int,
+        default=40,
+        help="Most steps a run may take to recover (default: 40)",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument(
+        "--no-symmetry",
+        action="store_true",
+        help="Simulate interchangeable instances separately",
+    )
+    parser.add_argument(
+        "--sampling",
+        choices=SAMPLING_METHODS,
+        default="uniform",
+        help="How sampled stages pick failure sets (default: uniform)",
+    )
+    parser.add_argument(
+        "--healthy",
+        action="append",
+        default=[],
+        metavar="ID",
+        help="Attractor that counts as recovered, by its id in the attractor "
+        "graph; may be repeated (default: every node healthy again)",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Number of runs stepped together (default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--by-type",
+        action="store_true",
+        help="Also report how long each node type takes to recover",
+    )
+
+    args = parser.parse_args()
+
+    dot_file = args.dot_file
+
+    # Check if the file has a .dot extension
+    if not dot_file.endswith(".dot"):
+        print(f"Error: The file '{dot_file}' does not have a .dot extension.")
+        sys.exit(1)
+
+    # Check if the file exists
+    if not os.path.exists(dot_file):
+        print(f"Error: The file '{dot_file}' does not exist.")
+        sys.exit(1)
+
+    run(
+        dot_file,
+        args.stages,
+        args.runs,
+        args.steps,
+        args.seed,
+        not args.no_symmetry,
+        args.sampling,
+        args.healthy,
+        args.batch,
+        args.by_type,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import os
+import sys
+
+from rbn.attractor_atlas import DEFAULT_ATLAS_DIRECTORY, render_files
+
+
+def collect_dot_files(paths):
+    dot_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            dot_files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(".dot")
+            )
+        else:
+            dot_files.append(path)
+    return dot_files
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Lay out attractor graphs with dot and draw them, "
+        "several files at a time."
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        default=[DEFAULT_ATLAS_DIRECTORY],
+        help="DOT files, or directories of them "
+        f"(default: {DEFAULT_ATLAS_DIRECTORY})",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of files laid out at once (default: one per CPU)",
+    )
+    parser.add_argument(
+        "-T",
+        "--format",
+        default="svg",
+        help="Output format, as dot's -T takes it (default: svg)",
+    )
+    args = parser.parse_args()
+
+    dot_files = collect_dot_files(args.paths)
+    for path in dot_files:
+        if not os.path.exists(path):
+            print(f"Error: The file '{path}' does not exist.")
+            sys.exit(1)
+        if not path.endswith(".dot"):
+            print(f"Error: The file '{path}' is not a .dot file.")
+            sys.exit(1)
+    if not dot_files:
+        print("No .dot files to render.")
+        return
+
+    for output in render_files(dot_files, max(1, args.jobs), args.format):
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import sys
+
+from rbn.result_graph import ResultGraph
+from rbn.result_text import ResultText
+from rbn.results_store import DEFAULT_STORE, ResultsStore
+
+
+def list_results(store):
+    keys = store.keys()
+    if not keys:
+        print(f"No results in {store.path}")
+        return
+    print("key               stages  runs  seed  N     P")
+    for key in keys:
+        results = store.load(key)
+        if results is None:
+            continue
+        parameters = results.parameters
+        print(
+            f"{key}  {parameters['num_stages']:<6}  {parameters['num_runs']:<4}  "
+            f"{parameters['seed']:<4}  {results.kauffman['N']:<4}  "
+            f"{results.kauffman['P']:.4f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write the reports of a stored simulation run again, "
+        "without simulating."
+    )
+    parser.add_argument(
+        "key",
+        nargs="?",
+        default=None,
+        help="Key (or its start) of the stored results; lists them if omitted",
+    )
+    parser.add_argument(
+        "--store",
+        default=DEFAULT_STORE,
+        help=f"Directory of stored results (default: {DEFAULT_STORE})",
+    )
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store)
+    if args.key is None:
+        list_results(store)
+        return
+
+    key = store.resolve(args.key)
+    if key is None:
+        print(f"Error: No single stored result matches '{args.key}'.")
+        sys.exit(1)
+
+    results = store.load(key)
+    result_graph = ResultGraph("combined_stages.dot")
+    results.render(result_graph, ResultText())
+    result_graph.write(len(results.stages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+
+from rbn import kauffman
+
+
+def run(dot_file, observed_types):
+    network = kauffman.KauffmanNetwork(dot_file)
+    simplified = network.simplify(observed_types)
+    names = simplified.original.names
+
+    print(f"\nNodes: {network.get_n()} -> {simplified.network.size()}")
+    print(f"Settled after {simplified.settle_steps} steps")
+
+    print(f"\nConstant nodes: {len(simplified.constants)}")
+    for node, value in sorted(simplified.constants.items()):
+        print(f"  {names[node]}: {'healthy' if value else 'failed'}")
+
+    print(f"\nFrozen nodes (keep their starting value): {len(simplified.frozen)}")
+    for node in simplified.frozen:
+        print(f"  {names[node]}")
+
+    print(f"\nCopies of frozen nodes: {len(simplified.aliases)}")
+    for node, source in sorted(simplified.aliases.items()):
+        print(f"  {names[node]} = {names[source]}")
+
+    print(f"\nNodes without effect on the observed types: {len(simplified.pruned)}")
+    for node in sorted(simplified.pruned):
+        print(f"  {names[node]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show how the network in a .dot file simplifies before simulation."
+    )
+    parser.add_argument("dot_file", help="Input Graphviz .dot file")
+    parser.add_argument(
+        "-o",
+        "--observe",
+        action="append",
+        default=None,
+        help="Node type whose health is of interest, can be repeated (default: all)",
+    )
+
+    args = parser.parse_args()
+
+    dot_file = args.dot_file
+
+    # Check if the file has a .dot extension
+    if not dot_file.endswith(".dot"):
+        print(f"Error: The file '{dot_file}' does not have a .dot extension.")
+        sys.exit(1)
+
+    # Check if the file exists
+    if not os.path.exists(dot_file):
+        print(f"Error: The file '{dot_file}' does not exist.")
+        sys.exit(1)
+
+    network_types = kauffman.KauffmanNetwork(dot_file).get_node_types()
+    for node_type in args.observe or []:
+        if node_type not in network_types:
+            print(f"Error: The network has no node type '{node_type}'.")
+            sys.exit(1)
+
+    run(dot_file, args.observe)
+
+
+if __name__ == "__main__":
+    main()
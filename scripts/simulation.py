@@ -1,187 +1,90 @@
 import argparse
 import os
-import random
 import sys
 
-import numpy as np
-
 from rbn import kauffman
-from rbn.attractor_graph import AttractorGraph
-from rbn.attractors import Attractors, normalize_attractor
-from rbn.result_graph import ResultGraph, AbstractResultGraph
-from rbn.result_text import ResultText, AbstractResultText
-
-
-def initialise_node_states(healthy_node_states, network, stage):
-    states = healthy_node_states.copy()
-
-    # Prepare a list of nodes that can potentially fail, excluding health indicators
-    potential_nodes_to_fail = network.get_expanded_node_list()
-
-    # Introduce failures randomly among the potential nodes
-    nodes_to_fail = random.sample(
-        potential_nodes_to_fail, min(len(potential_nodes_to_fail), stage)
-    )
-    for node in nodes_to_fail:
-        states[node] = False
-
-    return states
-
-
-def calculate_average_health_by_type(node_health_stats):
-    # Group and calculate average health by node type
-    type_health_stats = {}
-    for node in node_health_stats:
-        node_type = " ".join(node.split()[:-1])  # Extract node type from instance name
-        if node_type not in type_health_stats:
-            type_health_stats[node_type] = []
-        type_health_stats[node_type].extend(node_health_stats[node])
-    average_type_health = {
-        node_type: np.mean(healths) for node_type, healths in type_health_stats.items()
-    }
-    return average_type_health
-
-
-def evaluate_and_update_health(network, node_health_stats, states):
-    # Update individual node health
-    for node in network.get_expanded_node_list():
-        node_health_stats[node].append(states[node])
-
-
-def record_result_as_subgraph(average_type_health, network, result_graph, stage):
-    result_graph.add_subgraph(stage)
-    # Add nodes with HTML-style labels including health and instance count
-    for node_id, label in network.get_node_name_to_type_map():
-        # Find the instance count by matching the full label
-        instance_count = network.get_node_type_instance_count(label)
-        health = average_type_health.get(label, 0.5)  # Default health if not found
-        result_graph.add_node(node_id, stage, label, health, instance_count)
-    # Add edges with prefixed node names
-    for edge in network.edges():
-        result_graph.add_edge(edge, stage)
-
-
-class Simulation:
-    def __init__(self, num_stages, num_runs, num_steps):
-        self.num_stages = num_stages
-        self.num_runs_per_stage = num_runs
-        self.num_steps_per_run = num_steps
-
-    def run(
-        self,
-        network,
-        result_graph=AbstractResultGraph(),
-        result_text=AbstractResultText(),
-    ):
-        healthy_node_states = {node: True for node in network.get_expanded_node_list()}
-
-        attractors = Attractors()
-        total_on_states = 0
-        total_evaluations = 0
-        runs_with_attractor = 0
-        runs_no_attractor = 0
-
-        for stage in range(self.num_stages):
-            # To store individual node health across runs
-            node_health_stats = {node: [] for node in network.get_expanded_node_list()}
-
-            for _ in range(self.num_runs_per_stage):
-                (
-                    total_evaluations,
-                    total_on_states,
-                    attractor_found,
-                ) = self.run_single_simulation(
-                    attractors,
-                    healthy_node_states,
-                    network,
-                    node_health_stats,
-                    stage,
-                    total_evaluations,
-                    total_on_states,
-                )
-                if attractor_found:
-                    runs_with_attractor = runs_with_attractor + 1
-                else:
-                    runs_no_attractor = runs_no_attractor + 1
-
-            # Calculate average health for this stage
-            average_type_health = calculate_average_health_by_type(node_health_stats)
-
-            result_text.print_stage_summary(stage, average_type_health)
-            record_result_as_subgraph(average_type_health, network, result_graph, stage)
-
-        p = total_on_states / total_evaluations if total_evaluations > 0 else 0
-        n = network.get_n()
-        k = network.get_average_k()
-        max_k = network.get_max_k()
-
-        result_text.print_attractor_summary(
-            attractors, runs_with_attractor, runs_no_attractor
-        )
-        result_text.print_kauffman_parameters(k, max_k, n, p)
-
-        if attractors.count() < 20:
-            print("Creating attractor graph")
-            create_attractor_graph(attractors, network, k, max_k, n, p)
-        result_graph.add_info_box(k, max_k, n, p)
-
-        return p, attractors.count()
-
-    def run_single_simulation(
-        self,
-        attractors,
-        healthy_node_states,
-        network,
-        node_health_stats,
-        stage,
-        total_evaluations,
-        total_on_states,
-    ):
-        state_history = []
-        attractor_found = False
-        attractor_sequence = []
-        states = initialise_node_states(healthy_node_states, network, stage)
-        triggering_event = frozenset(states.items())
-        for _ in range(self.num_steps_per_run):
-            states = network.update_states(states)
-            total_on_states += sum(states.values())
-            total_evaluations += len(states)
-
-            # Compute normalized state (or attractor key)
-            current_state = normalize_attractor(frozenset(states.items()), network)
-
-            if current_state in state_history:
-                attractor_index = state_history.index(current_state)
-                attractor_sequence = state_history[attractor_index:]
-                attractor_found = True
-                break
-
-            state_history.append(current_state)
-        evaluate_and_update_health(network, node_health_stats, states)
-        if attractor_found:
-            attractors.update_attractor_counts(attractor_sequence, triggering_event)
-        return total_evaluations, total_on_states, attractor_found
-
-
-def create_attractor_graph(attractors, network, k, max_k, n, p):
-    attractor_graph = AttractorGraph(network, attractors.total_runs())
-
-    for attractor, count in attractors.items():
-        attractor_id = attractors.get_hash(attractor)
-        attractor_graph.add_attractor(attractor, attractor_id, count)
+from rbn.distributed import (
+    AUTHKEY_VARIABLE,
+    Coordinator,
+    parse_address,
+    start_local_workers,
+)
+from rbn.result_graph import ResultGraph
+from rbn.result_text import ResultText
+from rbn.results_store import DEFAULT_STORE, RecordingResultText, ResultsStore
+from rbn.simulation import (
+    DEFAULT_BATCH_RUNS,
+    DEFAULT_CACHE_SIZE,
+    SAMPLING_METHODS,
+    Simulation,
+    stop_on_signals,
+)
+from rbn.watch import DEFAULT_INTERVAL, NetworkChange, watch
+
+
+def random_sim_kauffman(
+    output_dot_file,
+    stages,
+    runs,
+    steps,
+    seed=None,
+    cache_size=DEFAULT_CACHE_SIZE,
+    record_path=None,
+    symmetry=True,
+    target_width=None,
+    max_runs=None,
+    batch_runs=DEFAULT_BATCH_RUNS,
+    sampling="uniform",
+    importance_strength=1.0,
+    coordinator=None,
+    progress=False,
+    store=None,
+    rerun=False,
+):
+    network = kauffman.KauffmanNetwork(output_dot_file)
+    result_graph = ResultGraph("combined_stages.dot")
+    result_text = ResultText(progress)
+    simulation = Simulation(
+        stages,
+        runs,
+        steps,
+        seed,
+        cache_size,
+        record_path,
+        symmetry,
+        target_width,
+        max_runs,
+        batch_runs,
+        sampling,
+        importance_strength,
+        coordinator,
+    )
 
-    attractor_graph.add_incidence_matrix(attractors)
-    attractor_graph.add_info_box(k, max_k, n, p)
-    attractor_graph.write("attractors_graph.dot")
+    # Only seeded runs of deterministic networks give the same results again
+    key = None
+    if (
+        store is not None
+        and seed is not None
+        and record_path is None
+        and not network.compile().stochastic
+    ):
+        key = store.key(network, simulation.parameters())
+        results = None if rerun else store.load(key)
+        if results is not None:
+            print(f"Using results {key} from {store.path}")
+            results.render(result_graph, result_text, network)
+            result_graph.write(len(results.stages))
+            return
+        result_text = RecordingResultText(result_text, network, simulation.parameters())
 
+    # Ctrl-C finishes with the stages run so far; a second one aborts
+    with stop_on_signals(simulation):
+        simulation.run(network, result_graph, result_text)
+    result_graph.write(simulation.stages_run)
 
-def random_sim_kauffman(output_dot_file, stages, runs, steps):
-    network = kauffman.KauffmanNetwork(output_dot_file)
-    result_graph = ResultGraph()
-    result_text = ResultText()
-    simulation = Simulation(stages, runs, steps)
-    simulation.run(network, result_graph, result_text)
-    result_graph.write(stages, "combined_stages.dot")
+    if key is not None and simulation.stages_run == stages:
+        store.save(key, result_text.results)
+        print(f"Results saved to {store.path} as {key}")
 
 
 def main():
@@ -206,6 +109,107 @@ def main():
         default=40,
         help="Number of steps per run (default: 40)",
     )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        help=f"Number of states remembered across runs, 0 to disable (default: {DEFAULT_CACHE_SIZE})",
+    )
+    parser.add_argument(
+        "--record",
+        default=None,
+        help="Directory to record every state of every run to",
+    )
+    parser.add_argument(
+        "--no-symmetry",
+        action="store_true",
+        help="Simulate interchangeable instances separately",
+    )
+    parser.add_argument(
+        "--target-width",
+        type=float,
+        default=None,
+        help="Run sampled stages in batches until the 95%% confidence interval "
+        "on every type's health is at most this wide",
+    )
+    parser.add_argument(
+        "--max-runs",
+        type=int,
+        default=None,
+        help="Most runs per stage with --target-width (default: 10 x --runs)",
+    )
+    parser.add_argument(
+        "--batch-runs",
+        type=int,
+        default=DEFAULT_BATCH_RUNS,
+        help=f"Runs per batch with --target-width (default: {DEFAULT_BATCH_RUNS})",
+    )
+    parser.add_argument(
+        "--sampling",
+        choices=SAMPLING_METHODS,
+        default="uniform",
+        help="How sampled stages pick failure sets (default: uniform)",
+    )
+    parser.add_argument(
+        "--importance-strength",
+        type=float,
+        default=1.0,
+        help="How strongly --sampling importance favours types many nodes "
+        "depend on (default: 1.0)",
+    )
+    parser.add_argument(
+        "--listen",
+        default=None,
+        metavar="HOST:PORT",
+        help="Hand the runs out to workers that connect to this address "
+        "(see simulation_worker.py)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Number of worker processes to start on this machine",
+    )
+    parser.add_argument(
+        "--authkey",
+        default=os.environ.get(AUTHKEY_VARIABLE),
+        help=f"Secret shared with the workers (default: ${AUTHKEY_VARIABLE})",
+    )
+    parser.add_argument(
+        "--no-progress",
+        action="store_true",
+        help="Do not show the progress of each stage on stderr "
+        "(shown by default when stderr is a terminal)",
+    )
+    parser.add_argument(
+        "--store",
+        default=DEFAULT_STORE,
+        help="Directory of stored results, reused for seeded runs with the "
+        f"same network and settings (default: {DEFAULT_STORE})",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Neither reuse nor store results",
+    )
+    parser.add_argument(
+        "--rerun",
+        action="store_true",
+        help="Simulate even if stored results exist, replacing them",
+    )
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="Keep running, and simulate again whenever the file is saved",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help=f"Seconds between checks of the file with --watch (default: {DEFAULT_INTERVAL})",
+    )
 
     args = parser.parse_args()
 
@@ -227,7 +231,85 @@ def main():
     # File exists and has .dot extension
     print(f"File '{dot_file}' is valid and ready for use with {stages} stages.")
 
-    random_sim_kauffman(dot_file, stages, runs, steps)
+    coordinator = None
+    if args.listen is not None or args.workers > 0:
+        if args.watch:
+            print("Error: --watch runs in one process.")
+            sys.exit(1)
+        if args.record is not None:
+            print("Error: Runs simulated by workers cannot be recorded.")
+            sys.exit(1)
+        if args.listen is not None and not args.authkey:
+            print(f"Error: Set --authkey or {AUTHKEY_VARIABLE} to accept workers.")
+            sys.exit(1)
+        address = ("localhost", 0)
+        if args.listen is not None:
+            address = parse_address(args.listen)
+        authkey = args.authkey.encode("utf-8") if args.authkey else os.urandom(16)
+        with open(dot_file, encoding="utf-8") as f:
+            coordinator = Coordinator(f.read(), address, authkey)
+        print(
+            f"Waiting for workers on {coordinator.address[0]}:{coordinator.address[1]}"
+        )
+        start_local_workers(coordinator.address, authkey, args.workers)
+
+    def simulate():
+        random_sim_kauffman(
+            dot_file,
+            stages,
+            runs,
+            steps,
+            args.seed,
+            args.cache_size,
+            args.record,
+            not args.no_symmetry,
+            args.target_width,
+            args.max_runs,
+            args.batch_runs,
+            args.sampling,
+            args.importance_strength,
+            coordinator,
+            sys.stderr.isatty() and not args.no_progress,
+            None if args.no_store else ResultsStore(args.store),
+            args.rerun,
+        )
+
+    if not args.watch:
+        simulate()
+        if coordinator is not None:
+            coordinator.close()
+        return
+
+    previous = None
+    try:
+        for _ in watch(dot_file, args.interval):
+            try:
+                compiled = kauffman.KauffmanNetwork(dot_file).compile()
+            except Exception as error:
+                # Keep watching while the file is being edited
+                print(f"\nCould not load '{dot_file}': {error}")
+                continue
+            if previous is not None:
+                print_change(NetworkChange(previous, compiled))
+            previous = compiled
+            try:
+                simulate()
+            except Exception as error:
+                # Report it and wait for the next save
+                print(f"\nCould not simulate '{dot_file}': {error}")
+    except KeyboardInterrupt:
+        print()
+
+
+def print_change(change):
+    print(f"\n{'=' * 42}")
+    if not change:
+        print("No change to the nodes' functions or inputs")
+        return
+    print(f"Changed types: {', '.join(change.changed_types()) or '-'}")
+    if change.removed:
+        print(f"Removed nodes: {len(change.removed)}")
+    print(f"Types downstream of the change: {', '.join(change.affected_types())}")
 
 
 if __name__ == "__main__":
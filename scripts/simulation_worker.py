@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+
+from rbn.distributed import AUTHKEY_VARIABLE, parse_address, run_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate runs handed out by a simulation started with --listen."
+    )
+    parser.add_argument("address", help="HOST:PORT the simulation listens on")
+    parser.add_argument(
+        "--authkey",
+        default=os.environ.get(AUTHKEY_VARIABLE),
+        help=f"Secret shared with the simulation (default: ${AUTHKEY_VARIABLE})",
+    )
+    args = parser.parse_args()
+
+    if not args.authkey:
+        print(f"Error: Set --authkey or {AUTHKEY_VARIABLE}.")
+        sys.exit(1)
+
+    try:
+        address = parse_address(args.address)
+    except ValueError:
+        print(f"Error: '{args.address}' is not of the form HOST:PORT.")
+        sys.exit(1)
+
+    run_worker(address, args.authkey.encode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
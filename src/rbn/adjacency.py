@@ -0,0 +1,165 @@
+import csv
+
+import numpy as np
+
+# Edge categories of the adjacency image
+NO_EDGE = 0
+SINGLE_EDGE = 1
+MUTUAL_EDGE = 2
+SELF_LOOP = 3
+
+# Largest image side in cells; bigger matrices are binned down to it
+MAX_IMAGE_CELLS = 2000
+
+
+class Adjacency:
+    """
+    Sparse adjacency of a network as sorted, duplicate-free edge arrays:
+    edge e goes from sources[e] to targets[e], in the direction of the DOT
+    edges (a node points at the nodes it reads).
+    """
+
+    def __init__(self, names, sources, targets):
+        self.names = list(names)
+        size = len(self.names)
+        keys = np.unique(
+            np.asarray(sources, dtype=np.int64) * size
+            + np.asarray(targets, dtype=np.int64)
+        )
+        self.sources = keys // size
+        self.targets = keys % size
+        self._keys = keys
+
+    def size(self):
+        return len(self.names)
+
+    def out_degrees(self):
+        return np.bincount(self.sources, minlength=self.size())
+
+    def in_degrees(self):
+        return np.bincount(self.targets, minlength=self.size())
+
+    def self_loops(self):
+        return self.sources == self.targets
+
+    def mutual(self):
+        """Edges whose reverse edge also exists, self-loops excluded."""
+        reverse = self.targets * self.size() + self.sources
+        return np.isin(reverse, self._keys, assume_unique=True) & ~self.self_loops()
+
+    def categories(self):
+        categories = np.full(len(self.sources), SINGLE_EDGE, dtype=np.uint8)
+        categories[self.mutual()] = MUTUAL_EDGE
+        categories[self.self_loops()] = SELF_LOOP
+        return categories
+
+    def csr(self):
+        """Row pointers and targets of the edges, grouped by source."""
+        indptr = np.searchsorted(self.sources, np.arange(self.size() + 1))
+        return indptr, self.targets
+
+    def mutual_counts(self):
+        """Number of nodes each node shares a mutual edge with."""
+        return np.bincount(self.sources[self.mutual()], minlength=self.size())
+
+    def image(self, max_cells=MAX_IMAGE_CELLS):
+        """
+        Matrix of edge categories. Matrices larger than max_cells a side are
+        binned, each cell showing the strongest category it contains.
+        """
+        size = self.size()
+        cells = min(size, max_cells)
+        rows = self.sources * cells // max(size, 1)
+        columns = self.targets * cells // max(size, 1)
+        image = np.zeros((cells, cells), dtype=np.uint8)
+        np.maximum.at(image, (rows, columns), self.categories())
+        return image
+
+
+def instance_adjacency(compiled):
+    """Adjacency of the expanded network, straight from the compiled CSR arrays."""
+    degrees = np.diff(compiled.indptr)
+    sources = np.repeat(np.arange(compiled.size()), degrees)
+    return Adjacency(compiled.names, sources, compiled.indices)
+
+
+def type_adjacency(compiled):
+    """Adjacency between node types: an edge where any instances are connected."""
+    types = list(dict.fromkeys(compiled.node_types))
+    type_index = {node_type: i for i, node_type in enumerate(types)}
+    node_type_index = np.array(
+        [type_index[node_type] for node_type in compiled.node_types], dtype=np.int64
+    )
+    instances = instance_adjacency(compiled)
+    return Adjacency(
+        types,
+        node_type_index[instances.sources],
+        node_type_index[instances.targets],
+    )
+
+
+def write_degree_table(adjacency, path, node_types=None):
+    """CSV of in/out degree, self-loop and mutual neighbours per node."""
+    self_loops = np.zeros(adjacency.size(), dtype=bool)
+    self_loops[adjacency.sources[adjacency.self_loops()]] = True
+    columns = [
+        adjacency.names,
+        adjacency.in_degrees().tolist(),
+        adjacency.out_degrees().tolist(),
+        self_loops.tolist(),
+        adjacency.mutual_counts().tolist(),
+    ]
+    header = ["node", "in_degree", "out_degree", "self_loop", "mutual"]
+    if node_types is not None:
+        header.insert(1, "type")
+        columns.insert(1, node_types)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(zip(*columns))
+
+
+def write_edge_table(adjacency, path):
+    """CSV of every edge and its category."""
+    kinds = {SINGLE_EDGE: "single", MUTUAL_EDGE: "mutual", SELF_LOOP: "self-loop"}
+    names = adjacency.names
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["source", "target", "kind"])
+        writer.writerows(
+            (names[source], names[target], kinds[category])
+            for source, target, category in zip(
+                adjacency.sources.tolist(),
+                adjacency.targets.tolist(),
+                adjacency.categories().tolist(),
+            )
+        )
+
+
+def write_image(adjacency, path, max_cells=MAX_IMAGE_CELLS):
+    """
+    Render the adjacency image to a file without a display: white for no
+    edge, black for a single edge, red for mutual edges, orange for
+    self-loops. Labels are only drawn when every node has its own cell.
+    """
+    # Imported here so the rest of the module works without matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.colors import BoundaryNorm, ListedColormap
+    from matplotlib.figure import Figure
+
+    image = adjacency.image(max_cells)
+    cmap = ListedColormap(["white", "black", "red", "orange"])
+    norm = BoundaryNorm([-0.5, 0.5, 1.5, 2.5, 3.5], cmap.N)
+    labelled = len(image) == adjacency.size() and adjacency.size() <= 100
+    side = 8 if not labelled else max(6, adjacency.size() * 0.25)
+    figure = Figure(figsize=(side, side))
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    axes.imshow(image, cmap=cmap, norm=norm, interpolation="nearest")
+    if labelled:
+        axes.set_xticks(range(adjacency.size()), labels=adjacency.names, rotation=90)
+        axes.set_yticks(range(adjacency.size()), labels=adjacency.names)
+    axes.set_xlabel("Target")
+    axes.set_ylabel("Source")
+    figure.tight_layout()
+    figure.savefig(path)
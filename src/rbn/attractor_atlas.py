@@ -0,0 +1,200 @@
+import html
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .attractor_graph import AttractorGraph, create_info_box_label
+from .dot_writer import DotWriter
+from .result_graph import get_node_color
+
+DEFAULT_ATLAS_DIRECTORY = "attractors"
+INDEX_FILE = "index.dot"
+# The most dominant attractors get a graph of their own
+DEFAULT_MAX_FILES = 100
+# and at most this many are listed in the index
+DEFAULT_MAX_INDEX = 500
+
+
+def attractor_filename(attractor_id, extension="dot"):
+    return f"attractor_{attractor_id}.{extension}"
+
+
+def type_behaviour(attractor_state, node_types):
+    """
+    The types failed in every state of an attractor, and the types failed
+    in some of its states only.
+    """
+    values = {node_type: set() for node_type in node_types}
+    for state in attractor_state:
+        for node_type, healthy in state:
+            values[node_type].add(healthy)
+    failed = [node_type for node_type in node_types if values[node_type] == {False}]
+    oscillating = [node_type for node_type in node_types if len(values[node_type]) > 1]
+    return failed, oscillating
+
+
+def _type_label(network, node_type):
+    # Types without a label attribute go by their name
+    return network.get_node_label(node_type) or node_type
+
+
+def _index_label(attractor_id, dominance, length, failed, oscillating, network):
+    rows = [
+        f"<B>#{attractor_id}</B>",
+        f"Dominance {dominance * 100:.2f}%",
+        f"{length} state{'s' if length > 1 else ''}",
+    ]
+    if failed:
+        labels = ", ".join(_type_label(network, t) for t in failed)
+        rows.append(f"Failed: {html.escape(labels)}")
+    if oscillating:
+        labels = ", ".join(_type_label(network, t) for t in oscillating)
+        rows.append(f"Oscillating: {html.escape(labels)}")
+    return "<" + "<BR/>".join(rows) + ">"
+
+
+def write_attractor_index(
+    attractors, network, path, ranked, with_files, K, MAX_K, N, P
+):
+    """
+    One node per attractor in `ranked`, grouped by how many types it has
+    failed and coloured by the share of types still healthy. An edge leads
+    from an attractor to each one that has one more type failed, labelled
+    with that type. Attractors in with_files link to their own DOT file,
+    which render_file turns into a link to its drawing.
+    """
+    node_types = network.get_node_types()
+    writer = DotWriter(path, rankdir="TB")
+    behaviour = {}
+    by_failed_count = {}
+    for attractor, _ in ranked:
+        failed, oscillating = type_behaviour(attractor, node_types)
+        behaviour[attractor] = (failed, oscillating)
+        by_failed_count.setdefault(len(failed), []).append(attractor)
+
+    for failed_count in sorted(by_failed_count):
+        label = "No failed types"
+        if failed_count:
+            label = f"{failed_count} failed type{'s' if failed_count > 1 else ''}"
+        writer.begin_subgraph(f"cluster_failed_{failed_count}", label=label)
+        for attractor in by_failed_count[failed_count]:
+            attractor_id = attractors.get_hash(attractor)
+            failed, oscillating = behaviour[attractor]
+            attributes = {}
+            if attractor in with_files:
+                attributes["URL"] = attractor_filename(attractor_id)
+            writer.node(
+                attractor_id,
+                label=_index_label(
+                    attractor_id,
+                    attractors.dominance(attractor),
+                    len(attractor),
+                    failed,
+                    oscillating,
+                    network,
+                ),
+                shape="box",
+                style="filled",
+                fillcolor=get_node_color(1 - failed_count / len(node_types)),
+                **attributes,
+            )
+        writer.end_subgraph()
+
+    # The most dominant attractor with each set of failed types stands for it
+    by_failed = {}
+    for attractor, _ in ranked:
+        by_failed.setdefault(frozenset(behaviour[attractor][0]), attractor)
+    for attractor, _ in ranked:
+        failed = frozenset(behaviour[attractor][0])
+        for node_type in sorted(failed):
+            parent = by_failed.get(failed - {node_type})
+            if parent is not None:
+                writer.edge(
+                    attractors.get_hash(parent),
+                    attractors.get_hash(attractor),
+                    label=_type_label(network, node_type),
+                )
+
+    hidden = attractors.count() - len(ranked)
+    if hidden > 0:
+        share = 1 - sum(attractors.dominance(attractor) for attractor, _ in ranked)
+        writer.node(
+            "more",
+            label=f"{hidden} less dominant attractors, {share * 100:.2f}% dominance",
+            shape="note",
+        )
+    writer.node(
+        "info_box",
+        label=create_info_box_label(N, K, MAX_K, P),
+        shape="note",
+        style="filled",
+        color="lightgrey",
+    )
+    writer.close()
+
+
+def write_attractor_atlas(
+    attractors,
+    network,
+    directory,
+    K,
+    MAX_K,
+    N,
+    P,
+    max_files=DEFAULT_MAX_FILES,
+    max_index=DEFAULT_MAX_INDEX,
+):
+    """
+    Write the `max_files` most dominant attractors to a DOT file each in
+    directory, and an index of the `max_index` most dominant ones. Files
+    of an earlier atlas in the directory are removed. Returns the paths
+    written, index first.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.startswith("attractor_") or name.startswith("index."):
+            os.remove(os.path.join(directory, name))
+
+    ranked = sorted(attractors.items(), key=lambda item: -attractors.dominance(item[0]))
+    total_runs = attractors.total_runs()
+    paths = [os.path.join(directory, INDEX_FILE)]
+    for attractor, count in ranked[:max_files]:
+        attractor_id = attractors.get_hash(attractor)
+        path = os.path.join(directory, attractor_filename(attractor_id))
+        attractor_graph = AttractorGraph(network, total_runs, path)
+        attractor_graph.add_attractor(attractor, attractor_id, count)
+        attractor_graph.add_info_box(K, MAX_K, N, P)
+        attractor_graph.write()
+        paths.append(path)
+
+    with_files = {attractor for attractor, _ in ranked[:max_files]}
+    write_attractor_index(
+        attractors, network, paths[0], ranked[:max_index], with_files, K, MAX_K, N, P
+    )
+    return paths
+
+
+def render_file(path, output_format="svg"):
+    """
+    Lay out a DOT file with dot and draw it next to it. Links to other DOT
+    files, as in the atlas index, are drawn as links to their drawings in
+    the same format.
+    """
+    # Only drawing needs graphviz itself
+    import pygraphviz as pgv
+
+    graph = pgv.AGraph(path)
+    for node in graph.nodes():
+        url = node.attr.get("URL")
+        if url and url.endswith(".dot"):
+            node.attr["URL"] = os.path.splitext(url)[0] + "." + output_format
+    output = os.path.splitext(path)[0] + "." + output_format
+    graph.draw(output, format=output_format, prog="dot")
+    return output
+
+
+def render_files(paths, processes=1, output_format="svg"):
+    """Draw every DOT file, laid out in `processes` worker processes."""
+    if processes > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(processes) as executor:
+            return list(executor.map(render_file, paths, [output_format] * len(paths)))
+    return [render_file(path, output_format) for path in paths]
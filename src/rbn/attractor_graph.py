@@ -1,5 +1,4 @@
-import pygraphviz as pgv
-
+from .dot_writer import DotWriter
 from .incidence_matrix import (
     build_html_table,
     build_incidence_matrix_from_attractor_counts,
@@ -11,14 +10,15 @@ def create_info_box_label(N, K, MAX_K, P):
 
 
 class StateGraph:
-    def __init__(self, attractor_id, state_id, attractor_subgraph, network):
+    def __init__(self, attractor_id, state_id, writer, network):
         self._network = network
         self._attractor_id = attractor_id
         self._state_id = state_id
+        self._writer = writer
         state_graph_label = f"State {state_id}"
         state_graph_name = f"cluster_{self._attractor_id}_state_{state_id}"
-        self._graph = attractor_subgraph.add_subgraph(
-            name=state_graph_name,
+        self._writer.begin_subgraph(
+            state_graph_name,
             label=state_graph_label,
             style="filled",
             fillcolor="lightblue",
@@ -30,13 +30,14 @@ class StateGraph:
         self.add_edges()
         if is_cyclic:
             state_name = f"attractor_{self._attractor_id}_state_{self._state_id}"
-            self._graph.add_node(state_name, shape="none", label="", margin="0")
+            self._writer.node(state_name, shape="none", label="", margin="0")
+        self._writer.end_subgraph()
 
     def add_edges(self):
         for edge in self._network.edges():
             prefixed_source_id = f"{self._attractor_id}_{self._state_id}_{edge[0]}"
             prefixed_target_id = f"{self._attractor_id}_{self._state_id}_{edge[1]}"
-            self._graph.add_edge(prefixed_source_id, prefixed_target_id)
+            self._writer.edge(prefixed_source_id, prefixed_target_id)
 
     def add_nodes(self, node_to_state):
         for node_name, node_label in self._network.get_node_name_to_type_map():
@@ -44,7 +45,7 @@ class StateGraph:
             if not node_to_state[node_name]:
                 color = "red"
 
-            self._graph.add_node(
+            self._writer.node(
                 f"{self._attractor_id}_{self._state_id}_{node_name}",
                 style="filled",
                 label=node_label,
@@ -53,18 +54,24 @@ class StateGraph:
 
 
 class AttractorGraph:
-    def __init__(self, network, total_runs):
+    """
+    Writes each attractor to `filename` as it is added; the file is
+    complete once `write` is called. Layout is left to whatever displays
+    the file unless `write` is asked for it.
+    """
+
+    def __init__(self, network, total_runs, filename):
         self._network = network
-        self._master_graph = pgv.AGraph(directed=True)
-        self._master_graph.graph_attr["rankdir"] = "LR"
+        self._filename = filename
+        self._writer = DotWriter(filename, rankdir="LR")
         self._attractor_id = 0
         self._total_runs = total_runs
 
     def add_attractor(self, attractor, attractor_id, count):
         subgraph_label = f"Attractor #{attractor_id}, {count} stressors encountered. Attractor dominance {round((count / self._total_runs) * 100, 2)}%"
         subgraph_name = f"cluster_{self._attractor_id}"
-        attractor_subgraph = self._master_graph.add_subgraph(
-            name=subgraph_name,
+        self._writer.begin_subgraph(
+            subgraph_name,
             label=subgraph_label,
             style="filled",
             fillcolor="lightgrey",
@@ -72,25 +79,23 @@ class AttractorGraph:
         states = list(attractor)  # Convert tuple to list for indexing
         is_cyclic = len(states) > 1
         for state_id, state in enumerate(states):
-            state_graph = StateGraph(
-                self._attractor_id, state_id, attractor_subgraph, self._network
-            )
-            state_graph.record_state_as_graph(state, is_cyclic)
+            self.add_state(state_id, state, states)
         if is_cyclic:
-            self.link_states(attractor_subgraph, states)
+            self.link_states(states)
+        self._writer.end_subgraph()
         self._attractor_id += 1
 
-    def link_states(self, attractor_subgraph, states):
+    def link_states(self, states):
         for i in range(0, len(states)):
-            attractor_subgraph.add_edge(
+            self._writer.edge(
                 f"attractor_{self._attractor_id}_state_{i}",
                 f"attractor_{self._attractor_id}_state_{(i + 1) % len(states)}",
             )
 
-    def add_state(self, attractor_subgraph, state_id, state, states):
+    def add_state(self, state_id, state, states):
         is_cyclic = len(states) > 1
         state_graph = StateGraph(
-            self._attractor_id, state_id, attractor_subgraph, self._network
+            self._attractor_id, state_id, self._writer, self._network
         )
         state_graph.record_state_as_graph(state, is_cyclic)
 
@@ -101,7 +106,7 @@ class AttractorGraph:
         incidence_matrix_table = build_html_table(
             incidence_matrix, attractor_ids, self._network
         )
-        self._master_graph.add_node(
+        self._writer.node(
             "incidence_matrix",
             label=f"<{incidence_matrix_table}>",
             shape="note",
@@ -112,7 +117,7 @@ class AttractorGraph:
     def add_info_box(self, K, MAX_K, N, P):
         # Add an info box node
         info_box_label = create_info_box_label(N, K, MAX_K, P)
-        self._master_graph.add_node(
+        self._writer.node(
             "info_box",
             label=info_box_label,
             shape="note",
@@ -120,6 +125,12 @@ class AttractorGraph:
             color="lightgrey",
         )
 
-    def write(self, filename):
-        self._master_graph.layout(prog="dot")
-        self._master_graph.write(filename)
+    def write(self, layout=False):
+        self._writer.close()
+        if layout:
+            # Only laying out needs graphviz itself
+            import pygraphviz as pgv
+
+            graph = pgv.AGraph(self._filename)
+            graph.layout(prog="dot")
+            graph.write(self._filename)
@@ -1,4 +1,5 @@
 import base64
+import copy
 import hashlib
 import re
 from collections import defaultdict
@@ -64,27 +65,96 @@ class Attractors:
     def __init__(self):
         self._hashes = {}
         self._trigger_events = {}
+        # Distinct events known to be missing from the HyperLogLog counters:
+        # the rest of the orbit of an event that stands for its symmetric
+        # copies, by the event, so an orbit recorded again counts once
+        self._extra_events = defaultdict(dict)
+        # Weight of the runs of the current stage ending in each attractor,
+        # and the share of its stage's runs summed over the finished stages
+        self._stage_weights = defaultdict(float)
+        self._shares = defaultdict(float)
+        self._stages = 0
 
     def count(self):
         return len(self._trigger_events)
 
     def total_runs(self):
-        return sum(len(hll) for hll in self._trigger_events.values())
+        return sum(count for _, count in self.items())
 
     def items(self):
-        return tuple((key, len(value)) for key, value in self._trigger_events.items())
+        return tuple(
+            (key, len(value) + sum(self._extra_events[key].values()))
+            for key, value in self._trigger_events.items()
+        )
 
     def get_hash(self, attractor_state):
         return self._hashes[attractor_state]
 
-    def update_attractor_counts(self, states, triggering_event):
+    def update_attractor_counts(self, states, triggering_event, events=1, weight=1):
+        """
+        Record a run from triggering_event, an integer mask of the failed
+        nodes, ending in the attractor of states. events is the number of
+        distinct events the run stands for, all of them counted once however
+        often triggering_event is recorded, or the masks of those events
+        themselves, which are counted like triggering events.
+        """
         attractor_state = normalize_tuple(tuple(states))
         # Create a HyperLogLog counter if needed.
         if attractor_state not in self._trigger_events:
             self._trigger_events[attractor_state] = hyperloglog.HyperLogLog(0.01)
             self._hashes[attractor_state] = short_hash(attractor_state)
-        # Record the triggering event (its hash or the event itself)
-        self._trigger_events[attractor_state].add(str(hash(triggering_event)))
+        counter = self._trigger_events[attractor_state]
+        if isinstance(events, int):
+            counter.add(hex(triggering_event))
+            if events > 1:
+                self._extra_events[attractor_state][triggering_event] = events - 1
+        else:
+            for event in events:
+                counter.add(hex(event))
+        self._stage_weights[attractor_state] += weight
+
+    def merge(self, other):
+        """
+        Add the runs recorded in other, of the same stage, as if they had
+        been recorded here. Attractors new to this one come after the ones
+        it already knows, in the order other found them.
+        """
+        for attractor_state, counter in other._trigger_events.items():
+            if attractor_state in self._trigger_events:
+                self._trigger_events[attractor_state].update(counter)
+            else:
+                self._trigger_events[attractor_state] = copy.deepcopy(counter)
+                self._hashes[attractor_state] = other._hashes[attractor_state]
+            self._extra_events[attractor_state].update(
+                other._extra_events[attractor_state]
+            )
+            self._stage_weights[attractor_state] += other._stage_weights[
+                attractor_state
+            ]
+
+    def end_stage(self, total_weight):
+        """
+        Close a stage whose runs weigh total_weight in all, and return the
+        share of them that ended in each attractor.
+        """
+        shares = {
+            attractor_state: weight / total_weight
+            for attractor_state, weight in self._stage_weights.items()
+        }
+        for attractor_state, share in shares.items():
+            self._shares[attractor_state] += share
+        self._stage_weights.clear()
+        self._stages += 1
+        return shares
+
+    def dominance(self, attractor_state):
+        """Share of the runs ending in an attractor, averaged over the stages."""
+        return self._shares[attractor_state] / self._stages if self._stages else 0
+
+
+def is_total_outage(attractor_state):
+    """True if every type is failed in every state of a normalized attractor."""
+    return not any(healthy for state in attractor_state for _, healthy in state)
 
 
 def normalize_frozenset(frozen_set_instance):
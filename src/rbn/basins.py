@@ -0,0 +1,144 @@
+import numpy as np
+
+from .attractors import Attractors
+from .derrida import random_states
+from .simulation import Z_95
+
+DEFAULT_SAMPLES = 100000
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_STEPS = 40
+
+
+def pack_codes(reduced):
+    """
+    The rows of a (batch, types) boolean array as fixed-width byte strings,
+    little-endian like the codes of the type reduction, so they compare with
+    == and sort as a whole.
+    """
+    packed = np.packbits(reduced, axis=1, bitorder="little")
+    return np.ascontiguousarray(packed).view(np.dtype((np.void, packed.shape[1])))[:, 0]
+
+
+def unpack_code(packed):
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+def record_cycles(attractors, reduction, history, step, runs, periods, first_event):
+    """
+    Record the runs that repeated a normalized state at `step`, each ending
+    in the cycle of its last `periods` states. Runs with the same cycle are
+    recorded together.
+    """
+    for period in np.unique(periods):
+        with_period = runs[periods == period]
+        cycles = np.ascontiguousarray(history[step - period : step, with_period].T)
+        width = cycles.dtype.itemsize * period
+        keys = cycles.view(np.dtype((np.void, width)))[:, 0]
+        _, index, counts = np.unique(keys, return_index=True, return_counts=True)
+        for i, count in zip(index, counts):
+            attractors.update_attractor_counts(
+                [reduction.to_frozenset(unpack_code(code)) for code in cycles[i]],
+                first_event + int(with_period[i]),
+                events=int(count),
+                weight=int(count),
+            )
+
+
+def run_to_attractors(
+    compiled, reduction, states, attractors, rng, num_steps=DEFAULT_STEPS, first_event=0
+):
+    """
+    Step a (batch, N) array of initial states together and record in
+    attractors the attractor each one reaches within num_steps steps, found
+    as the simulation finds it: once the normalized state repeats. Runs are
+    dropped from the batch as they reach an attractor. Returns the number
+    that did.
+    """
+    count = len(states)
+    active = np.arange(count)
+    history = None
+    for step in range(num_steps):
+        states = compiled.step_batch(states, rng)
+        codes = pack_codes(reduction.reduce_batch(states, rng))
+        if history is None:
+            history = np.empty((num_steps, count), dtype=codes.dtype)
+        # matches[i, r] is true when run r was in this state after step i + 1
+        matches = history[:step, active] == codes
+        repeated = matches.any(axis=0)
+        if repeated.any():
+            first = matches.argmax(axis=0)[repeated]
+            record_cycles(
+                attractors,
+                reduction,
+                history,
+                step,
+                active[repeated],
+                step - first,
+                first_event,
+            )
+            active = active[~repeated]
+            states = states[~repeated]
+            codes = codes[~repeated]
+        if len(active) == 0:
+            break
+        history[step, active] = codes
+    return count - len(active)
+
+
+def estimate_basins(
+    compiled,
+    reduction,
+    samples,
+    rng,
+    num_steps=DEFAULT_STEPS,
+    batch_size=DEFAULT_BATCH_SIZE,
+    bias=0.5,
+):
+    """
+    Run `samples` random initial states, each node independently healthy
+    with probability bias, to their attractors, in batches of batch_size.
+    Returns (attractors, resolved), where the dominance of each attractor is
+    the share of the samples in its basin and resolved is the number of
+    samples that reached an attractor within num_steps steps.
+    """
+    attractors = Attractors()
+    resolved = 0
+    for start in range(0, samples, batch_size):
+        count = min(batch_size, samples - start)
+        states = random_states(count, compiled.size(), rng, bias)
+        resolved += run_to_attractors(
+            compiled, reduction, states, attractors, rng, num_steps, start
+        )
+    attractors.end_stage(samples)
+    return attractors, resolved
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    """Wilson score interval on a binomial proportion."""
+    if trials == 0:
+        return 0.0, 1.0
+    share = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (share + z * z / (2 * trials)) / denominator
+    margin = (
+        z
+        * np.sqrt(share * (1 - share) / trials + z * z / (4 * trials * trials))
+        / denominator
+    )
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def basin_intervals(attractors, samples):
+    """
+    (attractor id, attractor state, basin share, lower, upper) for every
+    attractor, largest basin first, with a 95% interval on the share.
+    """
+    rows = []
+    for attractor_state, _ in attractors.items():
+        share = attractors.dominance(attractor_state)
+        low, high = wilson_interval(round(share * samples), samples)
+        rows.append(
+            (attractors.get_hash(attractor_state), attractor_state, share, low, high)
+        )
+    rows.sort(key=lambda row: -row[2])
+    return rows
@@ -0,0 +1,150 @@
+FALSE = 0
+TRUE = 1
+
+
+class BDD:
+    """
+    Reduced ordered binary decision diagrams over variables 0..num_vars - 1,
+    tested in that order. Diagrams are node ids into a shared table where
+    node u is (var, low, high): the function is high when the variable is
+    set and low otherwise. FALSE and TRUE are the two terminals.
+    """
+
+    def __init__(self, num_vars):
+        self.num_vars = num_vars
+        # Terminals sit below every variable
+        self._var = [num_vars, num_vars]
+        self._low = [FALSE, TRUE]
+        self._high = [FALSE, TRUE]
+        self._unique = {}
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._var)
+
+    def node(self, var, low, high):
+        if low == high:
+            return low
+        key = (var, low, high)
+        u = self._unique.get(key)
+        if u is None:
+            u = len(self._var)
+            self._var.append(var)
+            self._low.append(low)
+            self._high.append(high)
+            self._unique[key] = u
+        return u
+
+    def var(self, i):
+        return self.node(i, FALSE, TRUE)
+
+    def top(self, u):
+        return self._var[u], self._low[u], self._high[u]
+
+    def apply(self, op, u, v):
+        """Combine two diagrams with op, one of "and", "or" and "xor"."""
+        if op == "and":
+            if u == FALSE or v == FALSE:
+                return FALSE
+            if u == TRUE:
+                return v
+            if v == TRUE or u == v:
+                return u
+        elif op == "or":
+            if u == TRUE or v == TRUE:
+                return TRUE
+            if u == FALSE:
+                return v
+            if v == FALSE or u == v:
+                return u
+        elif op == "xor":
+            if u == v:
+                return FALSE
+            if u == FALSE:
+                return v
+            if v == FALSE:
+                return u
+        else:
+            raise ValueError(f"Unknown operation: {op}")
+        if u > v:
+            # All three operations are commutative
+            u, v = v, u
+        key = (op, u, v)
+        result = self._cache.get(key)
+        if result is not None:
+            return result
+        var_u, var_v = self._var[u], self._var[v]
+        var = min(var_u, var_v)
+        u_low, u_high = (self._low[u], self._high[u]) if var_u == var else (u, u)
+        v_low, v_high = (self._low[v], self._high[v]) if var_v == var else (v, v)
+        result = self.node(
+            var, self.apply(op, u_low, v_low), self.apply(op, u_high, v_high)
+        )
+        self._cache[key] = result
+        return result
+
+    def conjoin(self, u, v):
+        return self.apply("and", u, v)
+
+    def disjoin(self, u, v):
+        return self.apply("or", u, v)
+
+    def negate(self, u):
+        return self.apply("xor", u, TRUE)
+
+    def equivalent(self, u, v):
+        return self.negate(self.apply("xor", u, v))
+
+    def symmetric(self, variables, accepts):
+        """
+        Diagram of a function of how many of `variables` are set, given as
+        (var, weight) pairs: accepts(count) tells whether a weighted count
+        satisfies it.
+        """
+        variables = sorted(variables)
+        total = sum(weight for _, weight in variables)
+        # level[c] is the diagram for the remaining variables after count c
+        level = [TRUE if accepts(count) else FALSE for count in range(total + 1)]
+        seen = total
+        for var, weight in reversed(variables):
+            seen -= weight
+            level = [
+                self.node(var, level[count], level[count + weight])
+                for count in range(seen + 1)
+            ]
+        return level[0]
+
+    def sat_count(self, u):
+        """Number of assignments of all num_vars variables satisfying u."""
+        counts = {FALSE: 0, TRUE: 1}
+
+        def count(w):
+            # Number of assignments of the variables from var(w) down
+            if w not in counts:
+                var, low, high = self.top(w)
+                counts[w] = (count(low) << (self._var[low] - var - 1)) + (
+                    count(high) << (self._var[high] - var - 1)
+                )
+            return counts[w]
+
+        return count(u) << self._var[u]
+
+    def solutions(self, u):
+        """Yield every satisfying assignment of u as a list of bools."""
+        assignment = [False] * self.num_vars
+
+        def walk(w, var):
+            if w == FALSE:
+                return
+            if var == self.num_vars:
+                yield list(assignment)
+                return
+            top, low, high = self.top(w)
+            if top > var:
+                # var does not matter here: both values satisfy
+                low = high = w
+            for value, child in ((False, low), (True, high)):
+                assignment[var] = value
+                yield from walk(child, var + 1)
+
+        yield from walk(u, 0)
@@ -0,0 +1,142 @@
+import csv
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def pivots_for_error(size, epsilon, confidence=0.9):
+    """
+    Number of pivots after which every sampled betweenness is within
+    epsilon of the exact normalized value with the given probability
+    (Hoeffding's bound, with a union bound over the nodes).
+    """
+    return math.ceil(math.log(2 * size / (1 - confidence)) / (2 * epsilon**2))
+
+
+def expand(indptr, indices, frontier):
+    """Every edge leaving the frontier, as arrays of sources and targets."""
+    starts = indptr[frontier]
+    counts = indptr[frontier + 1] - starts
+    sources = np.repeat(frontier, counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return sources, indices[np.repeat(starts, counts) + offsets]
+
+
+def single_source(indptr, indices, source):
+    """
+    Breadth-first search from one node, a whole level at a time, followed by
+    Brandes' dependency accumulation. Returns the distance to every node
+    (-1 when unreachable) and the dependency of the source on every node.
+    """
+    size = len(indptr) - 1
+    distance = np.full(size, -1, dtype=np.int64)
+    distance[source] = 0
+    paths = np.zeros(size)
+    paths[source] = 1
+    levels = []
+    frontier = np.array([source], dtype=np.int64)
+    depth = 0
+    while frontier.size:
+        sources, targets = expand(indptr, indices, frontier)
+        reached = np.unique(targets[distance[targets] < 0])
+        distance[reached] = depth + 1
+        # Only edges one level down lie on shortest paths
+        shortest = distance[targets] == depth + 1
+        sources, targets = sources[shortest], targets[shortest]
+        np.add.at(paths, targets, paths[sources])
+        levels.append((sources, targets))
+        frontier = reached
+        depth += 1
+
+    dependency = np.zeros(size)
+    for sources, targets in reversed(levels):
+        np.add.at(
+            dependency,
+            sources,
+            paths[sources] / paths[targets] * (1 + dependency[targets]),
+        )
+    dependency[source] = 0
+    return distance, dependency
+
+
+def accumulate(indptr, indices, pivots):
+    """
+    Sums over the pivots of the dependencies on each node, of how many
+    pivots reach it and of their distances to it.
+    """
+    size = len(indptr) - 1
+    dependencies = np.zeros(size)
+    reached = np.zeros(size, dtype=np.int64)
+    distances = np.zeros(size, dtype=np.int64)
+    for pivot in pivots:
+        distance, dependency = single_source(indptr, indices, pivot)
+        dependencies += dependency
+        reached += distance > 0
+        distances += np.maximum(distance, 0)
+    return dependencies, reached, distances
+
+
+def centrality(adjacency, pivots=None, processes=1, rng=None):
+    """
+    Betweenness and closeness of every node of an Adjacency, normalized as
+    networkx normalizes them for directed graphs. Closeness follows edge
+    direction into the node. Shortest paths are searched from `pivots`
+    nodes drawn at random, with replacement, and the sums over them are
+    scaled up to all nodes; with no pivots given, or at least one per node,
+    every node is searched and the result is exact. The searches are split
+    across `processes` worker processes. Returns (betweenness, closeness,
+    exact).
+    """
+    size = adjacency.size()
+    indptr, indices = adjacency.csr()
+    exact = pivots is None or pivots >= size
+    if exact:
+        sampled = np.arange(size)
+    else:
+        if rng is None:
+            rng = np.random.default_rng()
+        sampled = rng.integers(0, size, pivots)
+
+    if processes > 1:
+        chunks = np.array_split(sampled, processes)
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(
+                executor.map(
+                    accumulate,
+                    [indptr] * processes,
+                    [indices] * processes,
+                    chunks,
+                )
+            )
+        dependencies, reached, distances = (sum(parts) for parts in zip(*results))
+    else:
+        dependencies, reached, distances = accumulate(indptr, indices, sampled)
+
+    betweenness = np.zeros(size)
+    if size > 2:
+        betweenness = dependencies * size / (len(sampled) * (size - 1) * (size - 2))
+
+    # Pivot samples other than the node itself
+    others = len(sampled) - np.bincount(sampled, minlength=size)
+    closeness = np.zeros(size)
+    mask = distances > 0
+    closeness[mask] = reached[mask] / others[mask] * reached[mask] / distances[mask]
+    return betweenness, closeness, exact
+
+
+def write_centrality_table(adjacency, betweenness, closeness, path):
+    """CSV of betweenness and closeness per node, most between first."""
+    order = np.lexsort((-closeness, -betweenness))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["node", "betweenness", "closeness"])
+        writer.writerows(
+            (
+                adjacency.names[node],
+                f"{betweenness[node]:.6g}",
+                f"{closeness[node]:.6g}",
+            )
+            for node in order.tolist()
+        )
+    return order
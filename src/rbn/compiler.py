@@ -0,0 +1,476 @@
+import numpy as np
+
+from .network_behaviour import evaluate, parse_function, select_condition_inputs
+
+# Nodes with at most this many inputs get their function precomputed as a
+# truth table of 2^K entries.
+MAX_TABLE_INPUTS = 12
+
+
+# Batched counterparts of the Boolean functions in network_behaviour. Each one
+# reduces the last axis of a boolean array holding the selected inputs.
+def all_batch(selected, _):
+    return selected.all(axis=-1)
+
+
+def nand_batch(selected, _):
+    return ~selected.all(axis=-1)
+
+
+def or_batch(selected, _):
+    return selected.any(axis=-1)
+
+
+def nor_batch(selected, _):
+    return ~selected.any(axis=-1)
+
+
+def xor_batch(selected, _):
+    return selected.sum(axis=-1) % 2 == 1
+
+
+def majority_batch(selected, _):
+    return selected.sum(axis=-1) >= selected.shape[-1] / 2
+
+
+def minority_batch(selected, _):
+    return selected.sum(axis=-1) < selected.shape[-1] / 2
+
+
+def random_batch(selected, rng):
+    if selected.shape[-1] > 0:
+        picks = rng.integers(selected.shape[-1], size=selected.shape[:-1])
+        return np.take_along_axis(selected, picks[..., np.newaxis], axis=-1)[..., 0]
+    return rng.random(selected.shape[:-1]) < 0.5
+
+
+def copy_batch(selected, _):
+    if selected.shape[-1] > 0:
+        return selected[..., 0].copy()
+    return np.zeros(selected.shape[:-1], dtype=bool)
+
+
+def true_batch(selected, _):
+    return np.ones(selected.shape[:-1], dtype=bool)
+
+
+def false_batch(selected, _):
+    return np.zeros(selected.shape[:-1], dtype=bool)
+
+
+batch_function_map = {
+    "all": all_batch,
+    "and": all_batch,
+    "nand": nand_batch,
+    "or": or_batch,
+    "nor": nor_batch,
+    "xor": xor_batch,
+    "none": nor_batch,
+    "one": or_batch,
+    "majority": majority_batch,
+    "minority": minority_batch,
+    "random": random_batch,
+    "copy": copy_batch,
+    "true": true_batch,
+    "false": false_batch,
+}
+
+
+def evaluate_batch(func, selected, rng):
+    if "%" in func:
+        percentage = int(func.replace("%", ""))
+        return selected.sum(axis=-1) >= selected.shape[-1] * (percentage / 100)
+    elif func in batch_function_map:
+        return batch_function_map[func](selected, rng)
+    else:
+        raise ValueError(f"Unknown function: {func}")
+
+
+def compile_tree(tree, input_types):
+    """
+    Resolve every condition of a parse tree against a fixed list of input
+    types, replacing it with ("COND", func, positions array, positions list)
+    where positions are the indices of the inputs the condition reads.
+    """
+    node_type = tree[0]
+    if node_type == "COND":
+        condition = tree[1]
+        positions = select_condition_inputs(
+            condition, list(range(len(input_types))), input_types
+        )
+        return "COND", condition[0], np.array(positions, dtype=np.intp), positions
+    return (
+        node_type,
+        compile_tree(tree[1], input_types),
+        compile_tree(tree[2], input_types),
+    )
+
+
+def evaluate_tree_batch(tree, gathered, rng):
+    node_type = tree[0]
+    if node_type == "COND":
+        return evaluate_batch(tree[1], gathered[..., tree[2]], rng)
+    elif node_type == "AND":
+        return evaluate_tree_batch(tree[1], gathered, rng) & evaluate_tree_batch(
+            tree[2], gathered, rng
+        )
+    elif node_type == "OR":
+        return evaluate_tree_batch(tree[1], gathered, rng) | evaluate_tree_batch(
+            tree[2], gathered, rng
+        )
+    else:
+        raise ValueError("Unknown tree node type: " + str(node_type))
+
+
+def random_choice(selected, rng):
+    """Scalar counterpart of random_batch, drawing from rng."""
+    if selected:
+        return bool(selected[rng.integers(len(selected))])
+    return bool(rng.random() < 0.5)
+
+
+def evaluate_tree(tree, inputs, rng=None):
+    """
+    Scalar counterpart of evaluate_tree_batch for a single list of inputs.
+    Random conditions draw from rng when one is given.
+    """
+    node_type = tree[0]
+    if node_type == "COND":
+        selected = [inputs[p] for p in tree[3]]
+        if tree[1] == "random" and rng is not None:
+            return random_choice(selected, rng)
+        return evaluate(tree[1], selected)
+    elif node_type == "AND":
+        return evaluate_tree(tree[1], inputs, rng) and evaluate_tree(
+            tree[2], inputs, rng
+        )
+    elif node_type == "OR":
+        return evaluate_tree(tree[1], inputs, rng) or evaluate_tree(
+            tree[2], inputs, rng
+        )
+    else:
+        raise ValueError("Unknown tree node type: " + str(node_type))
+
+
+def input_combinations(num_inputs):
+    # Row r holds the inputs whose bits are set in r, input b at bit b
+    rows = np.arange(1 << num_inputs)[:, np.newaxis]
+    return (rows >> np.arange(num_inputs)) & 1 == 1
+
+
+def is_stochastic(tree):
+    if tree[0] == "COND":
+        return tree[1] == "random"
+    return is_stochastic(tree[1]) or is_stochastic(tree[2])
+
+
+def is_typed(tree):
+    if tree[0] == "COND":
+        return tree[1][1] is not None
+    return is_typed(tree[1]) or is_typed(tree[2])
+
+
+def tree_signature(tree):
+    if tree[0] == "COND":
+        return tree[1], tuple(tree[3])
+    return tree[0], tree_signature(tree[1]), tree_signature(tree[2])
+
+
+def encode_state(state):
+    """Integer with bit i set when node i is healthy."""
+    packed = np.packbits(np.asarray(state, dtype=bool), bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+class NodeGroup:
+    """
+    Nodes that share a function definition and read the same input
+    positions, so one compiled tree evaluates all of them at once. Groups
+    with few enough inputs are evaluated through a truth table instead:
+    the input bits are packed into an index and looked up.
+    """
+
+    def __init__(self, definition, tree, nodes, inputs, max_table_inputs):
+        self.definition = definition
+        self.tree = tree
+        self.nodes = np.array(nodes, dtype=np.intp)
+        self.inputs = np.array(inputs, dtype=np.intp).reshape(
+            len(nodes), len(inputs[0])
+        )
+        self.stochastic = is_stochastic(self.tree)
+        num_inputs = self.inputs.shape[1]
+        self.weights = np.left_shift(1, np.arange(num_inputs), dtype=np.int64)
+        self.table = None
+        if not self.stochastic and num_inputs <= max_table_inputs:
+            self.table = evaluate_tree_batch(
+                self.tree, input_combinations(num_inputs), None
+            )
+
+    def evaluate(self, states, rng):
+        # states is (batch, N); gathered is (batch, nodes in group, inputs)
+        gathered = states[:, self.inputs]
+        if self.table is not None:
+            return self.table[gathered @ self.weights]
+        return evaluate_tree_batch(self.tree, gathered, rng)
+
+
+class TypeReduction:
+    """
+    Reduction of a state to one bit per node type: the value of the type's
+    type condition over its instances, read in instance order. This is the
+    normalized form used to detect attractors, kept as an integer with bit t
+    set when the condition of types[t] holds.
+    """
+
+    def __init__(self, types, instance_indices, conditions, max_table_inputs):
+        self.types = list(types)
+        self.indices = [
+            np.array(indices, dtype=np.intp) for indices in instance_indices
+        ]
+        self.index_lists = [list(indices) for indices in instance_indices]
+        self.trees = [
+            compile_tree(parse_function(condition), [node_type] * len(indices))
+            for node_type, indices, condition in zip(
+                self.types, self.index_lists, conditions
+            )
+        ]
+        self.tables = [
+            (
+                evaluate_tree_batch(
+                    tree, input_combinations(len(indices)), None
+                ).tolist()
+                if not is_stochastic(tree) and len(indices) <= max_table_inputs
+                else None
+            )
+            for tree, indices in zip(self.trees, self.index_lists)
+        ]
+        # Random conditions are drawn again on every reduction, changed or not
+        self.stochastic_types = {
+            t for t, tree in enumerate(self.trees) if is_stochastic(tree)
+        }
+
+        # Which type each node belongs to, for incremental updates
+        size = sum(len(indices) for indices in self.index_lists)
+        self.node_type_index = [0] * size
+        for t, indices in enumerate(self.index_lists):
+            for node in indices:
+                self.node_type_index[node] = t
+
+    def evaluate_type(self, t, state, rng=None):
+        table = self.tables[t]
+        if table is not None:
+            index = 0
+            bit = 1
+            for node in self.index_lists[t]:
+                if state[node]:
+                    index |= bit
+                bit <<= 1
+            return table[index]
+        return bool(
+            evaluate_tree(
+                self.trees[t], [state[node] for node in self.index_lists[t]], rng
+            )
+        )
+
+    def reduce(self, state, code=0, changed=None, rng=None):
+        """
+        Normalized code of a list-of-bools state. Given the code of the
+        previous state and the nodes that flipped since, only the types of
+        those nodes and types with random conditions are evaluated again.
+        Random type conditions draw from rng, in type order either way.
+        """
+        if changed is None:
+            types = range(len(self.types))
+            code = 0
+        else:
+            types = sorted(
+                self.stochastic_types.union(
+                    self.node_type_index[node] for node in changed
+                )
+            )
+        for t in types:
+            if self.evaluate_type(t, state, rng):
+                code |= 1 << t
+            else:
+                code &= ~(1 << t)
+        return code
+
+    def reduce_batch(self, states, rng=None):
+        """(batch, types) boolean array of the type conditions of (batch, N) states."""
+        if rng is None:
+            rng = np.random.default_rng()
+        reduced = np.empty((len(states), len(self.types)), dtype=bool)
+        for t, (tree, indices) in enumerate(zip(self.trees, self.indices)):
+            reduced[:, t] = evaluate_tree_batch(tree, states[:, indices], rng)
+        return reduced
+
+    def to_frozenset(self, code):
+        """The normalized code in the form normalize_attractor returns."""
+        return frozenset(
+            (node_type, bool(code >> t & 1)) for t, node_type in enumerate(self.types)
+        )
+
+
+class CompiledNetwork:
+    """
+    Index-based form of an expanded network. Node i reads the nodes
+    indices[indptr[i]:indptr[i + 1]]; states are boolean arrays indexed by
+    node, with batches of states stacked along the first axis.
+    """
+
+    def __init__(
+        self,
+        names,
+        node_types,
+        inputs,
+        definitions,
+        max_table_inputs=MAX_TABLE_INPUTS,
+    ):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.node_types = list(node_types)
+        self.inputs = [list(node_inputs) for node_inputs in inputs]
+        self.definitions = list(definitions)
+
+        degrees = np.array([len(node_inputs) for node_inputs in self.inputs])
+        self.indptr = np.zeros(len(self.names) + 1, dtype=np.intp)
+        np.cumsum(degrees, out=self.indptr[1:])
+        self.indices = np.fromiter(
+            (j for node_inputs in self.inputs for j in node_inputs),
+            dtype=np.intp,
+            count=int(self.indptr[-1]),
+        )
+        self.groups = self._group_nodes(max_table_inputs)
+        self.stochastic = any(group.stochastic for group in self.groups)
+
+        # Per node views of the groups for the scalar engine
+        self.node_tables = [None] * len(self.names)
+        self.node_trees = [None] * len(self.names)
+        self.stochastic_nodes = []
+        for group in self.groups:
+            table = group.table.tolist() if group.table is not None else None
+            for node in group.nodes.tolist():
+                self.node_tables[node] = table
+                self.node_trees[node] = group.tree
+            if group.stochastic:
+                self.stochastic_nodes.extend(group.nodes.tolist())
+
+        # Reverse dependency index: the nodes that read node j
+        self.dependents = [[] for _ in self.names]
+        for i, node_inputs in enumerate(self.inputs):
+            for j in set(node_inputs):
+                self.dependents[j].append(i)
+
+    def _group_nodes(self, max_table_inputs):
+        parse_trees = {}
+        trees = {}
+        members = {}
+        for i, node_inputs in enumerate(self.inputs):
+            definition = self.definitions[i]
+            if definition not in parse_trees:
+                parse_trees[definition] = parse_function(definition)
+            parse_tree = parse_trees[definition]
+            if is_typed(parse_tree):
+                # Typed conditions read different positions depending on
+                # the types of the inputs
+                input_types = [self.node_types[j] for j in node_inputs]
+                tree = compile_tree(parse_tree, input_types)
+                key = (definition, len(node_inputs), tree_signature(tree))
+            else:
+                key = (definition, len(node_inputs))
+                tree = trees.get(key) or compile_tree(
+                    parse_tree, [None] * len(node_inputs)
+                )
+            trees.setdefault(key, tree)
+            members.setdefault(key, []).append(i)
+        return [
+            NodeGroup(
+                key[0],
+                trees[key],
+                nodes,
+                [self.inputs[i] for i in nodes],
+                max_table_inputs,
+            )
+            for key, nodes in members.items()
+        ]
+
+    def size(self):
+        return len(self.names)
+
+    def healthy_state(self):
+        return np.ones(len(self.names), dtype=bool)
+
+    def step_batch(self, states, rng=None):
+        """Synchronously update every state in a (batch, N) array."""
+        if rng is None:
+            rng = np.random.default_rng()
+        new_states = np.empty_like(states)
+        for group in self.groups:
+            new_states[:, group.nodes] = group.evaluate(states, rng)
+        return new_states
+
+    def evaluate_node(self, node, state, rng=None):
+        """
+        Next value of one node for a state held as a list of bools. Random
+        conditions draw from rng.
+        """
+        table = self.node_tables[node]
+        if table is not None:
+            index = 0
+            bit = 1
+            for j in self.inputs[node]:
+                if state[j]:
+                    index |= bit
+                bit <<= 1
+            return table[index]
+        return bool(
+            evaluate_tree(
+                self.node_trees[node], [state[j] for j in self.inputs[node]], rng
+            )
+        )
+
+    def step(self, state, rng=None):
+        """Synchronously update a single state held as a list of bools."""
+        return [self.evaluate_node(node, state, rng) for node in range(len(state))]
+
+    def step_incremental(self, state, changed=None, rng=None):
+        """
+        Synchronously update a list-of-bools state in place, re-evaluating
+        only the nodes that read a node in `changed` (the nodes that flipped
+        in the previous step) plus any stochastic nodes. With changed=None
+        every node is evaluated, as the first step of a run must. Returns
+        the nodes that flipped in this step.
+        """
+        if changed is None:
+            candidates = range(len(state))
+        else:
+            candidates = set(self.stochastic_nodes)
+            for j in changed:
+                candidates.update(self.dependents[j])
+        # Evaluate everything against the old state before applying flips
+        flipped = [
+            node
+            for node in candidates
+            if self.evaluate_node(node, state, rng) != state[node]
+        ]
+        for node in flipped:
+            state[node] = not state[node]
+        return flipped
+
+    def to_dict(self, state):
+        return dict(zip(self.names, (bool(value) for value in state)))
+
+    def from_dict(self, states):
+        return np.array([bool(states[name]) for name in self.names], dtype=bool)
+
+
+def compile_network(network, max_table_inputs=MAX_TABLE_INPUTS):
+    names = network.get_expanded_node_list()
+    index = {name: i for i, name in enumerate(names)}
+    return CompiledNetwork(
+        names,
+        [network.get_instance_type(name) for name in names],
+        [[index[j] for j in network.get_node_inputs(name)] for name in names],
+        [network.get_function_definition(name) for name in names],
+        max_table_inputs=max_table_inputs,
+    )
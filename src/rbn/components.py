@@ -0,0 +1,256 @@
+from collections import Counter
+
+import numpy as np
+
+from .attractors import normalize_tuple, short_hash
+
+# Components with at most this many nodes have every starting state tried
+MAX_EXHAUSTIVE_COMPONENT = 16
+
+
+def strongly_connected_components(inputs):
+    """
+    Tarjan's algorithm over the graph where node i points at inputs[i],
+    without recursion. Components are returned in dependency order: every
+    component comes after the components it reads from.
+    """
+    size = len(inputs)
+    index = [-1] * size
+    lowlink = [0] * size
+    on_stack = [False] * size
+    stack = []
+    components = []
+    counter = 0
+    for root in range(size):
+        if index[root] >= 0:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, child = work.pop()
+            if child == 0:
+                index[node] = lowlink[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+            elif child <= len(inputs[node]):
+                lowlink[node] = min(lowlink[node], lowlink[inputs[node][child - 1]])
+            descended = False
+            for position in range(child, len(inputs[node])):
+                successor = inputs[node][position]
+                if index[successor] < 0:
+                    work.append((node, position + 1))
+                    work.append((successor, 0))
+                    descended = True
+                    break
+                if on_stack[successor]:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            if descended:
+                continue
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(sorted(component))
+    return components
+
+
+class ComponentAttractor:
+    """
+    Attractor of the nodes processed so far: a cycle of states, each an
+    integer with bit i set when node i is healthy. Only the bits of the
+    processed nodes are meaningful.
+    """
+
+    def __init__(self, codes):
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def states(self, size):
+        return [[bool(code >> node & 1) for node in range(size)] for code in self.codes]
+
+
+def forced_cycles(compiled, component, upstream, upstream_values, initial_states):
+    """
+    Cycles of a component driven by a periodic sequence of upstream values,
+    as lists of (phase, component values). The joint state is (phase,
+    component state), and every joint cycle passes through phase 0, so it is
+    enough to start there; each cycle is returned starting at phase 0.
+    """
+    period = len(upstream_values)
+    work = [False] * compiled.size()
+    # Joint states already known to lead to cycle number outcome[state]
+    outcome = {}
+    cycles = []
+    for initial in initial_states:
+        phase = 0
+        values = tuple(initial)
+        path = []
+        visited = {}
+        while (phase, values) not in visited and (phase, values) not in outcome:
+            visited[(phase, values)] = len(path)
+            path.append((phase, values))
+            for node, value in zip(upstream, upstream_values[phase]):
+                work[node] = value
+            for node, value in zip(component, values):
+                work[node] = value
+            values = tuple(compiled.evaluate_node(node, work) for node in component)
+            phase = (phase + 1) % period
+        if (phase, values) in outcome:
+            cycle = outcome[(phase, values)]
+        else:
+            cycle = len(cycles)
+            cycles.append(path[visited[(phase, values)] :])
+        for joint in path:
+            outcome[joint] = cycle
+
+    aligned = []
+    for cycle in cycles:
+        start = next(i for i, (phase, _) in enumerate(cycle) if phase == 0)
+        aligned.append(cycle[start:] + cycle[:start])
+    return aligned
+
+
+def value_bits(component, values):
+    code = 0
+    for node, value in zip(component, values):
+        if value:
+            code |= 1 << node
+    return code
+
+
+def component_initial_states(size, rng, samples):
+    if size <= MAX_EXHAUSTIVE_COMPONENT:
+        codes = np.arange(1 << size)[:, np.newaxis]
+        return ((codes >> np.arange(size)) & 1 == 1).tolist()
+    return (rng.random((samples, size)) < 0.5).tolist()
+
+
+def project_attractors(attractors, nodes):
+    """
+    The attractors of the nodes, given the attractors of a network in which
+    they read only each other: every cycle cut to the nodes and to its
+    shortest period, once whatever state it starts in.
+    """
+    mask = value_bits(nodes, [True] * len(nodes))
+    seen = set()
+    projected = []
+    for attractor in attractors:
+        codes = [code & mask for code in attractor.codes]
+        codes = codes[: minimal_period(codes)]
+        cycle = min(tuple(codes[i:] + codes[:i]) for i in range(len(codes)))
+        if cycle not in seen:
+            seen.add(cycle)
+            projected.append(ComponentAttractor(codes))
+    return projected
+
+
+def modular_attractors(compiled, rng=None, samples=10000, known=None):
+    """
+    All attractors of a deterministic compiled network, found one strongly
+    connected component at a time in dependency order. Each component is
+    simulated under every distinct input sequence the attractors upstream
+    of it produce, so the simulation work grows with the size of the
+    largest component rather than with N. Components larger than
+    MAX_EXHAUSTIVE_COMPONENT are started from `samples` random states
+    instead of all of them, and the result is then no longer guaranteed
+    complete. Returns (attractors, components, exact).
+
+    known, if given, is (attractors, nodes) for a set of nodes that read
+    only each other and whose attractors are already known, say from
+    project_attractors; the components within it are not simulated again.
+    """
+    if compiled.stochastic:
+        raise ValueError("Modular attractor computation needs a deterministic network")
+    if rng is None:
+        rng = np.random.default_rng()
+    components = strongly_connected_components(compiled.inputs)
+    attractors = [ComponentAttractor([0])]
+    solved = set()
+    if known is not None:
+        attractors, solved = known[0], set(known[1])
+    exact = True
+    for component in components:
+        exact = exact and len(component) <= MAX_EXHAUSTIVE_COMPONENT
+        if solved.issuperset(component):
+            continue
+        upstream = sorted(
+            {j for node in component for j in compiled.inputs[node]} - set(component)
+        )
+        initial_states = component_initial_states(len(component), rng, samples)
+        upstream_mask = value_bits(upstream, [True] * len(upstream))
+        # Attractors that drive the component alike share its cycles
+        cycles_by_input = {}
+        composed = []
+        for attractor in attractors:
+            key = tuple(code & upstream_mask for code in attractor.codes)
+            if key not in cycles_by_input:
+                upstream_values = [
+                    [bool(code >> node & 1) for node in upstream] for code in key
+                ]
+                cycles_by_input[key] = [
+                    [(phase, value_bits(component, values)) for phase, values in cycle]
+                    for cycle in forced_cycles(
+                        compiled, component, upstream, upstream_values, initial_states
+                    )
+                ]
+            for cycle in cycles_by_input[key]:
+                composed.append(
+                    ComponentAttractor(
+                        [attractor.codes[phase] | bits for phase, bits in cycle]
+                    )
+                )
+        attractors = composed
+    return attractors, components, exact
+
+
+def minimal_period(sequence):
+    for period in range(1, len(sequence)):
+        if len(sequence) % period == 0 and all(
+            sequence[i] == sequence[i - period] for i in range(period, len(sequence))
+        ):
+            return period
+    return len(sequence)
+
+
+def normalized_attractor(attractor, reduction, simplified=None):
+    """
+    An attractor in the form Attractors records, and its hash. The cycle of
+    normalized states is cut to its shortest period, as the simulation sees
+    it repeat. Attractors of a simplified network are mapped back to the
+    original nodes first.
+    """
+    if simplified is None:
+        states = attractor.states(len(reduction.node_type_index))
+    else:
+        states = [
+            simplified.expand_state(state)
+            for state in attractor.states(simplified.network.size())
+        ]
+    sequence = [reduction.reduce(state) for state in states]
+    sequence = sequence[: minimal_period(sequence)]
+    normalized = normalize_tuple(
+        tuple(reduction.to_frozenset(code) for code in sequence)
+    )
+    return normalized, short_hash(normalized)
+
+
+def count_normalized_attractors(attractors, reduction, simplified=None):
+    """
+    How many attractors of the expanded network each normalized attractor
+    stands for, most first, and the length of each, by attractor id.
+    """
+    lengths = {}
+    counts = Counter()
+    for attractor in attractors:
+        normalized, attractor_id = normalized_attractor(
+            attractor, reduction, simplified
+        )
+        lengths[attractor_id] = len(normalized)
+        counts[attractor_id] += 1
+    return counts, lengths
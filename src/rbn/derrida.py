@@ -0,0 +1,84 @@
+import numpy as np
+
+
+def random_states(count, size, rng, bias=0.5):
+    # Each node is independently healthy with probability `bias`
+    return rng.random((count, size)) < bias
+
+
+def perturb(states, distance, rng):
+    """Flip `distance` distinct, randomly chosen nodes in every state."""
+    perturbed = states.copy()
+    if distance > 0:
+        scores = rng.random(states.shape)
+        flips = np.argpartition(scores, distance - 1, axis=1)[:, :distance]
+        rows = np.arange(states.shape[0])[:, np.newaxis]
+        perturbed[rows, flips] = ~perturbed[rows, flips]
+    return perturbed
+
+
+def hamming_distances(a, b):
+    return np.count_nonzero(a != b, axis=1)
+
+
+def derrida_point(compiled, distance, samples, rng, batch_size=10000, bias=0.5):
+    """
+    Expected Hamming distance after one synchronous step between random state
+    pairs that start `distance` nodes apart. Returns (mean, standard error).
+    Both states of a pair make the same random draws, so a random node only
+    adds to the distance through inputs that differ, and the map measures
+    how far a perturbation spreads rather than the noise of the network.
+    """
+    size = compiled.size()
+    total = 0.0
+    total_squares = 0.0
+    remaining = samples
+    while remaining > 0:
+        count = min(batch_size, remaining)
+        states = random_states(count, size, rng, bias)
+        perturbed = perturb(states, distance, rng)
+        # Batch steps draw the same numbers for every batch of the same
+        # shape, so stepping both halves from one seed pairs up the draws
+        seed = rng.integers(2**63)
+        stepped = compiled.step_batch(states, np.random.default_rng(seed))
+        distances = hamming_distances(
+            stepped, compiled.step_batch(perturbed, np.random.default_rng(seed))
+        )
+        total += distances.sum()
+        total_squares += np.square(distances, dtype=np.float64).sum()
+        remaining -= count
+    mean = total / samples
+    variance = max(total_squares / samples - mean * mean, 0.0)
+    return mean, np.sqrt(variance / samples)
+
+
+def derrida_curve(compiled, distances, samples, rng, batch_size=10000, bias=0.5):
+    """Return (distance, mean distance after one step, standard error) rows."""
+    curve = []
+    for distance in distances:
+        mean, error = derrida_point(
+            compiled, distance, samples, rng, batch_size=batch_size, bias=bias
+        )
+        curve.append((distance, mean, error))
+    return curve
+
+
+def derrida_slope(curve):
+    """
+    Slope of the Derrida map at the origin, estimated from the smallest
+    non-zero initial distance. This is the average number of nodes a single
+    flip spreads to in one step.
+    """
+    points = [(d, mean) for d, mean, _ in curve if d > 0]
+    if not points:
+        raise ValueError("Derrida curve needs a non-zero initial distance")
+    distance, mean = min(points)
+    return mean / distance
+
+
+def classify_regime(slope, tolerance=0.05):
+    if slope < 1 - tolerance:
+        return "ordered"
+    if slope > 1 + tolerance:
+        return "chaotic"
+    return "critical"
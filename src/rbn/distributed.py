@@ -0,0 +1,338 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import traceback
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import (
+    Client,
+    Listener,
+    answer_challenge,
+    deliver_challenge,
+)
+
+import numpy as np
+
+from rbn.attractors import Attractors
+from rbn.kauffman import KauffmanNetwork
+from rbn.simulation import Simulation
+
+DEFAULT_PORT = 6001
+DEFAULT_CHUNK_RUNS = 50
+# Seconds a worker may take over one chunk before it is given up for lost
+DEFAULT_TASK_TIMEOUT = 600
+DEFAULT_MAX_ATTEMPTS = 3
+# Seconds between checks for a stop request while waiting for chunks
+POLL_INTERVAL = 0.2
+# Seconds to wait before accepting again after an error, doubling up to the
+# most while the error lasts
+ACCEPT_RETRY_DELAY = 0.1
+MAX_ACCEPT_RETRY_DELAY = 5.0
+AUTHKEY_VARIABLE = "RBN_AUTHKEY"
+
+
+def parse_address(text, default_host="localhost"):
+    """(host, port) from HOST:PORT, :PORT or PORT."""
+    host, _, port = text.rpartition(":")
+    return host or default_host, int(port)
+
+
+def default_authkey():
+    """The shared secret from the environment, or a fresh one."""
+    authkey = os.environ.get(AUTHKEY_VARIABLE)
+    if authkey:
+        return authkey.encode("utf-8")
+    return os.urandom(16)
+
+
+def _split(batch, chunk_runs):
+    failure_sets, weights, events, ratios = batch
+    for start in range(0, len(failure_sets), chunk_runs):
+        part = slice(start, start + chunk_runs)
+        yield (
+            failure_sets[part],
+            weights[part],
+            events[part],
+            None if ratios is None else ratios[part],
+        )
+
+
+class _Task:
+    def __init__(self, task_id, message):
+        self.task_id = task_id
+        self.message = message
+        self.attempts = 0
+
+
+class Coordinator:
+    """
+    Hands the runs of a Simulation out to workers connected over TCP.
+
+    Every batch of failure sets is cut into chunks of `chunk_runs` that go
+    to whichever worker is free. Workers send back the totals and attractors
+    of their chunk, which are merged in chunk order, so the results are the
+    same as simulating the batch locally. A chunk whose worker disconnects,
+    or takes longer than `task_timeout` seconds, goes back on the queue for
+    another worker, up to `max_attempts` times in all. Workers may connect
+    and leave at any point; a batch waits until some worker has taken each
+    of its chunks, and gives up once no worker has been connected for
+    `task_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        dot_source,
+        address=("localhost", DEFAULT_PORT),
+        authkey=None,
+        chunk_runs=DEFAULT_CHUNK_RUNS,
+        task_timeout=DEFAULT_TASK_TIMEOUT,
+        max_attempts=DEFAULT_MAX_ATTEMPTS,
+    ):
+        self.dot_source = dot_source
+        self.authkey = authkey if authkey is not None else default_authkey()
+        self.chunk_runs = chunk_runs
+        self.task_timeout = task_timeout
+        self.max_attempts = max_attempts
+        # Clients are authenticated on their own thread, so one that never
+        # answers the challenge does not hold up the others
+        self._listener = Listener(address)
+        # The port actually bound, when 0 asked for any free one
+        self.address = self._listener.address
+        self._job = None
+        self._job_ready = threading.Event()
+        self._tasks = queue.Queue()
+        self._results = queue.Queue()
+        self._task_ids = itertools.count()
+        self._cancelled = set()
+        self._workers = 0
+        self._workers_lock = threading.Lock()
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def begin(self, settings):
+        """Let workers start on a simulation run with the given settings."""
+        self._job = ("job", self.dot_source, settings)
+        self._job_ready.set()
+
+    def _accept(self):
+        delay = ACCEPT_RETRY_DELAY
+        while True:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                if self._closed:
+                    return
+                # Such as running out of file descriptors: back off rather
+                # than spin until it passes
+                time.sleep(delay)
+                delay = min(2 * delay, MAX_ACCEPT_RETRY_DELAY)
+                continue
+            delay = ACCEPT_RETRY_DELAY
+            threading.Thread(
+                target=self._serve, args=(connection,), daemon=True
+            ).start()
+
+    def _serve(self, connection):
+        with connection:
+            try:
+                deliver_challenge(connection, self.authkey)
+                answer_challenge(connection, self.authkey)
+            except (AuthenticationError, OSError, EOFError):
+                return
+            with self._workers_lock:
+                self._workers += 1
+            try:
+                self._serve_worker(connection)
+            finally:
+                with self._workers_lock:
+                    self._workers -= 1
+
+    def _serve_worker(self, connection):
+        self._job_ready.wait()
+        try:
+            connection.send(self._job)
+        except OSError:
+            return
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                # Leave the stop for the other workers too
+                self._tasks.put(None)
+                try:
+                    connection.send(("stop",))
+                except OSError:
+                    pass
+                return
+            if task.task_id in self._cancelled:
+                continue
+            if not self._run_task(connection, task):
+                return
+
+    def _run_task(self, connection, task):
+        """Run a task on a worker. False if the worker was lost."""
+        task.attempts += 1
+        try:
+            connection.send(task.message)
+            if connection.poll(self.task_timeout):
+                reply = connection.recv()
+                self._results.put((task.task_id, reply))
+                return True
+        except (OSError, EOFError):
+            pass
+        if task.attempts < self.max_attempts:
+            self._tasks.put(task)
+        else:
+            self._results.put(
+                (
+                    task.task_id,
+                    ("error", f"no worker finished it in {task.attempts} attempts"),
+                )
+            )
+        return False
+
+    def run_batch(
+        self,
+        attractors,
+        stage,
+        batch,
+        tracked_types=None,
+        progress=None,
+        stop_requested=None,
+    ):
+        """
+        Simulate a batch on the workers, as Simulation.run_batch does
+        locally, and return its BatchTotals. progress, if given, is called
+        with the number of runs done as chunks come back. Once
+        stop_requested, if given, returns true, the chunks not yet back are
+        dropped and the totals cover the ones that are, or are None if there
+        are none.
+        """
+        task_ids = []
+        for chunk in _split(batch, self.chunk_runs):
+            task_id = next(self._task_ids)
+            task_ids.append(task_id)
+            self._tasks.put(
+                _Task(task_id, ("task", task_id, stage, chunk, tracked_types))
+            )
+
+        replies = {}
+        runs = 0
+        idle_since = time.monotonic()
+        while len(replies) < len(task_ids):
+            if stop_requested is not None and stop_requested():
+                self._cancelled.update(task_ids)
+                break
+            try:
+                task_id, reply = self._results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if self._workers > 0:
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since > self.task_timeout:
+                    self._cancelled.update(task_ids)
+                    raise RuntimeError(
+                        f"No worker connected for {self.task_timeout} seconds"
+                    )
+                continue
+            # Ignore replies to chunks of batches already merged or dropped
+            if task_id not in task_ids or task_id in replies:
+                continue
+            if reply[0] == "error":
+                self._cancelled.update(task_ids)
+                raise RuntimeError(f"Chunk {task_id} failed: {reply[1]}")
+            replies[task_id] = reply
+            runs += reply[1].runs
+            if progress is not None:
+                progress(runs)
+
+        totals = None
+        for task_id in task_ids:
+            if task_id not in replies:
+                continue
+            _, chunk_totals, chunk_attractors = replies[task_id]
+            if totals is None:
+                totals = chunk_totals
+            else:
+                totals.add(chunk_totals)
+            attractors.merge(chunk_attractors)
+        return totals
+
+    def close(self):
+        """Tell the connected workers to stop and stop accepting new ones."""
+        self._closed = True
+        self._tasks.put(None)
+        self._listener.close()
+
+
+def run_worker(address, authkey):
+    """
+    Connect to a coordinator and simulate the chunks it hands out until it
+    says to stop or goes away.
+    """
+    with Client(address, authkey=authkey) as connection:
+        try:
+            _, dot_source, settings = connection.recv()
+        except EOFError:
+            return
+        simulation = Simulation(
+            0,
+            0,
+            settings["num_steps"],
+            cache_size=settings["cache_size"],
+            symmetry=settings["symmetry"],
+        )
+        seed = settings.get("seed")
+        compiled, reduction, symmetry = simulation.prepare(KauffmanNetwork(dot_source))
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                return
+            if message[0] == "stop":
+                return
+            _, task_id, stage, chunk, tracked_types = message
+            # Each chunk draws from its own stream, so a seeded run repeats
+            # whichever worker simulates the chunk
+            simulation.rng = np.random.default_rng(
+                None if seed is None else [seed, task_id]
+            )
+            attractors = Attractors()
+            try:
+                totals = simulation.run_batch(
+                    attractors,
+                    compiled,
+                    reduction,
+                    symmetry,
+                    stage,
+                    chunk,
+                    tracked_types,
+                )
+                reply = ("result", totals, attractors)
+            except Exception:
+                reply = ("error", traceback.format_exc())
+            try:
+                connection.send(reply)
+            except OSError:
+                # The coordinator gave up on this worker
+                return
+
+
+def _run_local_worker(address, authkey):
+    # Ctrl-C reaches the whole process group; the coordinator decides what
+    # happens to the runs, and stops its workers when it is done
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(address, authkey)
+
+
+def start_local_workers(address, authkey, count):
+    """Start `count` worker processes on this machine."""
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_run_local_worker, args=(address, authkey), daemon=True)
+        for _ in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
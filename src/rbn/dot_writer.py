@@ -0,0 +1,78 @@
+import re
+
+# Identifiers graphviz accepts without quotes
+_PLAIN_ID = re.compile(
+    r"^(?:[A-Za-z_\x80-\uffff][A-Za-z_0-9\x80-\uffff]*|-?(?:\.\d+|\d+(?:\.\d*)?))$"
+)
+_KEYWORDS = {"node", "edge", "graph", "digraph", "subgraph", "strict"}
+
+
+def quote(value):
+    """A DOT identifier for value: HTML labels (<...>) are kept as they are."""
+    value = str(value)
+    if value.startswith("<") and value.endswith(">"):
+        return value
+    if _PLAIN_ID.match(value) and value.lower() not in _KEYWORDS:
+        return value
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def attribute_list(attributes):
+    if not attributes:
+        return ""
+    return (
+        " ["
+        + ", ".join(f"{key}={quote(value)}" for key, value in attributes.items())
+        + "]"
+    )
+
+
+class DotWriter:
+    """
+    Writes a directed graph to a DOT file as it is built, without holding it
+    in memory: nodes, edges and subgraphs go straight to the file, so the
+    caller has to open and close subgraphs in order. A strict graph has
+    graphviz merge repeated edges when it reads the file.
+    """
+
+    def __init__(self, filename, strict=False, **graph_attributes):
+        self._file = open(filename, "w", encoding="utf-8")
+        self._depth = 1
+        self._file.write(("strict " if strict else "") + "digraph {\n")
+        if graph_attributes:
+            self._write_line("graph" + attribute_list(graph_attributes) + ";")
+
+    def _write_line(self, line):
+        self._file.write("\t" * self._depth + line + "\n")
+
+    def begin_subgraph(self, name, **attributes):
+        self._write_line(f"subgraph {quote(name)} {{")
+        self._depth += 1
+        if attributes:
+            self._write_line("graph" + attribute_list(attributes) + ";")
+
+    def end_subgraph(self):
+        self._depth -= 1
+        self._write_line("}")
+        # A finished subgraph is complete, so let it reach the disk
+        self._file.flush()
+
+    def node(self, name, **attributes):
+        self._write_line(quote(name) + attribute_list(attributes) + ";")
+
+    def edge(self, source, target, **attributes):
+        self._write_line(
+            f"{quote(source)} -> {quote(target)}" + attribute_list(attributes) + ";"
+        )
+
+    def raw(self, text):
+        """Write DOT statements as they are."""
+        self._file.write(text)
+
+    def close(self):
+        if self._file.closed:
+            return
+        while self._depth > 1:
+            self.end_subgraph()
+        self._file.write("}\n")
+        self._file.close()
@@ -0,0 +1,248 @@
+import itertools
+import math
+
+import numpy as np
+
+# Upper bound on the number of random scores drawn at once when sampling
+# failure sets by ranking, to keep memory flat on large networks.
+MAX_SCORES_PER_CHUNK = 1 << 22
+
+
+def sample_by_rejection(n, failures, runs, rng):
+    # Draw with replacement and redraw the (rare) rows with repeated nodes
+    sets = np.sort(rng.integers(n, size=(runs, failures)), axis=1)
+    repeated = np.flatnonzero((np.diff(sets, axis=1) == 0).any(axis=1))
+    while len(repeated):
+        redrawn = np.sort(rng.integers(n, size=(len(repeated), failures)), axis=1)
+        sets[repeated] = redrawn
+        still_repeated = (np.diff(redrawn, axis=1) == 0).any(axis=1)
+        repeated = repeated[still_repeated]
+    return sets
+
+
+def sample_by_ranking(n, failures, runs, rng):
+    # The nodes with the lowest random scores fail
+    sets = np.empty((runs, failures), dtype=np.intp)
+    chunk = max(1, MAX_SCORES_PER_CHUNK // n)
+    for start in range(0, runs, chunk):
+        scores = rng.random((min(chunk, runs - start), n))
+        ranked = np.argpartition(scores, failures - 1, axis=1)[:, :failures]
+        sets[start : start + len(ranked)] = np.sort(ranked, axis=1)
+    return sets
+
+
+def sample_failure_sets(n, failures, runs, rng):
+    """
+    Draw `runs` sets of `failures` distinct nodes out of n, uniformly, in one
+    vectorized call. Returns a (runs, failures) array of sorted node indices.
+    """
+    failures = min(n, failures)
+    if failures == 0:
+        return np.zeros((runs, 0), dtype=np.intp)
+    if failures * failures <= n:
+        return sample_by_rejection(n, failures, runs, rng)
+    return sample_by_ranking(n, failures, runs, rng)
+
+
+def count_failure_sets(n, failures):
+    return math.comb(n, min(n, failures))
+
+
+def enumerate_failure_sets(n, failures):
+    """Every set of `failures` distinct nodes out of n, in lexicographic order."""
+    failures = min(n, failures)
+    sets = np.fromiter(
+        itertools.chain.from_iterable(itertools.combinations(range(n), failures)),
+        dtype=np.intp,
+        count=count_failure_sets(n, failures) * failures,
+    )
+    return sets.reshape(count_failure_sets(n, failures), failures)
+
+
+def collapse_failure_sets(failure_sets):
+    """
+    Merge identical failure sets into one run each. Returns the distinct
+    sets and how many of the sampled runs each one stands for.
+    """
+    return np.unique(failure_sets, axis=0, return_counts=True)
+
+
+def failure_mask(failure_set):
+    """Integer bitmask with bit i set when node i fails."""
+    mask = 0
+    for node in failure_set.tolist():
+        mask |= 1 << node
+    return mask
+
+
+def initialise_node_states(healthy_state, failure_set):
+    states = healthy_state.copy()
+    states[failure_set] = False
+    return states
+
+
+def log_comb(n, k):
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def log_sum_exp(values, axis=None):
+    peak = np.max(values, axis=axis, keepdims=True)
+    peak = np.where(np.isfinite(peak), peak, 0)
+    with np.errstate(divide="ignore"):
+        total = np.log(np.sum(np.exp(values - peak), axis=axis, keepdims=True))
+    return np.squeeze(total + peak, axis=axis)
+
+
+def impact_biases(node_types, dependents, strength=1.0):
+    """
+    A bias per node type toward the types whose failure reaches more of the
+    network: the number of nodes that read an instance of the type, directly
+    or through other nodes, relative to the geometric mean over all types
+    and raised to `strength`.
+    """
+    types = sorted(set(node_types))
+    reach = []
+    for node_type in types:
+        seen = {node for node, t in enumerate(node_types) if t == node_type}
+        stack = list(seen)
+        while stack:
+            for reader in dependents[stack.pop()]:
+                if reader not in seen:
+                    seen.add(reader)
+                    stack.append(reader)
+        reach.append(len(seen))
+    log_reach = np.log(reach)
+    biases = np.exp(strength * (log_reach - log_reach.mean()))
+    return dict(zip(types, biases.tolist()))
+
+
+class TypeStratifiedSampler:
+    """
+    Samples failure sets a node type at a time: first how many instances of
+    each type fail, then which ones, uniformly within the type. Under
+    uniform sampling the counts per type are multivariate hypergeometric;
+    biases[type] > 1 tilts them toward failing more instances of that type,
+    and likelihood_ratios turns averages over the tilted sets back into
+    averages over uniformly drawn ones. With stratified sampling the counts
+    come from one uniform in each of `runs` equal slices of the unit
+    interval, so every combination of counts gets close to its share of the
+    runs.
+    """
+
+    def __init__(self, node_types, biases=None):
+        self.types, self.type_index = np.unique(node_types, return_inverse=True)
+        self.members = [
+            np.flatnonzero(self.type_index == t) for t in range(len(self.types))
+        ]
+        biases = biases or {}
+        self.log_biases = np.log(
+            [biases.get(node_type, 1.0) for node_type in self.types]
+        )
+        self._tails = {}
+
+    def size(self):
+        return len(self.type_index)
+
+    def log_weights(self, t, failures):
+        """Log weight of failing c instances of type t, for c up to failures."""
+        counts = np.arange(min(len(self.members[t]), failures) + 1)
+        return (
+            np.array([log_comb(len(self.members[t]), c) for c in counts.tolist()])
+            + counts * self.log_biases[t]
+        )
+
+    def tails(self, failures):
+        """
+        tails[t][j] is the log of the total weight of failing j nodes among
+        the types from t on.
+        """
+        if failures not in self._tails:
+            tails = np.full((len(self.types) + 1, failures + 1), -np.inf)
+            tails[len(self.types), 0] = 0
+            for t in reversed(range(len(self.types))):
+                weights = self.log_weights(t, failures)
+                for j in range(failures + 1):
+                    c = np.arange(min(len(weights) - 1, j) + 1)
+                    tails[t, j] = log_sum_exp(weights[c] + tails[t + 1, j - c])
+            self._tails[failures] = tails
+        return self._tails[failures]
+
+    def sample_counts(self, failures, runs, rng, stratified=True):
+        """How many instances of each type fail, as a (runs, types) array."""
+        tails = self.tails(failures)
+        if stratified:
+            u = (rng.random() + np.arange(runs)) / runs
+        else:
+            u = rng.random(runs)
+        remaining = np.full(runs, failures)
+        counts = np.zeros((runs, len(self.types)), dtype=np.intp)
+        rows = np.arange(runs)
+        for t in range(len(self.types)):
+            weights = self.log_weights(t, failures)
+            c = np.arange(len(weights))
+            rest = remaining[:, np.newaxis] - c
+            log_p = np.where(
+                rest >= 0,
+                weights + tails[t + 1, np.maximum(rest, 0)],
+                -np.inf,
+            )
+            p = np.exp(log_p - tails[t, remaining][:, np.newaxis])
+            cumulative = np.cumsum(p, axis=1)
+            # Rounding can leave u past the last count with any weight
+            largest = np.where(p > 0, c, 0).max(axis=1)
+            chosen = np.minimum((cumulative <= u[:, np.newaxis]).sum(axis=1), largest)
+            below = np.where(chosen > 0, cumulative[rows, chosen - 1], 0)
+            # Rescale u into the slice of the chosen count for the next type
+            u = np.clip((u - below) / p[rows, chosen], 0, np.nextafter(1, 0))
+            counts[:, t] = chosen
+            remaining -= chosen
+        return counts
+
+    def sample(self, failures, runs, rng, stratified=True):
+        """
+        Draw `runs` failure sets of `failures` distinct nodes. Returns a
+        (runs, failures) array of sorted node indices.
+        """
+        failures = min(self.size(), failures)
+        counts = self.sample_counts(failures, runs, rng, stratified)
+        sets = np.empty((runs, failures), dtype=np.intp)
+        chunk = max(1, MAX_SCORES_PER_CHUNK // max(1, self.size()))
+        for start in range(0, runs, chunk):
+            chunk_counts = counts[start : start + chunk]
+            nodes = []
+            chosen = []
+            for t, members in enumerate(self.members):
+                largest = min(len(members), failures)
+                scores = rng.random((len(chunk_counts), len(members)))
+                order = np.argsort(scores, axis=1)[:, :largest]
+                nodes.append(members[order])
+                chosen.append(np.arange(largest) < chunk_counts[:, t, np.newaxis])
+            nodes = np.concatenate(nodes, axis=1)
+            chosen = np.concatenate(chosen, axis=1)
+            sets[start : start + len(chunk_counts)] = np.sort(
+                nodes[chosen].reshape(len(chunk_counts), failures), axis=1
+            )
+        return sets
+
+    def likelihood_ratios(self, failure_sets):
+        """
+        Probability of each set under uniform sampling over its probability
+        under the biased sampling.
+        """
+        runs, failures = failure_sets.shape
+        if not self.log_biases.any():
+            return np.ones(runs)
+        counts = np.zeros((runs, len(self.types)))
+        np.add.at(
+            counts,
+            (
+                np.repeat(np.arange(runs), failures),
+                self.type_index[failure_sets].ravel(),
+            ),
+            1,
+        )
+        return np.exp(
+            self.tails(failures)[0, failures]
+            - log_comb(self.size(), failures)
+            - counts @ self.log_biases
+        )
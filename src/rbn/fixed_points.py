@@ -0,0 +1,119 @@
+import sys
+from collections import Counter
+
+from .attractors import normalize_tuple, short_hash
+from .bdd import FALSE, TRUE, BDD
+from .components import strongly_connected_components
+from .network_behaviour import evaluate
+
+
+def condition_bdd(bdd, func, levels):
+    """Diagram of one condition over the variables at `levels`, in input order."""
+    if func == "copy":
+        return bdd.var(levels[0]) if levels else FALSE
+    if func == "true":
+        return TRUE
+    if func == "false":
+        return FALSE
+    if func == "random":
+        raise ValueError("Fixed points need a deterministic network")
+    n = len(levels)
+    # Nodes may read the same input more than once
+    weights = Counter(levels)
+    return bdd.symmetric(
+        weights.items(),
+        lambda count: bool(evaluate(func, [True] * count + [False] * (n - count))),
+    )
+
+
+def tree_bdd(bdd, tree, levels):
+    """Diagram of a compiled tree whose inputs are the variables at `levels`."""
+    node_type = tree[0]
+    if node_type == "COND":
+        return condition_bdd(bdd, tree[1], [levels[p] for p in tree[3]])
+    left = tree_bdd(bdd, tree[1], levels)
+    right = tree_bdd(bdd, tree[2], levels)
+    if node_type == "AND":
+        return bdd.conjoin(left, right)
+    elif node_type == "OR":
+        return bdd.disjoin(left, right)
+    else:
+        raise ValueError("Unknown tree node type: " + str(node_type))
+
+
+def variable_order(compiled):
+    # Upstream components first keeps each node close to the nodes it reads
+    return [
+        node
+        for component in strongly_connected_components(compiled.inputs)
+        for node in component
+    ]
+
+
+class FixedPoints:
+    """
+    Every state a deterministic compiled network maps onto itself, as one
+    diagram over the node states. Node i is variable level[i].
+    """
+
+    def __init__(self, compiled):
+        if compiled.stochastic:
+            raise ValueError("Fixed points need a deterministic network")
+        self.compiled = compiled
+        self.order = variable_order(compiled)
+        self.level = [0] * compiled.size()
+        for level, node in enumerate(self.order):
+            self.level[node] = level
+        self.bdd = BDD(compiled.size())
+        # Diagrams recurse once per variable
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * compiled.size() + 1000))
+
+        self.root = TRUE
+        for node in self.order:
+            function = tree_bdd(
+                self.bdd,
+                compiled.node_trees[node],
+                [self.level[j] for j in compiled.inputs[node]],
+            )
+            self.root = self.bdd.conjoin(
+                self.root,
+                self.bdd.equivalent(self.bdd.var(self.level[node]), function),
+            )
+
+    def count(self):
+        return self.bdd.sat_count(self.root)
+
+    def states(self):
+        """Yield every fixed point as a list of bools indexed by node."""
+        for assignment in self.bdd.solutions(self.root):
+            yield [assignment[level] for level in self.level]
+
+    def normalized(self, reduction):
+        """
+        The fixed points in the per-type form normalize_attractor gives, and
+        how many fixed points share each, without listing the fixed points:
+        the diagram is split on the type conditions one type at a time.
+        """
+        conditions = [
+            tree_bdd(self.bdd, tree, [self.level[node] for node in instances])
+            for tree, instances in zip(reduction.trees, reduction.index_lists)
+        ]
+        results = []
+        stack = [(self.root, 0, 0)]
+        while stack:
+            root, t, code = stack.pop()
+            if root == FALSE:
+                continue
+            if t == len(conditions):
+                results.append((reduction.to_frozenset(code), self.bdd.sat_count(root)))
+                continue
+            stack.append(
+                (self.bdd.conjoin(root, self.bdd.negate(conditions[t])), t + 1, code)
+            )
+            stack.append((self.bdd.conjoin(root, conditions[t]), t + 1, code | 1 << t))
+        return results
+
+
+def fixed_point_id(normalized):
+    """Hash of a fixed point, the same the simulation gives the attractor."""
+    return short_hash(normalize_tuple((normalized,)))
@@ -1,7 +1,12 @@
+import hashlib
 import re
 
 import pygraphviz as pgv
+from .compiler import MAX_TABLE_INPUTS, TypeReduction, compile_network
+from .dot_writer import attribute_list, quote
 from .network_behaviour import interpret_function
+from .simplify import SimplifiedNetwork
+from .symmetry import find_instance_symmetry
 
 
 def parse_instance_number(instance_name):
@@ -38,6 +43,10 @@ def output_expanded_network_to_dot(expanded_network, output_filename="expanded.d
 
 
 def load_network_from_dot(dot_file):
+    # Graphs built in memory (pygraphviz or NetworkGraph) are used as they are
+    if not isinstance(dot_file, str):
+        return dot_file
+
     if dot_file.endswith(".dot"):
         return pgv.AGraph(dot_file)
 
@@ -94,19 +103,24 @@ class KauffmanNetwork:
         self._instance_counts = {}
         self._input_types = {}
         self._expanded_network = {}
+        self._instances_by_type = {}
         self._functions = {}
+        self._function_definitions = {}
         self._node_type_conditions = {}
+        self._type_condition_definitions = {}
+        self._compiled = {}
+        self._symmetry = None
         self._load_network()
         self._expand_network()
+        self._type_reduction = self._build_type_reduction()
 
         # Calculating total connections (Inputs + Outputs) for each node
         self._node_connections = {node: 0 for node in self._expanded_network}
 
         # Count Inputs
-        for node in self._node_connections:
-            for source, targets in self._expanded_network.items():
-                if node in targets and source:
-                    self._node_connections[node] += 1
+        for targets in self._expanded_network.values():
+            for node in set(targets):
+                self._node_connections[node] += 1
         output_expanded_network_to_dot(self._expanded_network)
 
         for node in self._network.nodes():
@@ -138,12 +152,69 @@ class KauffmanNetwork:
     def get_expanded_node_list(self):
         return list(self._expanded_network)
 
+    def get_node_inputs(self, node):
+        return self._expanded_network[node]
+
+    def get_instance_type(self, node):
+        return self._input_types[node]
+
+    def get_function_definition(self, node):
+        return self._function_definitions[node]
+
+    def compile(self, max_table_inputs=MAX_TABLE_INPUTS):
+        # Compile lazily; the compiled form is shared by all engines
+        if max_table_inputs not in self._compiled:
+            self._compiled[max_table_inputs] = compile_network(self, max_table_inputs)
+        return self._compiled[max_table_inputs]
+
+    def get_type_reduction(self):
+        return self._type_reduction
+
+    def get_symmetry(self):
+        # Interchangeable instances, found from the expanded wiring on first use
+        if self._symmetry is None:
+            self._symmetry = find_instance_symmetry(
+                self.compile(), self._type_reduction
+            )
+        return self._symmetry
+
+    def simplify(self, observed_types=None):
+        """
+        Equivalent smaller network once constants have settled; only nodes
+        the observed types (all by default) depend on are kept.
+        """
+        return SimplifiedNetwork(self.compile(), observed_types)
+
     def nodes(self):
         return self._network.nodes()
 
     def edges(self):
         return self._network.edges()
 
+    def to_dot(self):
+        """
+        DOT source of the type-level network, with attributes in a fixed
+        order, so that equal networks give equal text however they were
+        written or built.
+        """
+        lines = ["digraph {"]
+        for node in self._network.nodes():
+            attributes = {key: str(value) for key, value in sorted(node.attr.items())}
+            lines.append("\t" + quote(node.name) + attribute_list(attributes) + ";")
+        for edge in self._network.edges():
+            attributes = {key: str(value) for key, value in sorted(edge.attr.items())}
+            lines.append(
+                f"\t{quote(edge[0])} -> {quote(edge[1])}"
+                + attribute_list(attributes)
+                + ";"
+            )
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def fingerprint(self):
+        """SHA-256 of to_dot(), identifying the network across files."""
+        return hashlib.sha256(self.to_dot().encode("utf-8")).hexdigest()
+
     def get_n(self):
         # N - Total Number of Nodes
         return len(self._expanded_network)
@@ -179,13 +250,27 @@ class KauffmanNetwork:
         for node in self._network.nodes():
             node_type = node.name
             self._type_to_label_map[node_type] = node.attr.get("label", node_type)
-            type_condition = interpret_function(node.attr["type_condition"] or "or")
+            type_condition_definition = node.attr["type_condition"] or "or"
+            type_condition = interpret_function(type_condition_definition)
             self._node_type_conditions[node_type] = type_condition
+            self._type_condition_definitions[node_type] = type_condition_definition
 
             # Assuming the number of instances is stored in a node attribute 'instances'
             # Default to 1 if 'instances' attribute is not found
             self._instance_counts[node_type] = int(node.attr.get("instances") or 1)
 
+    def _build_type_reduction(self):
+        # Instance positions follow the order of get_expanded_node_list,
+        # which is also the node order of the compiled network
+        index = {name: i for i, name in enumerate(self._expanded_network)}
+        types = list(self._instances_by_type)
+        return TypeReduction(
+            types,
+            [[index[name] for name in self._instances_by_type[t]] for t in types],
+            [self._type_condition_definitions[t] for t in types],
+            MAX_TABLE_INPUTS,
+        )
+
     def _expand_network(self):
         self._expand_nodes()
         self._expand_edges()
@@ -194,14 +279,18 @@ class KauffmanNetwork:
         # Expand connections based on expanded nodes
         for node in self._network.nodes():
             num_instances = int(node.attr["instances"] or 1)
-            func = interpret_function(node.attr["func"] or "copy")
+            func_definition = node.attr["func"] or "copy"
+            func = interpret_function(func_definition)
+            self._instances_by_type[node.name] = []
             for i in range(1, num_instances + 1):
                 instance_name = f"{node.name} {i}"
                 self._instance_to_label_map[instance_name] = (
                     f"{node.attr.get("label", node.name)} {i}"
                 )
                 self._expanded_network[instance_name] = []
+                self._instances_by_type[node.name].append(instance_name)
                 self._functions[instance_name] = func
+                self._function_definitions[instance_name] = func_definition
 
     def _expand_edges(self):
         # Track the number of connections for each target instance to ensure connections are distributed evenly
@@ -231,18 +320,10 @@ class KauffmanNetwork:
         return target_connections_count
 
     def get_target_instances(self, edge):
-        target_pattern = re.compile(f"^{re.escape(edge[1].name)} \\d+$")
-        target_instances = [
-            n for n in self._expanded_network if target_pattern.match(n)
-        ]
-        return target_instances
+        return self._instances_by_type.get(edge[1].name, [])
 
     def get_source_instances(self, edge):
-        source_pattern = re.compile(f"^{re.escape(edge[0].name)} \\d+$")
-        source_instances = [
-            n for n in self._expanded_network if source_pattern.match(n)
-        ]
-        return source_instances
+        return self._instances_by_type.get(edge[0].name, [])
 
     def distribute_connections(
         self,
@@ -1,5 +1,6 @@
 import random
 import re
+from functools import lru_cache
 
 
 # Define the Boolean functions
@@ -86,6 +87,121 @@ def filter_by_modulo(inputs, modulo, group_index):
     return results
 
 
+def parse_condition(condition):
+    """
+    Split a condition string into (func, target_type, modulo, group_index).
+    Global conditions such as "one" or "50%" have no target type, modulo or
+    group index.
+    """
+    # Try to match the new syntax with parameters:
+    # e.g., "75%(A, mod=2, group=0)" or "majority(B, mod=3, group=2)"
+    new_regex = r"(\w+|\d+%)\(\s*([A-Za-z0-9_]+)\s*(?:,\s*mod\s*=\s*(\d+)\s*,\s*group\s*=\s*(\d+))?\s*\)"
+    match = re.match(new_regex, condition)
+    if match:
+        func, target_type, modulo, group_index = match.groups()
+        if modulo is not None:
+            return func, target_type, int(modulo), int(group_index)
+        return func, target_type, None, None
+    # If no parentheses (or no comma parameters) are present, treat as a global condition.
+    return condition, None, None, None
+
+
+def select_condition_inputs(condition, inputs, input_types):
+    """
+    Return the inputs a parsed condition applies to: the modulo group when
+    mod/group are given, otherwise all inputs of the target type, otherwise
+    every input.
+    """
+    _, target_type, modulo, group_index = condition
+    if modulo is not None:
+        return filter_by_modulo(inputs, modulo, group_index)
+    if target_type is not None:
+        return [inputs[i] for i, t in enumerate(input_types) if t == target_type]
+    return inputs
+
+
+def evaluate(func, inputs):
+    if "%" in func:
+        percentage = int(func.replace("%", ""))
+        return function_map["%"](inputs, percentage)
+    elif func in function_map:
+        return function_map[func](inputs, None)
+    else:
+        raise ValueError(f"Unknown function: {func}")
+
+
+def tokenize(expr):
+    token_specification = [
+        ("LPAREN", r"\("),
+        ("RPAREN", r"\)"),
+        ("AND", r"&"),
+        ("OR", r"\|"),
+        ("SKIP", r"\s+"),
+        # A condition token is any run of characters that doesn't include whitespace,
+        # &, |, or parentheses; it may also include an optional parenthesized part.
+        ("COND", r"[^&|\(\)\s]+(?:\([^&|\(\)]*\))?"),
+    ]
+    tok_regex = "|".join(
+        f"(?P<{name}>{pattern})" for name, pattern in token_specification
+    )
+    tokens = []
+    for mo in re.finditer(tok_regex, expr):
+        kind = mo.lastgroup
+        value = mo.group()
+        if kind == "SKIP":
+            continue
+        tokens.append((kind, value))
+    return tokens
+
+
+def parse_expr(tokens):
+    node, tokens = parse_term(tokens)
+    while tokens and tokens[0][0] == "OR":
+        tokens.pop(0)  # consume OR token
+        right, tokens = parse_term(tokens)
+        node = ("OR", node, right)
+    return node, tokens
+
+
+def parse_term(tokens):
+    node, tokens = parse_factor(tokens)
+    while tokens and tokens[0][0] == "AND":
+        tokens.pop(0)  # consume AND token
+        right, tokens = parse_factor(tokens)
+        node = ("AND", node, right)
+    return node, tokens
+
+
+def parse_factor(tokens):
+    if not tokens:
+        raise ValueError("Unexpected end of tokens")
+    token = tokens.pop(0)
+    if token[0] == "LPAREN":
+        node, tokens = parse_expr(tokens)
+        if not tokens or tokens[0][0] != "RPAREN":
+            raise ValueError("Missing closing parenthesis")
+        tokens.pop(0)  # Remove RPAREN
+        return node, tokens
+    elif token[0] == "COND":
+        return ("COND", parse_condition(token[1])), tokens
+    else:
+        raise ValueError("Unexpected token: " + str(token))
+
+
+@lru_cache(maxsize=None)
+def parse_function(func_str):
+    """
+    Parse a function string into a tree of ("AND", left, right),
+    ("OR", left, right) and ("COND", (func, target_type, modulo, group_index))
+    nodes.
+    """
+    tokens = tokenize(func_str)
+    parse_tree, remaining_tokens = parse_expr(tokens)
+    if remaining_tokens:
+        raise ValueError("Unexpected tokens remaining: " + str(remaining_tokens))
+    return parse_tree
+
+
 def interpret_function(func_str):
     """
     Parse the function string and return a function that evaluates it.
@@ -97,104 +213,15 @@ def interpret_function(func_str):
          75%(A, mod=2, group=0)
          majority(B, mod=3, group=2)
     """
-
-    def group_input_types(input_types, inputs, target_type):
-        return [inputs[i] for i, t in enumerate(input_types) if t == target_type]
-
-    def evaluate(condition, inputs):
-        if "%" in condition:
-            percentage = int(condition.replace("%", ""))
-            return function_map["%"](inputs, percentage)
-        elif condition in function_map:
-            return function_map[condition](inputs, None)
-        else:
-            raise ValueError(f"Unknown function: {condition}")
-
-    def evaluate_condition(condition, inputs, input_types):
-        # Try to match the new syntax with parameters:
-        # e.g., "75%(A, mod=2, group=0)" or "majority(B, mod=3, group=2)"
-        new_regex = r"(\w+|\d+%)\(\s*([A-Za-z0-9_]+)\s*(?:,\s*mod\s*=\s*(\d+)\s*,\s*group\s*=\s*(\d+))?\s*\)"
-        match = re.match(new_regex, condition)
-        if match:
-            func, target_type, modulo, group_index = match.groups()
-            if modulo is not None:
-                modulo = int(modulo)
-                group_index = int(group_index)
-                filtered_inputs = filter_by_modulo(inputs, modulo, group_index)
-            else:
-                # No modulo parameters; select all inputs for the target type.
-                filtered_inputs = [
-                    inputs[i] for i, t in enumerate(input_types) if t == target_type
-                ]
-            return evaluate(func, filtered_inputs)
-        else:
-            # If no parentheses (or no comma parameters) are present, treat as a global condition.
-            return evaluate(condition, inputs)
-
-    def tokenize(expr):
-        token_specification = [
-            ("LPAREN", r"\("),
-            ("RPAREN", r"\)"),
-            ("AND", r"&"),
-            ("OR", r"\|"),
-            ("SKIP", r"\s+"),
-            # A condition token is any run of characters that doesn't include whitespace,
-            # &, |, or parentheses; it may also include an optional parenthesized part.
-            ("COND", r"[^&|\(\)\s]+(?:\([^&|\(\)]*\))?"),
-        ]
-        tok_regex = "|".join(
-            f"(?P<{name}>{pattern})" for name, pattern in token_specification
-        )
-        tokens = []
-        for mo in re.finditer(tok_regex, expr):
-            kind = mo.lastgroup
-            value = mo.group()
-            if kind == "SKIP":
-                continue
-            tokens.append((kind, value))
-        return tokens
-
-    def parse_expr(tokens):
-        node, tokens = parse_term(tokens)
-        while tokens and tokens[0][0] == "OR":
-            tokens.pop(0)  # consume OR token
-            right, tokens = parse_term(tokens)
-            node = ("OR", node, right)
-        return node, tokens
-
-    def parse_term(tokens):
-        node, tokens = parse_factor(tokens)
-        while tokens and tokens[0][0] == "AND":
-            tokens.pop(0)  # consume AND token
-            right, tokens = parse_factor(tokens)
-            node = ("AND", node, right)
-        return node, tokens
-
-    def parse_factor(tokens):
-        if not tokens:
-            raise ValueError("Unexpected end of tokens")
-        token = tokens.pop(0)
-        if token[0] == "LPAREN":
-            node, tokens = parse_expr(tokens)
-            if not tokens or tokens[0][0] != "RPAREN":
-                raise ValueError("Missing closing parenthesis")
-            tokens.pop(0)  # Remove RPAREN
-            return node, tokens
-        elif token[0] == "COND":
-            return ("COND", token[1]), tokens
-        else:
-            raise ValueError("Unexpected token: " + str(token))
-
-    tokens = tokenize(func_str)
-    parse_tree, remaining_tokens = parse_expr(tokens)
-    if remaining_tokens:
-        raise ValueError("Unexpected tokens remaining: " + str(remaining_tokens))
+    parse_tree = parse_function(func_str)
 
     def eval_tree(tree, inputs, input_types):
         node_type = tree[0]
         if node_type == "COND":
-            condition_str = tree[1]
-            return evaluate_condition(condition_str, inputs, input_types)
+            condition = tree[1]
+            return evaluate(
+                condition[0], select_condition_inputs(condition, inputs, input_types)
+            )
         elif node_type == "AND":
             return eval_tree(tree[1], inputs, input_types) and eval_tree(
                 tree[2], inputs, input_types
@@ -0,0 +1,139 @@
+import random
+
+from .network_graph import NetworkGraph
+
+TOPOLOGIES = ("random", "modular", "scale-free")
+
+
+def node_name(index):
+    return f"N{index}"
+
+
+def sample_excluding(rng, size, count, excluded):
+    """Sample `count` distinct values from range(size) minus `excluded` in O(count)."""
+    return [i + (i >= excluded) for i in rng.sample(range(size - 1), count)]
+
+
+def random_sources(n, k, rng):
+    for target in range(n):
+        yield target, sample_excluding(rng, n, k, target)
+
+
+def modular_sources(n, k, rng, modules, intra):
+    """
+    Split the nodes into `modules` contiguous blocks. Each input is drawn from
+    the target's own block with probability `intra`, otherwise from the rest
+    of the network.
+    """
+    modules = max(1, min(modules, n))
+    for target in range(n):
+        module = target * modules // n
+        start = -(-module * n // modules)
+        end = -(-(module + 1) * n // modules)
+        size = end - start
+        local = sum(rng.random() < intra for _ in range(k))
+        local = max(min(local, size - 1), k - (n - size))
+        sources = [
+            start + i for i in sample_excluding(rng, size, local, target - start)
+        ]
+        sources.extend(
+            i if i < start else i + size for i in rng.sample(range(n - size), k - local)
+        )
+        yield target, sources
+
+
+def scale_free_sources(n, k, rng):
+    """
+    Preferential attachment: a node is picked as an input with probability
+    proportional to one plus the number of times it has already been picked.
+    """
+    pool = list(range(n))
+    for target in range(n):
+        sources = []
+        while len(sources) < k:
+            source = pool[rng.randrange(len(pool))]
+            if source != target and source not in sources:
+                sources.append(source)
+        pool.extend(sources)
+        yield target, sources
+
+
+def generate_sources(n, k, topology="random", modules=4, intra=0.9, rng=random):
+    """
+    Yield (target, sources) for every node so that each node has exactly k
+    distinct incoming edges, in O(N*K) time overall.
+    """
+    if k > n - 1:
+        raise ValueError(f"K={k} is too large for a network of {n} nodes")
+    if topology == "random":
+        return random_sources(n, k, rng)
+    if topology == "modular":
+        return modular_sources(n, k, rng, modules, intra)
+    if topology == "scale-free":
+        return scale_free_sources(n, k, rng)
+    raise ValueError(f"Unknown topology: {topology}")
+
+
+def generate_node_attributes(n, functions_list, min_instances, max_instances, rng):
+    for index in range(n):
+        yield node_name(index), {
+            "label": node_name(index),
+            "func": rng.choice(functions_list),
+            "instances": rng.randint(min_instances, max_instances),
+        }
+
+
+def generate_network(
+    n,
+    k,
+    functions_list,
+    min_instances=1,
+    max_instances=1,
+    topology="random",
+    modules=4,
+    intra=0.9,
+    rng=random,
+):
+    """Build the network in memory, ready to pass to KauffmanNetwork."""
+    graph = NetworkGraph()
+    for name, attributes in generate_node_attributes(
+        n, functions_list, min_instances, max_instances, rng
+    ):
+        graph.add_node(name, **attributes)
+    for target, sources in generate_sources(n, k, topology, modules, intra, rng):
+        for source in sources:
+            graph.add_edge(node_name(source), node_name(target))
+    return graph
+
+
+def write_dot(
+    stream,
+    n,
+    k,
+    functions_list,
+    min_instances=1,
+    max_instances=1,
+    topology="random",
+    modules=4,
+    intra=0.9,
+    rng=random,
+):
+    """
+    Stream the same network generate_network would build, for the same
+    random state, as DOT without holding it in memory.
+    """
+    stream.write("digraph RBN {\n")
+    for name, attributes in generate_node_attributes(
+        n, functions_list, min_instances, max_instances, rng
+    ):
+        stream.write(
+            f'    {name} [label="{attributes["label"]}", func="{attributes["func"]}", instances={attributes["instances"]}];\n'
+        )
+    for target, sources in generate_sources(n, k, topology, modules, intra, rng):
+        target_name = node_name(target)
+        stream.write(
+            "".join(
+                f"    {node_name(source)} -> {target_name};\n" for source in sources
+            )
+        )
+    stream.write("}\n")
@@ -0,0 +1,50 @@
+class Attributes(dict):
+    """Attribute mapping that, like pygraphviz, reads unset attributes as None."""
+
+    def __missing__(self, key):
+        return None
+
+
+class GraphNode(str):
+    def __new__(cls, name, attr):
+        node = super().__new__(cls, name)
+        node.attr = Attributes(attr)
+        return node
+
+    @property
+    def name(self):
+        return str(self)
+
+
+class GraphEdge(tuple):
+    def __new__(cls, source, target, attr):
+        edge = super().__new__(cls, (source, target))
+        edge.attr = Attributes(attr)
+        return edge
+
+
+class NetworkGraph:
+    """
+    Minimal in-memory stand-in for a pygraphviz AGraph, exposing the parts
+    KauffmanNetwork reads. Building a network this way avoids both DOT
+    serialisation and the per-call overhead of pygraphviz on large graphs.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self._edges = []
+
+    def add_node(self, name, **attr):
+        self._nodes[name] = GraphNode(name, attr)
+
+    def add_edge(self, source, target, **attr):
+        for name in (source, target):
+            if name not in self._nodes:
+                self.add_node(name)
+        self._edges.append(GraphEdge(self._nodes[source], self._nodes[target], attr))
+
+    def nodes(self):
+        return list(self._nodes.values())
+
+    def edges(self):
+        return list(self._edges)
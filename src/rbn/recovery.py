@@ -0,0 +1,257 @@
+import numpy as np
+
+from .attractors import Attractors
+from .basins import run_to_attractors
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+def initial_states(size, failure_sets):
+    """(runs, size) healthy states with the nodes of each failure set failed."""
+    states = np.ones((len(failure_sets), size), dtype=bool)
+    states[np.arange(len(failure_sets))[:, np.newaxis], failure_sets] = False
+    return states
+
+
+def target_states(reduction, attractor_states):
+    """(states, types) boolean array of every normalized state of the attractors."""
+    rows = []
+    for attractor_state in attractor_states:
+        for state in attractor_state:
+            values = dict(state)
+            rows.append([values[node_type] for node_type in reduction.types])
+    return np.array(rows, dtype=bool).reshape(len(rows), len(reduction.types))
+
+
+def reached_attractors(compiled, reduction, states, rng, num_steps):
+    """Attractors reached from a (batch, N) array of initial states."""
+    attractors = Attractors()
+    run_to_attractors(compiled, reduction, states, attractors, rng, num_steps)
+    return attractors
+
+
+def healthy_attractor(compiled, reduction, rng, num_steps):
+    """
+    The attractor the healthy state runs into, or None if it reaches none
+    within num_steps steps.
+    """
+    attractors = reached_attractors(
+        compiled, reduction, compiled.healthy_state()[np.newaxis], rng, num_steps
+    )
+    items = attractors.items()
+    return items[0][0] if items else None
+
+
+def stage_attractors(simulation, compiled, reduction, symmetry, samples, rng):
+    """
+    Attractors reached from up to `samples` initial states of each of the
+    simulation's stages, as candidates for designated healthy attractors.
+    Failure sets and random nodes draw from rng, so the simulation's own
+    generator is left as it was for the analysis that follows.
+    """
+    attractors = Attractors()
+    simulation_rng = simulation.rng
+    simulation.rng = rng
+    try:
+        for stage in range(simulation.num_stages):
+            failure_sets = simulation.failure_sets_for_stage(
+                compiled, symmetry, stage, samples
+            )[0]
+            run_to_attractors(
+                compiled,
+                reduction,
+                initial_states(compiled.size(), failure_sets),
+                attractors,
+                rng,
+                simulation.num_steps_per_run,
+            )
+    finally:
+        simulation.rng = simulation_rng
+    return attractors
+
+
+def histogram_percentile(counts, q):
+    """
+    Smallest step by which a share q of the weight in counts has recovered,
+    or None if that takes longer than the steps counted.
+    """
+    total = counts.sum()
+    if total == 0:
+        return None
+    step = int(np.searchsorted(np.cumsum(counts), q * total - 1e-9 * total))
+    return step if step < len(counts) - 1 else None
+
+
+def histogram_mean(counts):
+    """Mean step of the runs that recovered, or None if none did."""
+    recovered = counts[:-1]
+    if recovered.sum() == 0:
+        return None
+    return float(np.dot(np.arange(len(recovered)), recovered) / recovered.sum())
+
+
+class RecoveryTimes:
+    """
+    Weight of the runs of a stage by the step at which they recovered, for
+    the network as a whole and for each node type. The last entry of each
+    histogram holds the runs that had not recovered within num_steps steps.
+    """
+
+    def __init__(self, types, num_steps):
+        self.types = list(types)
+        self.num_steps = num_steps
+        self.network = np.zeros(num_steps + 2)
+        self.by_type = np.zeros((len(self.types), num_steps + 2))
+        self.runs = 0
+
+    @property
+    def weight(self):
+        return self.network.sum()
+
+    def add(self, other):
+        self.network += other.network
+        self.by_type += other.by_type
+        self.runs += other.runs
+
+    def recovered_share(self, counts=None):
+        if counts is None:
+            counts = self.network
+        total = counts.sum()
+        return counts[:-1].sum() / total if total else 0.0
+
+    def summary(self, counts=None):
+        """(share recovered, mean, median, 90th and 99th percentile steps)."""
+        if counts is None:
+            counts = self.network
+        return (
+            self.recovered_share(counts),
+            histogram_mean(counts),
+            histogram_percentile(counts, 0.5),
+            histogram_percentile(counts, 0.9),
+            histogram_percentile(counts, 0.99),
+        )
+
+    def type_summary(self, node_type):
+        return self.summary(self.by_type[self.types.index(node_type)])
+
+
+def recovery_times(compiled, reduction, states, weights, targets, rng, num_steps):
+    """
+    Step a (batch, N) array of states together until each has recovered,
+    dropping runs from the batch as they do, and return the RecoveryTimes
+    of the runs, weighted by weights. With targets None a run recovers when
+    every node is healthy; otherwise when it enters one of the target
+    normalized states, as the simulation compares states to find
+    attractors. A type recovers when all its instances are healthy; a run
+    that recovers before some type has counts as never recovering for it.
+    Runs of a deterministic network that settle at a fixed point without
+    recovering are dropped straight away.
+    """
+    count = len(states)
+    unrecovered = num_steps + 1
+    network_step = np.full(count, unrecovered)
+    type_step = np.full((count, len(reduction.types)), unrecovered)
+    active = np.arange(count)
+    for step in range(num_steps + 1):
+        if step > 0:
+            previous = states
+            states = compiled.step_batch(states, rng)
+            if not compiled.stochastic:
+                # A run stuck at a fixed point before recovering never will
+                moving = (states != previous).any(axis=1)
+                active = active[moving]
+                states = states[moving]
+                if len(active) == 0:
+                    break
+        healthy_types = np.stack(
+            [states[:, indices].all(axis=1) for indices in reduction.indices], axis=1
+        )
+        steps = type_step[active]
+        steps[healthy_types & (steps == unrecovered)] = step
+        type_step[active] = steps
+        if targets is None:
+            recovered = states.all(axis=1)
+        else:
+            reduced = reduction.reduce_batch(states, rng)
+            recovered = (reduced[:, np.newaxis, :] == targets).all(axis=2).any(axis=1)
+        network_step[active[recovered]] = step
+        active = active[~recovered]
+        states = states[~recovered]
+        if len(active) == 0:
+            break
+
+    times = RecoveryTimes(reduction.types, num_steps)
+    times.network = np.bincount(network_step, weights, minlength=num_steps + 2)
+    for t in range(len(reduction.types)):
+        times.by_type[t] = np.bincount(
+            type_step[:, t], weights, minlength=num_steps + 2
+        )
+    return times
+
+
+def healthy_is_fixed_point(compiled, rng):
+    healthy = compiled.healthy_state()[np.newaxis]
+    return not compiled.stochastic and bool(compiled.step_batch(healthy, rng).all())
+
+
+def analyse_recovery(
+    simulation,
+    compiled,
+    reduction,
+    symmetry,
+    targets=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+):
+    """
+    Yield (stage, exhaustive, RecoveryTimes) for each of the simulation's
+    stages: how many steps the runs starting from its failure sets take to
+    get back into one of the target attractors. By default that is the
+    all-healthy fixed point, or if the healthy state is not one, the
+    attractor it runs into. Each stage uses the failure sets (and weights)
+    the simulation would, simulated batch_size at a time. A stop request
+    ends the analysis after the batch in progress.
+    """
+    num_steps = simulation.num_steps_per_run
+    if targets is None and not healthy_is_fixed_point(compiled, simulation.rng):
+        healthy = healthy_attractor(compiled, reduction, simulation.rng, num_steps)
+        if healthy is None:
+            raise ValueError(
+                f"The healthy state reaches no attractor within {num_steps} steps"
+            )
+        targets = [healthy]
+    target = None
+    if targets is not None:
+        target = target_states(reduction, targets)
+
+    simulation.stop_requested = False
+    simulation.stages_run = 0
+    for stage in range(simulation.num_stages):
+        failure_sets, weights, _, exhaustive = simulation.failure_sets_for_stage(
+            compiled, symmetry, stage
+        )
+        ratios = np.ones(len(failure_sets))
+        if simulation.sampler is not None and not exhaustive:
+            ratios = simulation.sampler.likelihood_ratios(failure_sets)
+        times = RecoveryTimes(reduction.types, num_steps)
+        for start in range(0, len(failure_sets), batch_size):
+            if simulation.stop_requested:
+                exhaustive = False
+                break
+            part = slice(start, start + batch_size)
+            batch_times = recovery_times(
+                compiled,
+                reduction,
+                initial_states(compiled.size(), failure_sets[part]),
+                weights[part] * ratios[part],
+                target,
+                simulation.rng,
+                num_steps,
+            )
+            batch_times.runs = int(weights[part].sum())
+            times.add(batch_times)
+        if times.runs == 0:
+            return
+        simulation.stages_run += 1
+        yield stage, exhaustive, times
+        if simulation.stop_requested:
+            return
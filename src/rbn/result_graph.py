@@ -1,4 +1,4 @@
-import pygraphviz as pgv
+from .dot_writer import DotWriter
 
 
 class AbstractResultGraph:
@@ -14,7 +14,7 @@ class AbstractResultGraph:
     def add_info_box(self, K, MAX_K, N, P):
         pass
 
-    def write(self, num_stages, filename):
+    def write(self, num_stages):
         pass
 
 
@@ -40,7 +40,9 @@ def get_node_color(health):
     return f"#{red_intensity:02x}{green_intensity:02x}00"  # RGB color
 
 
-def fix_node_alignment(master_graph_dot, num_stages):
+def alignment_snippet(num_stages):
+    if num_stages == 0:
+        return ""
     # Dynamically generate the alignment snippet based on the number of stages
     # Create align_X node declarations with style=invis
     align_node_declarations = "\n\t\t".join(
@@ -51,7 +53,7 @@ def fix_node_alignment(master_graph_dot, num_stages):
         " -> ".join([f"align_{i}" for i in range(num_stages)]) + " [style=invis];"
     )
     # Complete alignment snippet
-    alignment_snippet = f"""
+    snippet = f"""
     \tsubgraph align {{
             \tgraph [rankdir=LR];
             \t{align_node_declarations}
@@ -60,27 +62,35 @@ def fix_node_alignment(master_graph_dot, num_stages):
     """
     # Edges from align_X to invisible_X
     for i in range(num_stages):
-        alignment_snippet += f"\n\talign_{i} -> invisible_{i} [style=invis];"
-    # Insert the alignment snippet before the last closing brace
-    modified_dot_content = (
-        master_graph_dot.rsplit("}", 1)[0] + alignment_snippet + "}\n"
-    )
-    return modified_dot_content
+        snippet += f"\n\talign_{i} -> invisible_{i} [style=invis];"
+    return snippet + "\n"
 
 
 class ResultGraph(AbstractResultGraph):
-    def __init__(self):
-        self.master_graph = pgv.AGraph(strict=True, directed=True, compound=True)
-        self.stage_graph = None
+    """
+    Writes the stage subgraphs to `filename` as the simulation produces
+    them; the file is complete once `write` is called.
+    """
+
+    def __init__(self, filename):
+        self._writer = DotWriter(filename, strict=True, compound=True)
+        self._in_stage = False
+
+    def _end_stage(self):
+        if self._in_stage:
+            self._writer.end_subgraph()
+            self._in_stage = False
 
     def add_subgraph(self, stage):
-        self.stage_graph = self.master_graph.add_subgraph(
-            name=f"cluster_{stage}", label=f"Random failures = {stage}"
+        self._end_stage()
+        self._writer.begin_subgraph(
+            f"cluster_{stage}", label=f"Random failures = {stage}"
         )
+        self._in_stage = True
 
         # Add an invisible node to this subgraph for ordering an alignment
         invisible_node_id = f"invisible_{stage}"
-        self.stage_graph.add_node(invisible_node_id, style="invis")
+        self._writer.node(invisible_node_id, style="invis")
 
     def add_node(self, node_id, stage, label, health, instance_count):
         fill_color = get_node_color(health)  # Calculate graduated color
@@ -88,7 +98,7 @@ class ResultGraph(AbstractResultGraph):
 
         # Prefix node ID with stage number
         prefixed_node_id: str = f"{stage}_{node_id}"
-        self.stage_graph.add_node(
+        self._writer.node(
             prefixed_node_id,
             label=html_label,
             shape="rectangle",
@@ -101,13 +111,14 @@ class ResultGraph(AbstractResultGraph):
     def add_edge(self, edge, stage):
         prefixed_source_id = f"{stage}_{edge[0]}"
         prefixed_target_id = f"{stage}_{edge[1]}"
-        self.stage_graph.add_edge(prefixed_source_id, prefixed_target_id)
+        self._writer.edge(prefixed_source_id, prefixed_target_id)
 
     # Function to create HTML-like label for the info box
     def add_info_box(self, K, MAX_K, N, P):
+        self._end_stage()
         # Add an info box node
         info_box_label = create_info_box_label(N, K, MAX_K, P)
-        self.master_graph.add_node(
+        self._writer.node(
             "info_box",
             label=info_box_label,
             shape="note",
@@ -115,10 +126,7 @@ class ResultGraph(AbstractResultGraph):
             color="lightgrey",
         )
 
-    def write(self, num_stages, filename):
-        # Output the combined master graph to a file
-        master_graph_dot = self.master_graph.to_string()
-        modified_dot_content = fix_node_alignment(master_graph_dot, num_stages)
-        # Writing to the file
-        with open(filename, "w") as file:
-            file.write(modified_dot_content)
+    def write(self, num_stages):
+        self._end_stage()
+        self._writer.raw(alignment_snippet(num_stages))
+        self._writer.close()
@@ -1,5 +1,37 @@
+import sys
+import time
+
+# Seconds between updates of the progress line
+DEFAULT_REFRESH_INTERVAL = 0.5
+
+
+def format_duration(seconds):
+    if seconds == float("inf"):
+        return "?"
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
 class AbstractResultText:
-    def print_stage_summary(self, stage, average_type_health):
+    def start_stage(self, stage):
+        pass
+
+    def print_progress(self, runs, expected_runs, attractor_count):
+        pass
+
+    def print_interrupted(self, stages_run, num_stages):
+        pass
+
+    def print_stage_summary(
+        self,
+        stage,
+        average_type_health,
+        exhaustive=False,
+        runs=None,
+        width=None,
+        outage=0,
+    ):
         pass
 
     def print_kauffman_parameters(self, K, MAX_K, N, P):
@@ -12,11 +44,84 @@ class AbstractResultText:
 
 
 class ResultText(AbstractResultText):
-    def print_stage_summary(self, stage, average_type_health):
-        print(f"\nStage {stage}")
+    """
+    Prints results to stdout. With progress, a line on `stream` (stderr by
+    default) shows how far the current stage has got, redrawn at most every
+    refresh_interval seconds.
+    """
+
+    def __init__(
+        self,
+        progress=False,
+        refresh_interval=DEFAULT_REFRESH_INTERVAL,
+        stream=None,
+        clock=time.monotonic,
+    ):
+        self.progress = progress
+        self.refresh_interval = refresh_interval
+        self._stream = stream if stream is not None else sys.stderr
+        self._clock = clock
+        self._stage = None
+        self._stage_start = 0
+        self._next_refresh = 0
+        self._line_length = 0
+
+    def start_stage(self, stage):
+        self._stage = stage
+        self._stage_start = self._clock()
+        self._next_refresh = self._stage_start + self.refresh_interval
+
+    def print_progress(self, runs, expected_runs, attractor_count):
+        if not self.progress:
+            return
+        now = self._clock()
+        if now < self._next_refresh:
+            return
+        self._next_refresh = now + self.refresh_interval
+        elapsed = now - self._stage_start
+        rate = runs / elapsed if elapsed > 0 else 0
+        remaining = max(expected_runs - runs, 0)
+        eta = remaining / rate if rate > 0 else float("inf")
+        line = (
+            f"Stage {self._stage}: {runs}/{expected_runs} runs, {rate:.0f} runs/s, "
+            f"ETA {format_duration(eta)}, {attractor_count} attractors"
+        )
+        self._stream.write("\r" + line.ljust(self._line_length))
+        self._stream.flush()
+        self._line_length = len(line)
+
+    def clear_progress(self):
+        if self._line_length:
+            self._stream.write("\r" + " " * self._line_length + "\r")
+            self._stream.flush()
+            self._line_length = 0
+
+    def print_interrupted(self, stages_run, num_stages):
+        self.clear_progress()
+        print(f"\nStopped early: results cover {stages_run} of {num_stages} stages")
+
+    def print_stage_summary(
+        self,
+        stage,
+        average_type_health,
+        exhaustive=False,
+        runs=None,
+        width=None,
+        outage=0,
+    ):
+        self.clear_progress()
+        details = ""
+        if exhaustive:
+            details = " (all failure sets)"
+        elif runs is not None and width is not None:
+            details = f" ({runs} runs, 95% interval width {width:.4f})"
+        elif runs is not None:
+            details = f" ({runs} runs)"
+        print(f"\nStage {stage}" + details)
         print("Average Health of Node Types:")
         for node_type, health in average_type_health.items():
             print(f"  {node_type}: {health}")
+        print(f"Total outage probability: {outage}")
 
     def print_kauffman_parameters(self, K, MAX_K, N, P):
         print(f"\nKauffman Network Parameters:")
@@ -30,6 +135,15 @@ class ResultText(AbstractResultText):
     ):
         print()
         print(f"Number of attractors: {attractors.count()}")
-        print(
-            f"Percentage of runs with attractors: {runs_with_attractor / (runs_with_attractor + runs_no_attractor)}"
-        )
+        total_runs = runs_with_attractor + runs_no_attractor
+        if total_runs > 0:
+            print(
+                f"Percentage of runs with attractors: {runs_with_attractor / total_runs}"
+            )
+        print("Share of runs ending in each attractor, averaged over stages:")
+        for attractor, _ in sorted(
+            attractors.items(), key=lambda item: -attractors.dominance(item[0])
+        ):
+            print(
+                f"  {attractors.get_hash(attractor)}: {attractors.dominance(attractor)}"
+            )
@@ -0,0 +1,279 @@
+import gzip
+import hashlib
+import json
+import os
+
+from .kauffman import KauffmanNetwork
+from .result_text import AbstractResultText
+from .simulation import record_result_as_subgraph, report_attractors
+
+# Bumped whenever stored results would no longer render the same
+STORE_VERSION = 1
+DEFAULT_STORE = ".rbn-results"
+SUFFIX = ".json.gz"
+
+
+def _encode_attractor(attractor_state):
+    return [[list(pair) for pair in state] for state in attractor_state]
+
+
+def _decode_attractor(states):
+    return tuple(
+        tuple((node_type, healthy) for node_type, healthy in state) for state in states
+    )
+
+
+class AttractorTable:
+    """
+    The attractors a finished simulation reported, answering the questions
+    the reports ask of Attractors.
+    """
+
+    def __init__(self, entries):
+        # (attractor state, hash, distinct triggering events, dominance)
+        self._entries = list(entries)
+        self._by_state = {entry[0]: entry for entry in self._entries}
+
+    @classmethod
+    def from_attractors(cls, attractors):
+        return cls(
+            (
+                attractor_state,
+                attractors.get_hash(attractor_state),
+                count,
+                attractors.dominance(attractor_state),
+            )
+            for attractor_state, count in attractors.items()
+        )
+
+    def count(self):
+        return len(self._entries)
+
+    def total_runs(self):
+        return sum(count for _, count in self.items())
+
+    def items(self):
+        return tuple((entry[0], entry[2]) for entry in self._entries)
+
+    def get_hash(self, attractor_state):
+        return self._by_state[attractor_state][1]
+
+    def dominance(self, attractor_state):
+        return self._by_state[attractor_state][3]
+
+    def to_list(self):
+        return [
+            {
+                "states": _encode_attractor(attractor_state),
+                "hash": attractor_hash,
+                "count": count,
+                "dominance": dominance,
+            }
+            for attractor_state, attractor_hash, count, dominance in self._entries
+        ]
+
+    @classmethod
+    def from_list(cls, entries):
+        return cls(
+            (
+                _decode_attractor(entry["states"]),
+                entry["hash"],
+                entry["count"],
+                entry["dominance"],
+            )
+            for entry in entries
+        )
+
+
+class StoredResults:
+    """
+    What a simulation run reported, with the network and settings that
+    produced it. Rendering it writes the same reports the run did.
+    """
+
+    def __init__(
+        self,
+        network_source,
+        parameters,
+        stages=None,
+        attractors=None,
+        runs_with_attractor=0,
+        runs_no_attractor=0,
+        kauffman=None,
+    ):
+        self.network_source = network_source
+        self.parameters = parameters
+        # Keyword arguments of each print_stage_summary call
+        self.stages = stages if stages is not None else []
+        self.attractors = attractors if attractors is not None else AttractorTable([])
+        self.runs_with_attractor = runs_with_attractor
+        self.runs_no_attractor = runs_no_attractor
+        # K, MAX_K, N and P as reported
+        self.kauffman = kauffman if kauffman is not None else {}
+
+    def to_dict(self):
+        return {
+            "version": STORE_VERSION,
+            "network": self.network_source,
+            "parameters": self.parameters,
+            "stages": self.stages,
+            "attractors": self.attractors.to_list(),
+            "runs_with_attractor": self.runs_with_attractor,
+            "runs_no_attractor": self.runs_no_attractor,
+            "kauffman": self.kauffman,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["network"],
+            data["parameters"],
+            data["stages"],
+            AttractorTable.from_list(data["attractors"]),
+            data["runs_with_attractor"],
+            data["runs_no_attractor"],
+            data["kauffman"],
+        )
+
+    def network(self):
+        return KauffmanNetwork(self.network_source)
+
+    def render(self, result_graph, result_text, network=None):
+        """
+        Report the results to result_graph and result_text as the
+        simulation did, and return (P, number of attractors).
+        """
+        if network is None:
+            network = self.network()
+        for stage in self.stages:
+            result_text.print_stage_summary(**stage)
+            record_result_as_subgraph(
+                stage["average_type_health"], network, result_graph, stage["stage"]
+            )
+        p = self.kauffman["P"]
+        report_attractors(
+            self.attractors,
+            network,
+            result_graph,
+            result_text,
+            self.runs_with_attractor,
+            self.runs_no_attractor,
+            p,
+        )
+        return p, self.attractors.count()
+
+
+class RecordingResultText(AbstractResultText):
+    """
+    Passes everything on to result_text, keeping what makes up the results
+    in a StoredResults.
+    """
+
+    def __init__(self, result_text, network, parameters):
+        self.result_text = result_text
+        self.results = StoredResults(network.to_dot(), parameters)
+
+    def start_stage(self, stage):
+        self.result_text.start_stage(stage)
+
+    def print_progress(self, runs, expected_runs, attractor_count):
+        self.result_text.print_progress(runs, expected_runs, attractor_count)
+
+    def print_interrupted(self, stages_run, num_stages):
+        self.result_text.print_interrupted(stages_run, num_stages)
+
+    def print_stage_summary(
+        self,
+        stage,
+        average_type_health,
+        exhaustive=False,
+        runs=None,
+        width=None,
+        outage=0,
+    ):
+        self.results.stages.append(
+            {
+                "stage": stage,
+                "average_type_health": average_type_health,
+                "exhaustive": exhaustive,
+                "runs": runs,
+                "width": width,
+                "outage": outage,
+            }
+        )
+        self.result_text.print_stage_summary(
+            stage, average_type_health, exhaustive, runs, width, outage
+        )
+
+    def print_kauffman_parameters(self, K, MAX_K, N, P):
+        self.results.kauffman = {"K": K, "MAX_K": MAX_K, "N": N, "P": P}
+        self.result_text.print_kauffman_parameters(K, MAX_K, N, P)
+
+    def print_attractor_summary(
+        self, attractors, runs_with_attractor, runs_no_attractor
+    ):
+        self.results.attractors = AttractorTable.from_attractors(attractors)
+        self.results.runs_with_attractor = runs_with_attractor
+        self.results.runs_no_attractor = runs_no_attractor
+        self.result_text.print_attractor_summary(
+            attractors, runs_with_attractor, runs_no_attractor
+        )
+
+
+class ResultsStore:
+    """
+    Results of finished simulations, one gzipped JSON file each in a
+    directory, keyed by the network's fingerprint and the simulation's
+    parameters (seed included).
+    """
+
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = path
+
+    @staticmethod
+    def key(network, parameters):
+        description = json.dumps(
+            {
+                "version": STORE_VERSION,
+                "network": network.fingerprint(),
+                "parameters": parameters,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(description.encode("utf-8")).hexdigest()[:16]
+
+    def _file(self, key):
+        return os.path.join(self.path, key + SUFFIX)
+
+    def keys(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(
+            name[: -len(SUFFIX)]
+            for name in os.listdir(self.path)
+            if name.endswith(SUFFIX)
+        )
+
+    def resolve(self, prefix):
+        """The one stored key starting with prefix, or None."""
+        matches = [key for key in self.keys() if key.startswith(prefix)]
+        return matches[0] if len(matches) == 1 else None
+
+    def load(self, key):
+        """The results stored under key, or None."""
+        try:
+            with gzip.open(self._file(key), "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        if data.get("version") != STORE_VERSION:
+            return None
+        return StoredResults.from_dict(data)
+
+    def save(self, key, results):
+        os.makedirs(self.path, exist_ok=True)
+        # Write to the side first so a stopped save leaves no broken entry
+        temporary = self._file(key) + ".tmp"
+        with gzip.open(temporary, "wt", encoding="utf-8") as f:
+            json.dump(results.to_dict(), f, separators=(",", ":"))
+        os.replace(temporary, self._file(key))
@@ -0,0 +1,251 @@
+from .compiler import CompiledNetwork, is_typed
+from .network_behaviour import evaluate, parse_function
+
+
+def evaluate_condition_partial(func, values):
+    """
+    Value of one condition over inputs that are True, False or None
+    (unknown), or None if it depends on the unknown inputs.
+    """
+    if func == "random":
+        # A random pick is only certain when every input agrees
+        if values and all(value is values[0] for value in values):
+            return values[0]
+        return None
+    if func == "copy":
+        return values[0] if values else False
+    if func in ("true", "false"):
+        return func == "true"
+    healthy = sum(value is True for value in values)
+    unknown = sum(value is None for value in values)
+    outcomes = {
+        bool(evaluate(func, [True] * count + [False] * (len(values) - count)))
+        for count in range(healthy, healthy + unknown + 1)
+    }
+    return outcomes.pop() if len(outcomes) == 1 else None
+
+
+def evaluate_tree_partial(tree, values):
+    """Three-valued counterpart of evaluate_tree: None stands for unknown."""
+    node_type = tree[0]
+    if node_type == "COND":
+        return evaluate_condition_partial(tree[1], [values[p] for p in tree[3]])
+    left = evaluate_tree_partial(tree[1], values)
+    right = evaluate_tree_partial(tree[2], values)
+    if node_type == "AND":
+        if left is False or right is False:
+            return False
+        return True if left is True and right is True else None
+    elif node_type == "OR":
+        if left is True or right is True:
+            return True
+        return False if left is False and right is False else None
+    else:
+        raise ValueError("Unknown tree node type: " + str(node_type))
+
+
+def find_constants(compiled):
+    """
+    Nodes whose value is the same from some step on whatever the starting
+    state, e.g. true/false functions and anything they fully determine.
+    Returns {node: value} and {node: first step with that value}.
+    """
+    constants = {}
+    settle = {}
+    candidates = range(compiled.size())
+    step = 0
+    while candidates:
+        step += 1
+        # Synchronous update: decide against the constants of the last step
+        known = dict(constants)
+        decided = {}
+        for node in candidates:
+            if node in known:
+                continue
+            values = [known.get(j) for j in compiled.inputs[node]]
+            value = evaluate_tree_partial(compiled.node_trees[node], values)
+            if value is not None:
+                decided[node] = value
+        constants.update(decided)
+        settle.update((node, step) for node in decided)
+        candidates = {i for node in decided for i in compiled.dependents[node]}
+    return constants, settle
+
+
+def follows_single_input(compiled, node, source, constants):
+    """True if, given the constants, node takes on the previous value of source."""
+    for value in (True, False):
+        values = [
+            value if j == source else constants.get(j) for j in compiled.inputs[node]
+        ]
+        if evaluate_tree_partial(compiled.node_trees[node], values) is not value:
+            return False
+    return True
+
+
+def find_frozen(compiled, constants):
+    """
+    Nodes that only read themselves (besides constants) and copy their own
+    value, so they keep their starting value forever, like a `copy` node
+    with a `1 to self` edge.
+    """
+    frozen = []
+    for node in range(compiled.size()):
+        if node in constants:
+            continue
+        sources = {j for j in compiled.inputs[node] if j not in constants}
+        if sources == {node} and follows_single_input(compiled, node, node, constants):
+            frozen.append(node)
+    return frozen
+
+
+def read_by_type(compiled, node):
+    """True if a node reading `node` picks its inputs by type."""
+    return any(
+        is_typed(parse_function(compiled.definitions[reader]))
+        for reader in compiled.dependents[node]
+    )
+
+
+def find_aliases(compiled, constants, frozen):
+    """
+    Copy chains hanging off frozen nodes: a node that copies a frozen node
+    (or another such copy) holds the frozen node's value from some step on.
+    Across types this needs every reader to ignore input types. Returns
+    {node: frozen node} and the step it settles.
+    """
+    aliases = {node: node for node in frozen}
+    settle = {node: 0 for node in frozen}
+    candidates = {i for node in frozen for i in compiled.dependents[node]}
+    while candidates:
+        added = []
+        for node in candidates:
+            if node in aliases or node in constants:
+                continue
+            sources = {j for j in compiled.inputs[node] if j not in constants}
+            if len(sources) != 1:
+                continue
+            source = sources.pop()
+            if (
+                source in aliases
+                and (
+                    compiled.node_types[aliases[source]] == compiled.node_types[node]
+                    or not read_by_type(compiled, node)
+                )
+                and follows_single_input(compiled, node, source, constants)
+            ):
+                aliases[node] = aliases[source]
+                settle[node] = settle[source] + 1
+                added.append(node)
+        candidates = {i for node in added for i in compiled.dependents[node]}
+    for node in frozen:
+        del aliases[node]
+        del settle[node]
+    return aliases, settle
+
+
+def observed_closure(compiled, observed_types):
+    """Nodes of the observed types and every node they read, transitively."""
+    if observed_types is None:
+        return set(range(compiled.size()))
+    observed_types = set(observed_types)
+    keep = {
+        node
+        for node, node_type in enumerate(compiled.node_types)
+        if node_type in observed_types
+    }
+    stack = list(keep)
+    while stack:
+        for j in compiled.inputs[stack.pop()]:
+            if j not in keep:
+                keep.add(j)
+                stack.append(j)
+    return keep
+
+
+class SimplifiedNetwork:
+    """
+    Smaller network equivalent to a compiled network from step
+    `settle_steps` on. Constant nodes are replaced by one node per type and
+    value, nodes that copy a frozen node read it directly, and nodes no
+    observed type depends on are dropped. `kept[i]` is the original node of
+    node i of `network`.
+    """
+
+    def __init__(self, original, observed_types=None):
+        self.original = original
+        self.constants, constant_settle = find_constants(original)
+        self.frozen = find_frozen(original, self.constants)
+        self.aliases, alias_settle = find_aliases(original, self.constants, self.frozen)
+        self.settle_steps = max(
+            list(constant_settle.values()) + list(alias_settle.values()), default=0
+        )
+        observed = observed_closure(original, observed_types)
+        self.pruned = set(range(original.size())) - observed
+        self.kept = [
+            node
+            for node in range(original.size())
+            if node in observed
+            and node not in self.constants
+            and node not in self.aliases
+        ]
+        self.network = self._build()
+
+    def _build(self):
+        original = self.original
+        position = {node: i for i, node in enumerate(self.kept)}
+        inputs = []
+        # Constants of the same type and value share one node, appended after
+        # the kept nodes, which keeps typed conditions reading the same
+        # positions
+        constant_nodes = {}
+        for node in self.kept:
+            node_inputs = []
+            for j in original.inputs[node]:
+                if j in self.constants:
+                    key = (original.node_types[j], self.constants[j])
+                    constant_nodes.setdefault(key, len(self.kept) + len(constant_nodes))
+                    node_inputs.append(constant_nodes[key])
+                else:
+                    node_inputs.append(position[self.aliases.get(j, j)])
+            inputs.append(node_inputs)
+        self.constant_values = [value for _, value in constant_nodes]
+        return CompiledNetwork(
+            [original.names[node] for node in self.kept]
+            + [
+                f"{node_type} always {'healthy' if value else 'failed'}"
+                for node_type, value in constant_nodes
+            ],
+            [original.node_types[node] for node in self.kept]
+            + [node_type for node_type, _ in constant_nodes],
+            inputs + [[] for _ in constant_nodes],
+            [original.definitions[node] for node in self.kept]
+            + ["true" if value else "false" for _, value in constant_nodes],
+        )
+
+    def reduce_state(self, state):
+        """State of the simplified network for a state of the original one."""
+        return [state[node] for node in self.kept] + self.constant_values
+
+    def expand_state(self, reduced):
+        """
+        State of the original network, by node, for a state of the
+        simplified one once it has settled. Dropped nodes are None.
+        """
+        state = [None] * self.original.size()
+        for node, value in zip(self.kept, reduced):
+            state[node] = value
+        for node, value in self.constants.items():
+            state[node] = value
+        for node, source in self.aliases.items():
+            state[node] = state[source]
+        for node in self.pruned:
+            state[node] = None
+        return state
+
+    def to_dict(self, reduced):
+        return {
+            name: value
+            for name, value in zip(self.original.names, self.expand_state(reduced))
+            if value is not None
+        }
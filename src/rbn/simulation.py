@@ -0,0 +1,708 @@
+import contextlib
+import signal
+
+import numpy as np
+
+from .attractor_atlas import DEFAULT_ATLAS_DIRECTORY, write_attractor_atlas
+from .attractor_graph import AttractorGraph
+from .attractors import Attractors, is_total_outage
+from .compiler import encode_state
+from .failures import (
+    collapse_failure_sets,
+    count_failure_sets,
+    enumerate_failure_sets,
+    failure_mask,
+    impact_biases,
+    initialise_node_states,
+    sample_failure_sets,
+    TypeStratifiedSampler,
+)
+from .result_graph import AbstractResultGraph
+from .result_text import AbstractResultText
+from .trajectory_cache import Trajectory, TrajectoryCache
+from .trajectory_recorder import TrajectoryRecorder
+
+# Maximum number of states remembered across runs
+DEFAULT_CACHE_SIZE = 100000
+
+# Orbit weights are held as int64
+MAX_WEIGHT = np.iinfo(np.int64).max
+
+# Runs drawn at a time when run counts follow a target interval width
+DEFAULT_BATCH_RUNS = 200
+
+# Two-sided 95% quantile of the normal distribution
+Z_95 = 1.959964
+
+# How sampled stages draw their failure sets
+SAMPLING_METHODS = ("uniform", "stratified", "importance")
+
+
+def calculate_average_health_by_type(node_names, node_health):
+    # Group and calculate average health by node type
+    type_health_stats = {}
+    for node, health in zip(node_names, node_health):
+        node_type = " ".join(node.split()[:-1])  # Extract node type from instance name
+        if node_type not in type_health_stats:
+            type_health_stats[node_type] = []
+        type_health_stats[node_type].append(health)
+    average_type_health = {
+        node_type: np.mean(healths) for node_type, healths in type_health_stats.items()
+    }
+    return average_type_health
+
+
+def record_result_as_subgraph(average_type_health, network, result_graph, stage):
+    result_graph.add_subgraph(stage)
+    # Add nodes with HTML-style labels including health and instance count
+    for node_id, label in network.get_node_name_to_type_map():
+        # Find the instance count by matching the full label
+        instance_count = network.get_node_type_instance_count(label)
+        health = average_type_health.get(label, 0.5)  # Default health if not found
+        result_graph.add_node(node_id, stage, label, health, instance_count)
+    # Add edges with prefixed node names
+    for edge in network.edges():
+        result_graph.add_edge(edge, stage)
+
+
+class HealthInterval:
+    """
+    Weighted sums of the average health of each type over the runs of a
+    stage, for a 95% confidence interval on every type's health.
+    """
+
+    def __init__(self, node_types):
+        self.types, self.type_index = np.unique(node_types, return_inverse=True)
+        self.instances = np.bincount(self.type_index)
+        self.weight = 0
+        self.squared_weight = 0
+        self.sum = np.zeros(len(self.types))
+        self.sum_squares = np.zeros(len(self.types))
+
+    def add(self, states, weight, ratio=1):
+        """
+        Add `weight` identical runs, each reweighted by the likelihood ratio
+        of its failure set.
+        """
+        health = (
+            np.bincount(self.type_index, weights=states, minlength=len(self.types))
+            / self.instances
+        )
+        self.weight += weight * ratio
+        self.squared_weight += weight * ratio * ratio
+        self.sum += weight * ratio * health
+        self.sum_squares += weight * ratio * health * health
+
+    def widths(self):
+        """Width of the interval on each type's health."""
+        # Unequal ratios make the runs worth fewer unweighted ones
+        effective_runs = self.weight**2 / self.squared_weight if self.weight else 0
+        if effective_runs < 2:
+            return np.full(len(self.types), np.inf)
+        mean = self.sum / self.weight
+        variance = np.maximum(self.sum_squares / self.weight - mean * mean, 0)
+        variance *= effective_runs / (effective_runs - 1)
+        return 2 * Z_95 * np.sqrt(variance / effective_runs)
+
+    def add_sums(self, other):
+        self.weight += other.weight
+        self.squared_weight += other.squared_weight
+        self.sum += other.sum
+        self.sum_squares += other.sum_squares
+
+
+class BatchTotals:
+    """
+    Sums over the runs of a batch of failure sets, weighted by the runs each
+    set stands for. The totals of the batches of a stage add up to the
+    totals of the stage, wherever the batches were simulated.
+    """
+
+    def __init__(self, size, node_types=None):
+        self.node_health = np.zeros(size)
+        self.runs = 0
+        self.weight = 0
+        self.on_states = 0
+        self.evaluations = 0
+        self.with_attractor = 0
+        self.no_attractor = 0
+        self.interval = None
+        if node_types is not None:
+            self.interval = HealthInterval(node_types)
+
+    def add_run(self, states, weight, on_states, evaluations, attractor_found):
+        self.node_health += weight * np.array(states)
+        self.on_states += weight * on_states
+        self.evaluations += weight * evaluations
+        self.weight += weight
+        if attractor_found:
+            self.with_attractor += weight
+        else:
+            self.no_attractor += weight
+
+    def add(self, other):
+        self.node_health += other.node_health
+        self.runs += other.runs
+        self.weight += other.weight
+        self.on_states += other.on_states
+        self.evaluations += other.evaluations
+        self.with_attractor += other.with_attractor
+        self.no_attractor += other.no_attractor
+        if self.interval is not None:
+            self.interval.add_sums(other.interval)
+
+
+class Simulation:
+    def __init__(
+        self,
+        num_stages,
+        num_runs,
+        num_steps,
+        seed=None,
+        cache_size=DEFAULT_CACHE_SIZE,
+        record_path=None,
+        symmetry=True,
+        target_width=None,
+        max_runs=None,
+        batch_runs=DEFAULT_BATCH_RUNS,
+        sampling="uniform",
+        importance_strength=1.0,
+        coordinator=None,
+    ):
+        """
+        With a target_width, sampled stages are run batch_runs runs at a time
+        until the 95% confidence interval on every type's average health is
+        at most that wide, or max_runs runs (by default ten times num_runs)
+        have been made. Stages that can be covered by at most max_runs
+        failure sets are simulated exhaustively as usual.
+
+        Sampled stages draw failure sets uniformly by default. "stratified"
+        spreads the runs evenly over how many instances of each type fail,
+        and "importance" also favours the types more nodes depend on, by
+        impact_biases with the given strength, weighting every run by its
+        likelihood ratio so that the results still estimate uniform
+        failures.
+
+        With a coordinator (see rbn.distributed) the runs are simulated by
+        the workers connected to it instead of in this process.
+        """
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"Unknown sampling method: {sampling}")
+        if coordinator is not None and record_path is not None:
+            raise ValueError("Runs simulated by workers cannot be recorded")
+        self.num_stages = num_stages
+        self.num_runs_per_stage = num_runs
+        self.target_width = target_width
+        self.max_runs = max_runs if max_runs is not None else 10 * num_runs
+        self.batch_runs = batch_runs
+        self.num_steps_per_run = num_steps
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.cache_size = cache_size
+        self.trajectory_cache = None
+        self.record_path = record_path
+        self.use_symmetry = symmetry
+        self.sampling = sampling
+        self.importance_strength = importance_strength
+        self.sampler = None
+        self.coordinator = coordinator
+        self.stop_requested = False
+        # Stages summarized by the last run, fewer than num_stages if stopped
+        self.stages_run = 0
+
+    def stop(self):
+        """
+        Ask a running simulation to stop after the run in progress (with a
+        coordinator, the batch in progress), summarize what it has and
+        finish as if those were all its stages.
+        """
+        self.stop_requested = True
+
+    def prepare(self, network):
+        """
+        Compile the network and set up what runs share. Returns (compiled,
+        reduction, symmetry).
+        """
+        compiled = network.compile()
+        reduction = network.get_type_reduction()
+
+        # Symmetric starting states lead to symmetric trajectories, so one
+        # run can stand for all of them. Recordings keep every run as is.
+        symmetry = None
+        if self.use_symmetry and self.record_path is None and not compiled.stochastic:
+            symmetry = network.get_symmetry() or None
+
+        # Runs share what earlier runs learned about where states lead, which
+        # only holds when the network is deterministic
+        self.trajectory_cache = None
+        if self.cache_size > 0 and not compiled.stochastic:
+            self.trajectory_cache = TrajectoryCache(self.cache_size)
+
+        self.sampler = None
+        if self.sampling != "uniform":
+            biases = None
+            if self.sampling == "importance":
+                biases = impact_biases(
+                    compiled.node_types,
+                    compiled.dependents,
+                    self.importance_strength,
+                )
+            self.sampler = TypeStratifiedSampler(compiled.node_types, biases)
+        return compiled, reduction, symmetry
+
+    def run(
+        self,
+        network,
+        result_graph=AbstractResultGraph(),
+        result_text=AbstractResultText(),
+    ):
+        compiled, reduction, symmetry = self.prepare(network)
+        if self.coordinator is not None:
+            self.coordinator.begin(
+                {
+                    "num_steps": self.num_steps_per_run,
+                    "cache_size": self.cache_size,
+                    "symmetry": symmetry is not None,
+                    "seed": self.seed,
+                }
+            )
+
+        recorder = None
+        if self.record_path is not None:
+            max_runs = self.num_stages * self.stage_run_limit()
+            recorder = TrajectoryRecorder(
+                self.record_path,
+                compiled.names,
+                max_runs,
+                max_runs * (self.num_steps_per_run + 1),
+            )
+
+        attractors = Attractors()
+        self.stop_requested = False
+        self.stages_run = 0
+        total_on_states = 0
+        total_evaluations = 0
+        runs_with_attractor = 0
+        runs_no_attractor = 0
+
+        for stage in range(self.num_stages):
+            # Sums over the stage, weighted by the runs each set stands for
+            tracked_types = None
+            if self.target_width is not None:
+                tracked_types = compiled.node_types
+            totals = BatchTotals(compiled.size(), tracked_types)
+
+            runs = self.num_runs_per_stage
+            if self.target_width is not None:
+                runs = min(self.batch_runs, self.max_runs)
+            result_text.start_stage(stage)
+
+            def progress(batch_runs):
+                result_text.print_progress(
+                    totals.runs + batch_runs, expected_runs, attractors.count()
+                )
+
+            while True:
+                failure_sets, weights, events, exhaustive = self.failure_sets_for_stage(
+                    compiled, symmetry, stage, runs, self.stage_run_limit()
+                )
+                # Uniform sampling leaves weights as whole run counts
+                ratios = None
+                if self.sampler is not None and not exhaustive:
+                    ratios = self.sampler.likelihood_ratios(failure_sets)
+                batch = (failure_sets, weights, events, ratios)
+                expected_runs = totals.runs + int(weights.sum())
+                if self.target_width is not None and not exhaustive:
+                    expected_runs = self.max_runs
+                if self.coordinator is None:
+                    totals.add(
+                        self.run_batch(
+                            attractors,
+                            compiled,
+                            reduction,
+                            symmetry,
+                            stage,
+                            batch,
+                            tracked_types,
+                            recorder,
+                            progress,
+                        )
+                    )
+                else:
+                    batch_totals = self.coordinator.run_batch(
+                        attractors,
+                        stage,
+                        batch,
+                        tracked_types,
+                        progress,
+                        lambda: self.stop_requested,
+                    )
+                    if batch_totals is not None:
+                        totals.add(batch_totals)
+
+                # Exhaustive stages are exact; sampled ones take another
+                # batch while some type's interval is still too wide
+                if self.stop_requested:
+                    # What the stage has so far is a sample like any other
+                    exhaustive = False
+                    break
+                if self.target_width is None or exhaustive:
+                    break
+                remaining = self.max_runs - totals.runs
+                if (
+                    remaining <= 0
+                    or totals.interval.widths().max() <= self.target_width
+                ):
+                    break
+                runs = min(self.batch_runs, remaining)
+
+            if totals.weight == 0:
+                # Stopped before the stage's first run
+                result_text.print_interrupted(self.stages_run, self.num_stages)
+                break
+            # Every stage counts as num_runs runs, however many failure sets
+            # its weights add up to
+            scale = self.num_runs_per_stage / totals.weight
+            total_on_states += scale * totals.on_states
+            total_evaluations += scale * totals.evaluations
+            runs_with_attractor += scale * totals.with_attractor
+            runs_no_attractor += scale * totals.no_attractor
+
+            # Calculate average health for this stage
+            average_type_health = calculate_average_health_by_type(
+                compiled.names, totals.node_health / totals.weight
+            )
+            outage = sum(
+                share
+                for attractor, share in attractors.end_stage(totals.weight).items()
+                if is_total_outage(attractor)
+            )
+
+            if exhaustive or (self.target_width is None and not self.stop_requested):
+                result_text.print_stage_summary(
+                    stage, average_type_health, exhaustive, outage=outage
+                )
+            else:
+                width = None
+                if totals.interval is not None:
+                    width = totals.interval.widths().max()
+                result_text.print_stage_summary(
+                    stage,
+                    average_type_health,
+                    runs=totals.runs,
+                    width=width,
+                    outage=outage,
+                )
+            record_result_as_subgraph(average_type_health, network, result_graph, stage)
+            self.stages_run += 1
+            if self.stop_requested:
+                result_text.print_interrupted(self.stages_run, self.num_stages)
+                break
+
+        if recorder is not None:
+            recorder.close()
+
+        p = total_on_states / total_evaluations if total_evaluations > 0 else 0
+        report_attractors(
+            attractors,
+            network,
+            result_graph,
+            result_text,
+            runs_with_attractor,
+            runs_no_attractor,
+            p,
+        )
+        return p, attractors.count()
+
+    def parameters(self):
+        """The settings that determine the results, given the network."""
+        return {
+            "num_stages": self.num_stages,
+            "num_runs": self.num_runs_per_stage,
+            "num_steps": self.num_steps_per_run,
+            "seed": self.seed,
+            "symmetry": self.use_symmetry,
+            "target_width": self.target_width,
+            "max_runs": self.max_runs,
+            "batch_runs": self.batch_runs,
+            "sampling": self.sampling,
+            "importance_strength": self.importance_strength,
+        }
+
+    def run_batch(
+        self,
+        attractors,
+        compiled,
+        reduction,
+        symmetry,
+        stage,
+        batch,
+        tracked_types=None,
+        recorder=None,
+        progress=None,
+    ):
+        """
+        Simulate a batch of (failure sets, weights, events, likelihood ratios
+        or None) and return its BatchTotals, recording attractors in
+        `attractors`. progress, if given, is called with the number of runs
+        done after each failure set. A stop request ends the batch early.
+        """
+        failure_sets, weights, events, ratios = batch
+        healthy_state = compiled.healthy_state()
+        totals = BatchTotals(compiled.size(), tracked_types)
+        if ratios is None:
+            ratios = np.ones(len(failure_sets))
+            weighted = False
+        else:
+            weighted = True
+        for failure_set, weight, event_count, ratio in zip(
+            failure_sets, weights.tolist(), events.tolist(), ratios.tolist()
+        ):
+            if self.stop_requested:
+                break
+            states = initialise_node_states(healthy_state, failure_set).tolist()
+            triggering_event = failure_mask(failure_set)
+            (
+                states,
+                on_states,
+                evaluations,
+                attractor_found,
+                codes,
+            ) = self.run_single_simulation(
+                attractors,
+                compiled,
+                reduction,
+                symmetry,
+                states,
+                triggering_event,
+                event_count,
+                weight * ratio,
+            )
+            totals.runs += weight
+            if totals.interval is not None:
+                totals.interval.add(states, weight, ratio)
+            if weighted:
+                weight *= ratio
+            if recorder is not None:
+                recorder.record_run(
+                    stage, triggering_event, weight, codes, attractor_found
+                )
+            totals.add_run(states, weight, on_states, evaluations, attractor_found)
+            if progress is not None:
+                progress(totals.runs)
+        return totals
+
+    def stage_run_limit(self):
+        """Most runs a single stage can take."""
+        if self.target_width is None:
+            return self.num_runs_per_stage
+        return self.max_runs
+
+    def failure_sets_for_stage(self, compiled, symmetry, stage, runs=None, limit=None):
+        """
+        Return (failure sets, weights, events, exhaustive), where events is
+        the number of distinct failure sets each run stands for, or with
+        sampled orbits, the masks of those sets. When there
+        are no more distinct failure sets than `limit` (by default `runs`),
+        every set (or with symmetry, every orbit of sets) is simulated
+        exactly once instead of sampling `runs` of them.
+        """
+        n = compiled.size()
+        if runs is None:
+            runs = self.num_runs_per_stage
+        if limit is None:
+            limit = runs
+        if compiled.stochastic:
+            # Identical starting states can still end up in different places
+            failure_sets = self.sample_failure_sets(n, stage, runs)
+            ones = np.ones(len(failure_sets), dtype=np.int64)
+            return failure_sets, ones, ones, False
+        if count_failure_sets(n, stage) <= limit:
+            failure_sets = enumerate_failure_sets(n, stage)
+            ones = np.ones(len(failure_sets), dtype=np.int64)
+            return failure_sets, ones, ones, True
+        if symmetry is not None:
+            failures = min(n, stage)
+            if (
+                count_failure_sets(n, failures) <= MAX_WEIGHT
+                and symmetry.count_failure_orbits(failures) <= limit
+            ):
+                failure_sets, weights = symmetry.enumerate_failure_orbits(failures)
+                return failure_sets, weights, weights, True
+            failure_sets, weights, events = symmetry.collapse_failure_sets(
+                self.sample_failure_sets(n, stage, runs)
+            )
+            return failure_sets, weights, events, False
+        failure_sets, weights = collapse_failure_sets(
+            self.sample_failure_sets(n, stage, runs)
+        )
+        return failure_sets, weights, np.ones(len(failure_sets), dtype=np.int64), False
+
+    def sample_failure_sets(self, n, failures, runs):
+        if self.sampler is None:
+            return sample_failure_sets(n, failures, runs, self.rng)
+        return self.sampler.sample(failures, runs, self.rng)
+
+    def run_single_simulation(
+        self,
+        attractors,
+        compiled,
+        reduction,
+        symmetry,
+        states,
+        triggering_event,
+        events=1,
+        weight=1,
+    ):
+        # History of normalized states, as codes of the type reduction
+        state_history = []
+        # cumulative_on[t] is the number of healthy nodes summed over steps 1..t
+        cumulative_on = [0]
+        # With symmetry, codes are of the canonical representatives so runs
+        # can join the trajectory of any symmetric state
+        codes = []
+        code = encode_state(states)
+        if symmetry is not None:
+            code = symmetry.canonical_code(code)
+            healthy_counts = symmetry.healthy_counts(states)
+        initial_code = code
+        current_on_states = sum(states)
+        changed = None
+        current_state = reduction.reduce(states, rng=self.rng)
+        trajectory = None
+        for step in range(1, self.num_steps_per_run + 1):
+            changed = compiled.step_incremental(states, changed, self.rng)
+            for node in changed:
+                current_on_states += 1 if states[node] else -1
+                if symmetry is None:
+                    code ^= 1 << node
+                else:
+                    code ^= symmetry.toggle(node, states[node], healthy_counts)
+            cumulative_on.append(cumulative_on[-1] + current_on_states)
+            codes.append(code)
+
+            # Compute normalized state (or attractor key)
+            current_state = reduction.reduce(states, current_state, changed, self.rng)
+
+            if current_state in state_history:
+                attractor_index = state_history.index(current_state)
+                trajectory = Trajectory(
+                    state_history, attractor_index, cumulative_on, codes, states
+                )
+                break
+
+            state_history.append(current_state)
+            trajectory = self.join_known_trajectory(
+                code, state_history, cumulative_on, codes, step
+            )
+            if trajectory is not None:
+                break
+
+        if trajectory is None:
+            evaluations = (len(cumulative_on) - 1) * len(states)
+            return states, cumulative_on[-1], evaluations, False, [initial_code] + codes
+
+        if self.trajectory_cache is not None:
+            self.trajectory_cache.record(trajectory)
+        attractors.update_attractor_counts(
+            [reduction.to_frozenset(code) for code in trajectory.attractor_sequence()],
+            triggering_event,
+            events,
+            weight,
+        )
+        evaluations = trajectory.steps() * len(states)
+        return (
+            trajectory.final_state,
+            trajectory.cumulative_on[-1],
+            evaluations,
+            True,
+            [initial_code] + trajectory.codes,
+        )
+
+    def join_known_trajectory(self, code, state_history, cumulative_on, codes, step):
+        """
+        If the current state was seen in an earlier run, return this run's
+        trajectory with the rest taken from that run, provided the result is
+        the same as simulating on would give.
+        """
+        if self.trajectory_cache is None:
+            return None
+        entry = self.trajectory_cache.lookup(code)
+        if entry is None:
+            return None
+        known, position = entry
+        if step + known.steps() - position > self.num_steps_per_run:
+            return None
+        if not known.joins_without_repeat(position, set(state_history)):
+            return None
+        self.trajectory_cache.hits += 1
+        return known.extend(state_history, cumulative_on, codes, position)
+
+
+@contextlib.contextmanager
+def stop_on_signals(simulation, signals=(signal.SIGINT, signal.SIGTERM)):
+    """
+    Within the block, the first of the signals asks the simulation to stop
+    with what it has. The previous handlers are back from then on, so a
+    second signal interrupts at once.
+    """
+    previous = {signum: signal.getsignal(signum) for signum in signals}
+
+    def restore():
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+    def handle(signum, frame):
+        restore()
+        simulation.stop()
+
+    for signum in signals:
+        signal.signal(signum, handle)
+    try:
+        yield
+    finally:
+        restore()
+
+
+def report_attractors(
+    attractors,
+    network,
+    result_graph,
+    result_text,
+    runs_with_attractor,
+    runs_no_attractor,
+    p,
+):
+    n = network.get_n()
+    k = network.get_average_k()
+    max_k = network.get_max_k()
+
+    result_text.print_attractor_summary(
+        attractors, runs_with_attractor, runs_no_attractor
+    )
+    result_text.print_kauffman_parameters(k, max_k, n, p)
+
+    if attractors.count() < 20:
+        print("Creating attractor graph")
+        create_attractor_graph(attractors, network, k, max_k, n, p)
+    else:
+        # One graph holding every attractor would take dot too long to lay out
+        print(f"Creating attractor atlas in {DEFAULT_ATLAS_DIRECTORY}/")
+        write_attractor_atlas(
+            attractors, network, DEFAULT_ATLAS_DIRECTORY, k, max_k, n, p
+        )
+    result_graph.add_info_box(k, max_k, n, p)
+
+
+def create_attractor_graph(attractors, network, k, max_k, n, p):
+    attractor_graph = AttractorGraph(
+        network, attractors.total_runs(), "attractors_graph.dot"
+    )
+
+    for attractor, count in attractors.items():
+        attractor_id = attractors.get_hash(attractor)
+        attractor_graph.add_attractor(attractor, attractor_id, count)
+
+    attractor_graph.add_incidence_matrix(attractors)
+    attractor_graph.add_info_box(k, max_k, n, p)
+    attractor_graph.write()
@@ -0,0 +1,239 @@
+import itertools
+import math
+
+import numpy as np
+
+from .failures import failure_mask
+
+
+def tree_leaves(tree):
+    if tree[0] == "COND":
+        yield tree
+    else:
+        yield from tree_leaves(tree[1])
+        yield from tree_leaves(tree[2])
+
+
+def position_classes(tree, num_inputs):
+    """
+    Label each input position of a compiled tree so that positions with the
+    same label can be permuted without changing the function: they are read
+    by the same conditions, and none of them is the input a copy reads.
+    """
+    leaves = list(tree_leaves(tree))
+    labels = []
+    for position in range(num_inputs):
+        label = []
+        for leaf in leaves:
+            positions = leaf[3]
+            if leaf[1] == "copy" and positions and positions[0] == position:
+                label.append(("copy", position))
+            else:
+                label.append(position in positions)
+        labels.append(tuple(label))
+    return labels
+
+
+def same_up_to_classes(labels, a, b):
+    """True if lists a and b differ only by permutations within position classes."""
+    grouped_a = {}
+    grouped_b = {}
+    for label, x, y in zip(labels, a, b):
+        grouped_a.setdefault(label, []).append(x)
+        grouped_b.setdefault(label, []).append(y)
+    return all(
+        sorted(grouped_a[label]) == sorted(grouped_b[label]) for label in grouped_a
+    )
+
+
+class InstanceSymmetry:
+    """
+    Classes of interchangeable nodes: any permutation of the nodes within a
+    class maps the network onto itself and leaves the type reduction
+    unchanged, so states that differ by such a permutation have the same
+    future up to that permutation. The canonical representative of a state
+    has the healthy nodes of each class at its end.
+    """
+
+    def __init__(self, size, classes):
+        self.size = size
+        self.classes = [sorted(members) for members in classes if len(members) > 1]
+        self.node_class = [-1] * size
+        for c, members in enumerate(self.classes):
+            for node in members:
+                self.node_class[node] = c
+        self.singletons = [node for node in range(size) if self.node_class[node] < 0]
+        self.class_masks = [
+            sum(1 << node for node in members) for members in self.classes
+        ]
+        # healthy_masks[c][h] has the last h nodes of class c set
+        self.healthy_masks = [
+            list(
+                itertools.accumulate(
+                    reversed(members), lambda m, n: m | 1 << n, initial=0
+                )
+            )
+            for members in self.classes
+        ]
+
+    def __bool__(self):
+        return bool(self.classes)
+
+    def healthy_counts(self, state):
+        return [sum(state[node] for node in members) for members in self.classes]
+
+    def canonical_code(self, code):
+        for members, mask, healthy in zip(
+            self.classes, self.class_masks, self.healthy_masks
+        ):
+            code = code & ~mask | healthy[(code & mask).bit_count()]
+        return code
+
+    def toggle(self, node, healthy, counts):
+        """
+        Bit to flip in a canonical code when `node` has just become healthy
+        (or failed), keeping counts, the healthy nodes per class, up to date.
+        """
+        c = self.node_class[node]
+        if c < 0:
+            return 1 << node
+        members = self.classes[c]
+        if healthy:
+            counts[c] += 1
+            return 1 << members[len(members) - counts[c]]
+        counts[c] -= 1
+        return 1 << members[len(members) - 1 - counts[c]]
+
+    def count_failure_orbits(self, failures):
+        """Number of distinct failure sets of that size up to symmetry."""
+        # Coefficient of x^failures in (1 + x)^singletons * prod(1 + ... + x^|c|)
+        counts = [math.comb(len(self.singletons), j) for j in range(failures + 1)]
+        for members in self.classes:
+            counts = [
+                sum(counts[j - i] for i in range(min(j, len(members)) + 1))
+                for j in range(failures + 1)
+            ]
+        return counts[failures]
+
+    def enumerate_failure_orbits(self, failures):
+        """
+        One failure set per orbit, failing the first nodes of each class, and
+        the number of failure sets in its orbit.
+        """
+        sets = []
+        weights = []
+        for split in self._class_failure_splits(0, failures):
+            failed = [
+                node
+                for members, count in zip(self.classes, split)
+                for node in members[:count]
+            ]
+            weight = math.prod(
+                math.comb(len(members), count)
+                for members, count in zip(self.classes, split)
+            )
+            for rest in itertools.combinations(self.singletons, failures - sum(split)):
+                sets.append(sorted(failed + list(rest)))
+                weights.append(weight)
+        return (
+            np.array(sets, dtype=np.intp).reshape(len(sets), failures),
+            np.array(weights, dtype=np.int64),
+        )
+
+    def _class_failure_splits(self, c, failures):
+        if c == len(self.classes):
+            if failures <= len(self.singletons):
+                yield ()
+            return
+        for count in range(min(failures, len(self.classes[c])) + 1):
+            for rest in self._class_failure_splits(c + 1, failures - count):
+                yield (count,) + rest
+
+    def canonical_failure_sets(self, failure_sets):
+        """Map every row of a (runs, failures) array to its orbit representative."""
+        canonical = np.empty_like(failure_sets)
+        for row, failure_set in enumerate(failure_sets.tolist()):
+            used = {}
+            nodes = []
+            for node in failure_set:
+                c = self.node_class[node]
+                if c < 0:
+                    nodes.append(node)
+                else:
+                    nodes.append(self.classes[c][used.get(c, 0)])
+                    used[c] = used.get(c, 0) + 1
+            canonical[row] = sorted(nodes)
+        return canonical
+
+    def collapse_failure_sets(self, failure_sets):
+        """
+        Merge failure sets in the same orbit into one run each. Returns the
+        representatives, how many of the sampled runs each stands for and
+        the masks of the distinct sampled sets each stands for.
+        """
+        distinct, counts = np.unique(failure_sets, axis=0, return_counts=True)
+        canonical, inverse = np.unique(
+            self.canonical_failure_sets(distinct), axis=0, return_inverse=True
+        )
+        inverse = inverse.reshape(-1)
+        weights = np.bincount(inverse, weights=counts, minlength=len(canonical))
+        members = [[] for _ in range(len(canonical))]
+        for failure_set, orbit in zip(distinct, inverse.tolist()):
+            members[orbit].append(failure_mask(failure_set))
+        events = np.empty(len(canonical), dtype=object)
+        events[:] = [tuple(masks) for masks in members]
+        return canonical, weights.astype(np.int64), events
+
+
+def swap_preserves_network(compiled, group_labels, node_group, u, v):
+    """True if exchanging nodes u and v maps the compiled network onto itself."""
+
+    def swap(j):
+        return v if j == u else u if j == v else j
+
+    for w in {u, v}.union(compiled.dependents[u], compiled.dependents[v]):
+        image = swap(w)
+        if node_group[w] != node_group[image]:
+            return False
+        if not same_up_to_classes(
+            group_labels[node_group[w]],
+            compiled.inputs[image],
+            [swap(j) for j in compiled.inputs[w]],
+        ):
+            return False
+    return True
+
+
+def find_instance_symmetry(compiled, reduction):
+    """
+    Split the instances of each type into classes of interchangeable nodes.
+    Exchanging two nodes is a symmetry when every node reading either of
+    them computes the same function afterwards and the type condition
+    reads both alike; such exchanges compose, so each class can be built by
+    testing a node against one member of every class found so far.
+    """
+    node_group = [0] * compiled.size()
+    group_labels = []
+    for g, group in enumerate(compiled.groups):
+        group_labels.append(position_classes(group.tree, group.inputs.shape[1]))
+        for node in group.nodes.tolist():
+            node_group[node] = g
+
+    classes = []
+    for tree, instances in zip(reduction.trees, reduction.index_lists):
+        labels = position_classes(tree, len(instances))
+        type_classes = []
+        for position, node in enumerate(instances):
+            for members in type_classes:
+                representative, representative_position = members[0]
+                if labels[position] == labels[
+                    representative_position
+                ] and swap_preserves_network(
+                    compiled, group_labels, node_group, representative, node
+                ):
+                    members.append((node, position))
+                    break
+            else:
+                type_classes.append([(node, position)])
+        classes.extend([node for node, _ in members] for members in type_classes)
+    return InstanceSymmetry(compiled.size(), classes)
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+
+
+class Trajectory:
+    """
+    Outcome of a run that reached an attractor. history holds the normalized
+    states after steps 1..m-1; at step m the normalized state repeated
+    history[cycle_start]. cumulative_on[t] is the number of healthy nodes
+    summed over steps 1..t, and codes[t - 1] encodes the raw state after
+    step t.
+    """
+
+    def __init__(self, history, cycle_start, cumulative_on, codes, final_state):
+        self.history = history
+        self.cycle_start = cycle_start
+        self.cumulative_on = cumulative_on
+        self.codes = codes
+        self.final_state = final_state
+
+    def steps(self):
+        return len(self.history) + 1
+
+    def attractor_sequence(self):
+        return self.history[self.cycle_start :]
+
+    def joins_without_repeat(self, position, earlier_states):
+        """
+        True if a run whose normalized history so far is earlier_states and
+        whose raw state now equals this trajectory's state at `position`
+        would retrace the rest of this trajectory: none of the states still
+        ahead may already be in that history.
+        """
+        return earlier_states.isdisjoint(self.history[position:])
+
+    def extend(self, history, cumulative_on, codes, position):
+        """
+        The trajectory of a run with its own history, cumulative_on and codes
+        up to step len(history), whose state then equals this trajectory's
+        state at `position`.
+        """
+        steps = len(history)
+        offset = cumulative_on[steps] - self.cumulative_on[position]
+        return Trajectory(
+            history + self.history[position:],
+            steps + self.cycle_start - position,
+            cumulative_on + [offset + on for on in self.cumulative_on[position + 1 :]],
+            codes + self.codes[position:],
+            self.final_state,
+        )
+
+
+class TrajectoryCache:
+    """
+    Bounded LRU map from an encoded raw state to (trajectory, position): the
+    state was reached after `position` steps of that trajectory, before its
+    attractor cycle had been completed. Runs that reach a cached state can
+    stop and inherit the trajectory's attractor, final state and counts.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, code):
+        entry = self._entries.get(code)
+        if entry is not None:
+            self._entries.move_to_end(code)
+        return entry
+
+    def record(self, trajectory):
+        """
+        Cache the states of a run. Only states up to the start of the cycle
+        are cached, since a run entering the cycle elsewhere completes it at
+        a different state.
+        """
+        for position in range(1, trajectory.cycle_start + 2):
+            code = trajectory.codes[position - 1]
+            self._entries[code] = (trajectory, position)
+            self._entries.move_to_end(code)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
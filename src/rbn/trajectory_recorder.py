@@ -0,0 +1,157 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+INDEX_DTYPE = np.dtype(
+    [
+        ("offset", np.int64),
+        ("length", np.int32),
+        ("stage", np.int32),
+        ("weight", np.float64),
+        ("attractor_found", np.bool_),
+    ]
+)
+
+
+def packed_width(num_nodes):
+    return max(1, (num_nodes + 7) // 8)
+
+
+def codes_to_rows(codes, width):
+    # One allocation per run: every state is packed into a single buffer
+    data = b"".join(code.to_bytes(width, "little") for code in codes)
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(codes), width)
+
+
+def truncate_npy(filename, rows):
+    """
+    Cut the .npy file of an array down to its first rows in place: the
+    shape in the header is rewritten, padded to the header's old length so
+    the data stays where it is, and the file is truncated after the rows.
+    """
+    with open(filename, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            length_format = "<H"
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            length_format = "<I"
+        data_offset = f.tell()
+        prefix_length = len(np.lib.format.magic(*version)) + struct.calcsize(
+            length_format
+        )
+        header_length = data_offset - prefix_length
+        header = repr(
+            {
+                "descr": np.lib.format.dtype_to_descr(dtype),
+                "fortran_order": fortran_order,
+                "shape": (rows,) + shape[1:],
+            }
+        )
+        f.seek(0)
+        f.write(np.lib.format.magic(*version))
+        f.write(struct.pack(length_format, header_length))
+        f.write(header.ljust(header_length - 1).encode("latin1") + b"\n")
+        row_size = dtype.itemsize * int(np.prod(shape[1:]))
+        f.truncate(data_offset + rows * row_size)
+
+
+class TrajectoryRecorder:
+    """
+    Records the raw state of every step of every run into a preallocated,
+    memory-mapped .npy file under `path`. States are packed eight nodes to a
+    byte (node i at bit i % 8 of byte i // 8), the same layout as the
+    integer codes the simulation keeps. An index of run offsets, stage,
+    weight and failure mask is written next to it on close, and the states
+    and masks files are cut down to the runs recorded.
+    """
+
+    def __init__(self, path, node_names, max_runs, max_states):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.node_names = list(node_names)
+        self.width = packed_width(len(self.node_names))
+        self.states = np.lib.format.open_memmap(
+            os.path.join(path, "states.npy"),
+            mode="w+",
+            dtype=np.uint8,
+            shape=(max_states, self.width),
+        )
+        self.masks = np.lib.format.open_memmap(
+            os.path.join(path, "masks.npy"),
+            mode="w+",
+            dtype=np.uint8,
+            shape=(max_runs, self.width),
+        )
+        self.index = np.zeros(max_runs, dtype=INDEX_DTYPE)
+        self.num_runs = 0
+        self.num_states = 0
+
+    def record_run(self, stage, failure_mask, weight, codes, attractor_found):
+        """codes[0] encodes the starting state and codes[t] the state after step t."""
+        if self.num_runs == len(self.index):
+            raise ValueError("Trajectory recorder is out of run capacity")
+        if self.num_states + len(codes) > len(self.states):
+            raise ValueError("Trajectory recorder is out of state capacity")
+        offset = self.num_states
+        self.states[offset : offset + len(codes)] = codes_to_rows(codes, self.width)
+        self.masks[self.num_runs] = codes_to_rows([failure_mask], self.width)[0]
+        self.index[self.num_runs] = (
+            offset,
+            len(codes),
+            stage,
+            weight,
+            attractor_found,
+        )
+        self.num_runs += 1
+        self.num_states += len(codes)
+
+    def close(self):
+        self.states.flush()
+        self.masks.flush()
+        np.save(os.path.join(self.path, "index.npy"), self.index[: self.num_runs])
+        with open(os.path.join(self.path, "nodes.json"), "w", encoding="utf-8") as f:
+            json.dump(self.node_names, f)
+        del self.states
+        del self.masks
+        truncate_npy(os.path.join(self.path, "states.npy"), self.num_states)
+        truncate_npy(os.path.join(self.path, "masks.npy"), self.num_runs)
+
+
+class TrajectoryReader:
+    """Read access to a recording without loading the states into memory."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "nodes.json"), encoding="utf-8") as f:
+            self.node_names = json.load(f)
+        self.index = np.load(os.path.join(path, "index.npy"))
+        self.states = np.load(os.path.join(path, "states.npy"), mmap_mode="r")
+        self.masks = np.load(os.path.join(path, "masks.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.index)
+
+    def runs_for_stage(self, stage):
+        return np.flatnonzero(self.index["stage"] == stage)
+
+    def packed_states(self, run):
+        entry = self.index[run]
+        return self.states[entry["offset"] : entry["offset"] + entry["length"]]
+
+    def run_states(self, run):
+        """(steps + 1, N) boolean array, starting with the initial state."""
+        return np.unpackbits(
+            self.packed_states(run),
+            axis=1,
+            count=len(self.node_names),
+            bitorder="little",
+        ).astype(bool)
+
+    def failure_set(self, run):
+        failed = np.unpackbits(
+            self.masks[run], count=len(self.node_names), bitorder="little"
+        )
+        return np.flatnonzero(failed)
@@ -0,0 +1,108 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from rbn.adjacency import (
+    MUTUAL_EDGE,
+    NO_EDGE,
+    SELF_LOOP,
+    SINGLE_EDGE,
+    Adjacency,
+    instance_adjacency,
+    type_adjacency,
+    write_degree_table,
+    write_edge_table,
+    write_image,
+)
+from rbn.kauffman import KauffmanNetwork
+
+DOT = """
+digraph Test {
+    A [func="or", instances=2];
+    B [func="and", instances=2];
+    C [func="copy"];
+    A -> B [label="1 to n"];
+    B -> A [label="1 to 1"];
+    B -> C [label="1 to n"];
+    C -> C [label="1 to self"];
+}
+"""
+
+
+class TestAdjacency(unittest.TestCase):
+
+    def setUp(self):
+        self.compiled = KauffmanNetwork(DOT).compile()
+
+    def dense(self, adjacency):
+        matrix = np.zeros((adjacency.size(), adjacency.size()), dtype=int)
+        matrix[adjacency.sources, adjacency.targets] = 1
+        return matrix
+
+    def test_matches_dense_matrix(self):
+        adjacency = instance_adjacency(self.compiled)
+        matrix = np.zeros((self.compiled.size(), self.compiled.size()), dtype=int)
+        for node, inputs in enumerate(self.compiled.inputs):
+            matrix[node, inputs] = 1
+        np.testing.assert_array_equal(matrix, self.dense(adjacency))
+        np.testing.assert_array_equal(matrix.sum(axis=1), adjacency.out_degrees())
+        np.testing.assert_array_equal(matrix.sum(axis=0), adjacency.in_degrees())
+
+        image = adjacency.image()
+        for i in range(len(matrix)):
+            for j in range(len(matrix)):
+                if not matrix[i, j]:
+                    expected = NO_EDGE
+                elif i == j:
+                    expected = SELF_LOOP
+                elif matrix[j, i]:
+                    expected = MUTUAL_EDGE
+                else:
+                    expected = SINGLE_EDGE
+                self.assertEqual(expected, image[i, j])
+
+    def test_type_level(self):
+        adjacency = type_adjacency(self.compiled)
+        self.assertEqual(["A", "B", "C"], adjacency.names)
+        self.assertEqual(
+            [[0, 1, 0], [1, 0, 1], [0, 0, 1]], self.dense(adjacency).tolist()
+        )
+        self.assertEqual([1, 1, 0], adjacency.mutual_counts().tolist())
+
+    def test_binned_image_keeps_strongest_category(self):
+        # A single edge and a self-loop fall into the same cell
+        adjacency = Adjacency(["a", "b", "c", "d"], [0, 1, 3], [1, 1, 2])
+        self.assertEqual(
+            [[SELF_LOOP, NO_EDGE], [NO_EDGE, SINGLE_EDGE]],
+            adjacency.image(max_cells=2).tolist(),
+        )
+
+    def test_duplicate_edges_are_merged(self):
+        adjacency = Adjacency(["a", "b"], [0, 0, 1], [1, 1, 0])
+        self.assertEqual([1, 1], adjacency.out_degrees().tolist())
+        self.assertTrue(adjacency.mutual().all())
+
+    def test_writes_files(self):
+        adjacency = instance_adjacency(self.compiled)
+        with tempfile.TemporaryDirectory() as directory:
+            degrees = os.path.join(directory, "degrees.csv")
+            edges = os.path.join(directory, "edges.csv")
+            image = os.path.join(directory, "adjacency.png")
+            write_degree_table(adjacency, degrees, self.compiled.node_types)
+            write_edge_table(adjacency, edges)
+            write_image(adjacency, image)
+
+            with open(degrees, newline="") as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(self.compiled.names, [row["node"] for row in rows])
+            self.assertEqual("True", rows[-1]["self_loop"])
+            with open(edges, newline="") as f:
+                self.assertEqual(len(adjacency.sources), len(list(f)) - 1)
+            self.assertGreater(os.path.getsize(image), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import tempfile
+import unittest
+
+import pygraphviz as pgv
+
+from rbn.attractor_atlas import (
+    attractor_filename,
+    render_file,
+    render_files,
+    type_behaviour,
+    write_attractor_atlas,
+)
+from rbn.kauffman import KauffmanNetwork
+from rbn.result_graph import AbstractResultGraph
+from rbn.result_text import AbstractResultText
+from rbn.results_store import AttractorTable
+from rbn.simulation import report_attractors
+from tests.test_simulation import DOT
+
+TYPES = ["Backend", "Database", "Frontend"]
+
+
+def state(*failed):
+    return tuple((node_type, node_type not in failed) for node_type in TYPES)
+
+
+def table(attractor_states):
+    """Attractors with dominance falling in the order given."""
+    total = sum(range(1, len(attractor_states) + 1))
+    return AttractorTable(
+        (attractor_state, f"A{i}", 1, (len(attractor_states) - i) / total)
+        for i, attractor_state in enumerate(attractor_states)
+    )
+
+
+class TestAttractorAtlas(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.network = KauffmanNetwork(DOT)
+        self.attractors = table(
+            [
+                (state(),),
+                (state("Database"),),
+                (state("Backend", "Database"),),
+                (state("Frontend"), state("Frontend", "Backend")),
+            ]
+        )
+
+    def write(self, **limits):
+        return write_attractor_atlas(
+            self.attractors, self.network, self.directory, 1.0, 1, 11, 0.5, **limits
+        )
+
+    def test_type_behaviour(self):
+        failed, oscillating = type_behaviour(
+            (state("Frontend"), state("Frontend", "Backend")), TYPES
+        )
+        self.assertEqual(failed, ["Frontend"])
+        self.assertEqual(oscillating, ["Backend"])
+
+    def test_one_file_per_attractor(self):
+        paths = self.write()
+        self.assertEqual(os.path.basename(paths[0]), "index.dot")
+        self.assertEqual(
+            [os.path.basename(path) for path in paths[1:]],
+            [attractor_filename(f"A{i}") for i in range(4)],
+        )
+        graph = pgv.AGraph(paths[4])
+        self.assertFalse(graph.is_strict())
+        # Both states of the cycle, each with every network node
+        self.assertEqual(len(graph.subgraphs()[0].subgraphs()), 2)
+
+    def test_index_links_failed_types(self):
+        index = pgv.AGraph(self.write()[0])
+        self.assertEqual(
+            sorted(
+                (a, b, index.get_edge(a, b).attr["label"]) for a, b in index.edges()
+            ),
+            [
+                ("A0", "A1", "Database"),
+                ("A0", "A3", "Frontend"),
+                ("A1", "A2", "Backend"),
+            ],
+        )
+        self.assertEqual(index.get_node("A2").attr["URL"], "attractor_A2.dot")
+        self.assertIn("Oscillating: Backend", index.get_node("A3").attr["label"])
+
+    def test_limits(self):
+        paths = self.write(max_files=2, max_index=3)
+        self.assertEqual(len(paths), 3)
+        index = pgv.AGraph(paths[0])
+        self.assertFalse(index.get_node("A2").attr.get("URL"))
+        self.assertFalse(index.has_node("A3"))
+        self.assertIn("1 less dominant", index.get_node("more").attr["label"])
+
+    def test_stale_files_removed(self):
+        self.write()
+        self.attractors = table([(state(),)])
+        self.write()
+        self.assertEqual(
+            sorted(os.listdir(self.directory)), ["attractor_A0.dot", "index.dot"]
+        )
+
+    def test_render_in_parallel(self):
+        paths = self.write()
+        outputs = render_files(paths, processes=2)
+        self.assertEqual(outputs, [path[:-4] + ".svg" for path in paths])
+        self.assertTrue(all(os.path.getsize(output) for output in outputs))
+
+    def test_rendered_index_links_drawings(self):
+        index = self.write()[0]
+        for output_format in ("svg", "cmapx"):
+            with open(render_file(index, output_format)) as f:
+                drawing = f.read()
+            self.assertIn(f"attractor_A2.{output_format}", drawing)
+            self.assertNotIn("attractor_A2.dot", drawing)
+
+    def test_many_attractors_reported_as_atlas(self):
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.directory)
+        subsets = [
+            [t for j, t in enumerate(TYPES) if mask >> j & 1] for mask in range(8)
+        ]
+        points = [(state(*failed),) for failed in subsets]
+        cycles = [
+            (state(*subsets[a]), state(*subsets[b]))
+            for a in range(8)
+            for b in range(a + 1, 8)
+        ]
+        self.attractors = table(points + cycles[:12])
+        self.assertEqual(self.attractors.count(), 20)
+        report_attractors(
+            self.attractors,
+            self.network,
+            AbstractResultGraph(),
+            AbstractResultText(),
+            100,
+            0,
+            0.5,
+        )
+        self.assertFalse(os.path.exists("attractors_graph.dot"))
+        self.assertEqual(len(os.listdir("attractors")), 21)
+
+
+if __name__ == "__main__":
+    unittest.main()
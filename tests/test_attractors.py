@@ -1,5 +1,5 @@
 import unittest
-from rbn.attractors import split_trailing_integer
+from rbn.attractors import Attractors, is_total_outage, split_trailing_integer
 
 
 class TestAttractors(unittest.TestCase):
@@ -9,6 +9,70 @@ class TestAttractors(unittest.TestCase):
         self.assertEqual(a, "a")
         self.assertEqual(1, one)
 
+    def test_dominance_averages_stage_shares(self):
+        up = (frozenset({("A", True), ("B", True)}),)
+        down = (frozenset({("A", False), ("B", False)}),)
+        attractors = Attractors()
+        attractors.update_attractor_counts(up, 0b01, weight=3)
+        attractors.update_attractor_counts(down, 0b10, weight=1)
+        shares = attractors.end_stage(4)
+        self.assertEqual(0.25, shares[attractors_key(down)])
+        attractors.update_attractor_counts(down, 0b11, weight=0.5)
+        attractors.end_stage(1)
+        self.assertAlmostEqual(0.375, attractors.dominance(attractors_key(up)))
+        self.assertAlmostEqual(0.375, attractors.dominance(attractors_key(down)))
+
+    def test_merge_matches_recording_in_one(self):
+        up = (frozenset({("A", True), ("B", True)}),)
+        down = (frozenset({("A", False), ("B", False)}),)
+        runs = [(up, 0b01, 1), (down, 0b10, 3), (down, 0b11, 1), (up, 0b10, 2)]
+        whole = Attractors()
+        for states, event, events in runs:
+            whole.update_attractor_counts(states, event, events, weight=events)
+        merged = Attractors()
+        for part in (runs[:1], runs[1:]):
+            partial = Attractors()
+            for states, event, events in part:
+                partial.update_attractor_counts(states, event, events, weight=events)
+            merged.merge(partial)
+        self.assertEqual(whole.items(), merged.items())
+        self.assertEqual(whole.end_stage(7), merged.end_stage(7))
+
+    def test_orbit_recorded_again_counts_distinct_events(self):
+        down = (frozenset({("A", False), ("B", False)}),)
+        # Two batches sample the same two sets of one orbit
+        attractors = Attractors()
+        for _ in range(2):
+            attractors.update_attractor_counts(down, 0b0011, (0b0101, 0b0110))
+        self.assertEqual(2, attractors.items()[0][1])
+        # and a third set of it turns up later
+        attractors.update_attractor_counts(down, 0b0011, (0b0101, 0b1001))
+        self.assertEqual(3, attractors.items()[0][1])
+
+        # A whole orbit given by its size counts once per representative
+        attractors = Attractors()
+        for _ in range(2):
+            attractors.update_attractor_counts(down, 0b0011, 4)
+        self.assertEqual(4, attractors.items()[0][1])
+
+        merged = Attractors()
+        for _ in range(2):
+            part = Attractors()
+            part.update_attractor_counts(down, 0b0011, 4)
+            part.update_attractor_counts(down, 0b1100, (0b0101, 0b0110))
+            merged.merge(part)
+        self.assertEqual(6, merged.items()[0][1])
+
+    def test_is_total_outage(self):
+        self.assertTrue(is_total_outage(((("A", False), ("B", False)),)))
+        self.assertFalse(
+            is_total_outage(((("A", False), ("B", False)), (("A", True), ("B", False))))
+        )
+
+
+def attractors_key(states):
+    return tuple(tuple(sorted(state)) for state in states)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,93 @@
+import os
+import unittest
+
+import numpy as np
+
+from rbn.attractors import Attractors
+from rbn.basins import (
+    basin_intervals,
+    estimate_basins,
+    run_to_attractors,
+    wilson_interval,
+)
+from rbn.kauffman import KauffmanNetwork
+from rbn.simulation import Simulation
+from tests.test_simulation import DOT
+
+CYCLIC = os.path.join(os.path.dirname(__file__), "..", "examples", "cyclic.dot")
+
+
+def hashes(attractors):
+    return sorted(
+        (attractors.get_hash(state), count) for state, count in attractors.items()
+    )
+
+
+class TestBasins(unittest.TestCase):
+
+    def check_matches_simulation(self, network, samples=200):
+        compiled = network.compile()
+        reduction = network.get_type_reduction()
+        rng = np.random.default_rng(5)
+        states = rng.random((samples, compiled.size())) < 0.5
+
+        batched = Attractors()
+        resolved = run_to_attractors(
+            compiled, reduction, states, batched, rng, num_steps=20
+        )
+
+        simulation = Simulation(0, 0, 20, cache_size=0, symmetry=False)
+        compiled, reduction, symmetry = simulation.prepare(network)
+        single = Attractors()
+        found = 0
+        for i, state in enumerate(states):
+            _, _, _, attractor_found, _ = simulation.run_single_simulation(
+                single, compiled, reduction, symmetry, state.tolist(), i
+            )
+            found += attractor_found
+        self.assertEqual(resolved, found)
+        self.assertEqual(hashes(batched), hashes(single))
+        return batched
+
+    def test_matches_simulation(self):
+        self.check_matches_simulation(KauffmanNetwork(DOT))
+
+    def test_cycles_match_simulation(self):
+        attractors = self.check_matches_simulation(KauffmanNetwork(CYCLIC))
+        self.assertTrue(any(len(state) > 1 for state, _ in attractors.items()))
+
+    def test_unresolved_runs(self):
+        network = KauffmanNetwork(CYCLIC)
+        rng = np.random.default_rng(1)
+        attractors, resolved = estimate_basins(
+            network.compile(), network.get_type_reduction(), 100, rng, num_steps=1
+        )
+        # One step cannot repeat a state
+        self.assertEqual(resolved, 0)
+        self.assertEqual(attractors.count(), 0)
+
+    def test_shares_add_up(self):
+        network = KauffmanNetwork(DOT)
+        rng = np.random.default_rng(2)
+        attractors, resolved = estimate_basins(
+            network.compile(), network.get_type_reduction(), 1000, rng, batch_size=300
+        )
+        self.assertEqual(resolved, 1000)
+        rows = basin_intervals(attractors, 1000)
+        self.assertAlmostEqual(sum(row[2] for row in rows), 1.0)
+        self.assertEqual([row[2] for row in rows], sorted(row[2] for row in rows)[::-1])
+        for _, _, share, low, high in rows:
+            self.assertLessEqual(low, share)
+            self.assertLessEqual(share, high)
+
+    def test_wilson_interval(self):
+        low, high = wilson_interval(50, 100)
+        self.assertAlmostEqual(low, 0.4038, places=4)
+        self.assertAlmostEqual(high, 0.5962, places=4)
+        low, high = wilson_interval(0, 100)
+        self.assertEqual(low, 0.0)
+        self.assertGreater(high, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from rbn.adjacency import Adjacency, instance_adjacency
+from rbn.centrality import centrality, pivots_for_error
+from rbn.kauffman import KauffmanNetwork
+
+DOT = """
+digraph Test {
+    Gateway [func="or"];
+    Service [func="and", instances=3];
+    Cache [func="majority", instances=2];
+    Database [func="copy", instances=2];
+    Gateway -> Service [label="1 to n"];
+    Service -> Cache [label="1 to n"];
+    Service -> Database [label="1 to 1"];
+    Cache -> Database [label="1 to n"];
+    Database -> Database [label="1 to self"];
+    Database -> Gateway [label="1 to n"];
+}
+"""
+
+
+def networkx_centrality(adjacency):
+    graph = nx.DiGraph()
+    graph.add_nodes_from(range(adjacency.size()))
+    graph.add_edges_from(zip(adjacency.sources.tolist(), adjacency.targets.tolist()))
+    betweenness = nx.betweenness_centrality(graph)
+    closeness = nx.closeness_centrality(graph)
+    return (
+        np.array([betweenness[i] for i in range(adjacency.size())]),
+        np.array([closeness[i] for i in range(adjacency.size())]),
+    )
+
+
+class TestCentrality(unittest.TestCase):
+
+    def setUp(self):
+        self.adjacency = instance_adjacency(KauffmanNetwork(DOT).compile())
+
+    def test_exact_matches_networkx(self):
+        betweenness, closeness, exact = centrality(self.adjacency)
+        self.assertTrue(exact)
+        expected_betweenness, expected_closeness = networkx_centrality(self.adjacency)
+        np.testing.assert_allclose(expected_betweenness, betweenness, atol=1e-12)
+        np.testing.assert_allclose(expected_closeness, closeness, atol=1e-12)
+
+    def test_parallel_matches_serial(self):
+        serial = centrality(self.adjacency, 5, rng=np.random.default_rng(3))
+        parallel = centrality(
+            self.adjacency, 5, processes=2, rng=np.random.default_rng(3)
+        )
+        self.assertFalse(serial[2])
+        np.testing.assert_allclose(serial[0], parallel[0])
+        np.testing.assert_allclose(serial[1], parallel[1])
+
+    def test_sampled_within_bound(self):
+        rng = np.random.default_rng(0)
+        size = 600
+        sources = np.repeat(np.arange(size), 2)
+        adjacency = Adjacency(
+            [str(i) for i in range(size)], sources, rng.integers(0, size, 2 * size)
+        )
+        epsilon = 0.1
+        pivots = pivots_for_error(size, epsilon)
+        self.assertLess(pivots, pivots_for_error(size, epsilon / 2))
+        betweenness, _, exact = centrality(adjacency, pivots, rng=rng)
+        self.assertFalse(exact)
+        expected, _ = networkx_centrality(adjacency)
+        self.assertLess(np.abs(betweenness - expected).max(), epsilon)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+
+import numpy as np
+
+from rbn.attractors import normalize_attractor
+from rbn.kauffman import KauffmanNetwork
+
+DOT = """
+digraph Test {
+    A [func="one(B) & majority(C)", instances=2];
+    B [func="or(B, mod=2, group=1) | 50%", instances=4, type_condition="all"];
+    C [func="xor", instances=3, type_condition="majority"];
+    D [func="copy"];
+    A -> B [label="1 to n"];
+    A -> C [label="1 to n"];
+    B -> B [label="1 to self"];
+    C -> D [label="1 to n"];
+    C -> A [label="1 to n"];
+    D -> D [label="1 to self"];
+}
+"""
+
+
+class TestCompiledNetwork(unittest.TestCase):
+
+    def test_step_batch_matches_update_states(self):
+        network = KauffmanNetwork(DOT)
+        compiled = network.compile()
+        rng = np.random.default_rng(1)
+        states = rng.random((64, compiled.size())) < 0.5
+        stepped = compiled.step_batch(states, rng)
+        for row, new_row in zip(states, stepped):
+            expected = network.update_states(compiled.to_dict(row))
+            self.assertEqual(compiled.to_dict(new_row), expected)
+
+    def test_scalar_step_matches_update_states(self):
+        network = KauffmanNetwork(DOT)
+        compiled = network.compile()
+        rng = np.random.default_rng(2)
+        for row in rng.random((64, compiled.size())) < 0.5:
+            expected = network.update_states(compiled.to_dict(row))
+            stepped = compiled.step(row.tolist())
+            self.assertEqual(compiled.to_dict(stepped), expected)
+
+    def test_incremental_step_matches_full_step(self):
+        compiled = KauffmanNetwork(DOT).compile()
+        rng = np.random.default_rng(4)
+        for row in rng.random((32, compiled.size())) < 0.5:
+            state = row.tolist()
+            incremental = list(state)
+            changed = None
+            for _ in range(10):
+                state = compiled.step(state)
+                changed = compiled.step_incremental(incremental, changed)
+                self.assertEqual(state, incremental)
+
+    def test_truth_tables_match_function_trees(self):
+        network = KauffmanNetwork(DOT)
+        tabulated = network.compile()
+        interpreted = network.compile(max_table_inputs=0)
+        self.assertTrue(all(group.table is not None for group in tabulated.groups))
+        self.assertTrue(
+            all(
+                group.table is None
+                for group in interpreted.groups
+                if group.inputs.shape[1]
+            )
+        )
+        rng = np.random.default_rng(3)
+        states = rng.random((256, tabulated.size())) < 0.5
+        np.testing.assert_array_equal(
+            tabulated.step_batch(states), interpreted.step_batch(states)
+        )
+
+    def test_csr_inputs(self):
+        compiled = KauffmanNetwork(DOT).compile()
+        for i, node_inputs in enumerate(compiled.inputs):
+            start, end = compiled.indptr[i], compiled.indptr[i + 1]
+            self.assertEqual(list(compiled.indices[start:end]), node_inputs)
+
+    def test_type_reduction_matches_normalize_attractor(self):
+        network = KauffmanNetwork(DOT)
+        compiled = network.compile()
+        reduction = network.get_type_reduction()
+        rng = np.random.default_rng(5)
+        states = rng.random((64, compiled.size())) < 0.5
+        reduced = reduction.reduce_batch(states)
+        for row, reduced_row in zip(states, reduced):
+            expected = normalize_attractor(zip(compiled.names, row.tolist()), network)
+            code = reduction.reduce(row.tolist())
+            self.assertEqual(expected, reduction.to_frozenset(code))
+            self.assertEqual([bool(code >> t & 1) for t in range(4)], list(reduced_row))
+
+    def test_incremental_type_reduction(self):
+        network = KauffmanNetwork(DOT)
+        compiled = network.compile()
+        reduction = network.get_type_reduction()
+        rng = np.random.default_rng(6)
+        for row in rng.random((16, compiled.size())) < 0.5:
+            state = row.tolist()
+            code = reduction.reduce(state)
+            changed = None
+            for _ in range(10):
+                changed = compiled.step_incremental(state, changed)
+                code = reduction.reduce(state, code, changed)
+                self.assertEqual(reduction.reduce(state), code)
+
+    def test_incremental_random_type_condition(self):
+        # The instances of E never change, but its condition picks one anew
+        network = KauffmanNetwork(
+            DOT.replace(
+                'D [func="copy"];',
+                'D [func="copy"];\n    E [func="copy", instances=2, '
+                'type_condition="random"];\n    E -> E [label="1 to self"];',
+            )
+        )
+        compiled = network.compile()
+        reduction = network.get_type_reduction()
+        rng = np.random.default_rng(7)
+        state = (rng.random(compiled.size()) < 0.5).tolist()
+        state[compiled.names.index("E 1")] = True
+        state[compiled.names.index("E 2")] = False
+        code = reduction.reduce(state)
+        changed = None
+        for seed in range(20):
+            changed = compiled.step_incremental(state, changed, rng)
+            code = reduction.reduce(state, code, changed, np.random.default_rng(seed))
+            self.assertEqual(
+                reduction.reduce(state, rng=np.random.default_rng(seed)), code
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
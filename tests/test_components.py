@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+
+from rbn.components import (
+    modular_attractors,
+    normalized_attractor,
+    strongly_connected_components,
+)
+from rbn.kauffman import KauffmanNetwork
+
+DOT = """
+digraph Test {
+    A [func="one(B) & majority(C)", instances=2];
+    B [func="xor", instances=2];
+    C [func="copy", instances=2];
+    D [func="nand"];
+    A -> B [label="1 to n"];
+    A -> C [label="1 to n"];
+    B -> B [label="1 to n"];
+    B -> D [label="1 to n"];
+    C -> C [label="1 to self"];
+    D -> A [label="1 to n"];
+}
+"""
+
+
+def all_attractors(compiled):
+    # Follow every one of the 2^N states to its cycle
+    n = compiled.size()
+    states = (np.arange(1 << n)[:, np.newaxis] >> np.arange(n)) & 1 == 1
+    successors = compiled.step_batch(states) @ (1 << np.arange(n))
+    cycles = set()
+    for start in range(1 << n):
+        path = [start]
+        while successors[path[-1]] not in path:
+            path.append(int(successors[path[-1]]))
+        cycles.add(frozenset(path[path.index(successors[path[-1]]) :]))
+    return cycles
+
+
+class TestComponents(unittest.TestCase):
+
+    def test_dependency_order(self):
+        # 0 reads 1, 1 and 2 read each other, 3 reads itself and 0
+        components = strongly_connected_components([[1], [2], [1], [3, 0]])
+        self.assertEqual([[1, 2], [0], [3]], components)
+
+    def test_matches_exhaustive_search(self):
+        network = KauffmanNetwork(DOT)
+        compiled = network.compile()
+        attractors, components, exact = modular_attractors(compiled)
+        self.assertTrue(exact)
+        self.assertLess(max(len(component) for component in components), 7)
+        found = {frozenset(attractor.codes) for attractor in attractors}
+        self.assertEqual(len(found), len(attractors))
+        self.assertEqual(all_attractors(compiled), found)
+
+    def test_normalized_attractor(self):
+        network = KauffmanNetwork(DOT)
+        attractors, _, _ = modular_attractors(network.compile())
+        for attractor in attractors:
+            normalized, attractor_id = normalized_attractor(
+                attractor, network.get_type_reduction()
+            )
+            self.assertLessEqual(len(normalized), len(attractor))
+            self.assertEqual(8, len(attractor_id))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from rbn.derrida import derrida_curve, derrida_slope, classify_regime, perturb
+from rbn.kauffman import KauffmanNetwork
+
+RING = """
+digraph Ring {
+    A [func="copy"];
+    B [func="copy"];
+    C [func="copy"];
+    D [func="copy"];
+    A -> B;
+    B -> C;
+    C -> D;
+    D -> A;
+}
+"""
+
+NOISE = """
+digraph Noise {
+    R [func="random", instances=4];
+}
+"""
+
+
+class TestDerrida(unittest.TestCase):
+
+    def test_perturb_flips_exact_distance(self):
+        rng = np.random.default_rng(0)
+        states = rng.random((100, 12)) < 0.5
+        perturbed = perturb(states, 5, rng)
+        self.assertTrue(np.all(np.count_nonzero(states != perturbed, axis=1) == 5))
+
+    def test_copy_ring_is_critical(self):
+        # A flip in a ring of copy nodes moves along the ring without spreading
+        compiled = KauffmanNetwork(RING).compile()
+        rng = np.random.default_rng(0)
+        curve = derrida_curve(compiled, [1, 2, 3], 500, rng, batch_size=128)
+        for distance, mean, error in curve:
+            self.assertEqual(distance, mean)
+            self.assertEqual(0, error)
+        self.assertEqual(1, derrida_slope(curve))
+        self.assertEqual("critical", classify_regime(derrida_slope(curve)))
+
+    def test_random_nodes_share_draws_within_pairs(self):
+        # With no inputs to differ, the pairs of random nodes step alike
+        compiled = KauffmanNetwork(NOISE).compile()
+        rng = np.random.default_rng(0)
+        curve = derrida_curve(compiled, [1, 2], 500, rng, batch_size=128)
+        for _, mean, error in curve:
+            self.assertEqual(0, mean)
+            self.assertEqual(0, error)
+
+
+if __name__ == "__main__":
+    unittest.main()
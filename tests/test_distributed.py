@@ -0,0 +1,173 @@
+import errno
+import os
+import tempfile
+import threading
+import time
+import unittest
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+from rbn.distributed import Coordinator, start_local_workers
+from rbn.kauffman import KauffmanNetwork
+from rbn.simulation import Simulation
+from tests.test_simulation import STOCHASTIC_DOT, StageSummaries
+
+DOT = """
+digraph Test {
+    Frontend [func="majority", instances=3];
+    Backend [func="or", instances=4];
+    Database [func="copy", instances=4];
+    Frontend -> Backend [label="1 to n"];
+    Backend -> Database [label="1 to 1"];
+    Database -> Database [label="1 to self"];
+}
+"""
+
+AUTHKEY = b"test"
+
+
+def lose_one_task(address):
+    """A worker that takes the job and one task, then disappears."""
+    connection = Client(address, authkey=AUTHKEY)
+    connection.recv()
+    connection.recv()
+    connection.close()
+
+
+class FailingListener:
+    """A listener out of file descriptors."""
+
+    def __init__(self):
+        self.attempts = 0
+
+    def accept(self):
+        self.attempts += 1
+        raise OSError(errno.EMFILE, "Too many open files")
+
+    def close(self):
+        pass
+
+
+class TestDistributed(unittest.TestCase):
+
+    def setUp(self):
+        # The attractor graph is written to the working directory
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+
+    def run_stages(self, coordinator=None, **options):
+        summaries = StageSummaries()
+        simulation = Simulation(6, 120, 20, seed=4, coordinator=coordinator, **options)
+        p, count = simulation.run(KauffmanNetwork(DOT), result_text=summaries)
+        return summaries, p, count
+
+    def distributed(self):
+        coordinator = Coordinator(
+            DOT, ("localhost", 0), AUTHKEY, chunk_runs=15, task_timeout=60
+        )
+        self.addCleanup(coordinator.close)
+        return coordinator
+
+    def assert_same_results(self, local, distributed):
+        local_summaries, local_p, local_count = local
+        summaries, p, count = distributed
+        self.assertEqual(local_summaries.stages, summaries.stages)
+        self.assertEqual(local_summaries.health, summaries.health)
+        self.assertEqual(local_summaries.outage, summaries.outage)
+        self.assertAlmostEqual(local_p, p)
+        self.assertEqual(local_count, count)
+
+    def test_workers_match_local_run(self):
+        for options in ({}, {"sampling": "stratified", "target_width": 0.1}):
+            coordinator = self.distributed()
+            workers = start_local_workers(coordinator.address, AUTHKEY, 2)
+            distributed = self.run_stages(coordinator, **options)
+            coordinator.close()
+            for worker in workers:
+                worker.join(30)
+                self.assertEqual(0, worker.exitcode)
+            self.assert_same_results(self.run_stages(**options), distributed)
+
+    def test_lost_worker_is_retried(self):
+        coordinator = self.distributed()
+        lost = threading.Thread(target=lose_one_task, args=(coordinator.address,))
+        lost.start()
+        start_local_workers(coordinator.address, AUTHKEY, 1)
+        distributed = self.run_stages(coordinator)
+        lost.join(30)
+        self.assertFalse(lost.is_alive())
+        self.assert_same_results(self.run_stages(), distributed)
+
+    def test_gives_up_after_max_attempts(self):
+        coordinator = Coordinator(DOT, ("localhost", 0), AUTHKEY, max_attempts=1)
+        self.addCleanup(coordinator.close)
+        lost = threading.Thread(target=lose_one_task, args=(coordinator.address,))
+        lost.start()
+        with self.assertRaises(RuntimeError):
+            self.run_stages(coordinator)
+        lost.join(30)
+
+    def test_seeded_stochastic_runs_repeat(self):
+        results = []
+        for _ in range(2):
+            coordinator = Coordinator(
+                STOCHASTIC_DOT, ("localhost", 0), AUTHKEY, chunk_runs=15
+            )
+            self.addCleanup(coordinator.close)
+            start_local_workers(coordinator.address, AUTHKEY, 2)
+            summaries = StageSummaries()
+            simulation = Simulation(4, 50, 10, seed=3, coordinator=coordinator)
+            p, _ = simulation.run(
+                KauffmanNetwork(STOCHASTIC_DOT), result_text=summaries
+            )
+            coordinator.close()
+            results.append((p, summaries.health))
+        self.assertEqual(results[0], results[1])
+
+    def test_bad_key_does_not_stop_workers(self):
+        coordinator = self.distributed()
+        with self.assertRaises(AuthenticationError):
+            Client(coordinator.address, authkey=b"wrong")
+        start_local_workers(coordinator.address, AUTHKEY, 1)
+        distributed = self.run_stages(coordinator)
+        self.assert_same_results(self.run_stages(), distributed)
+
+    def test_accept_errors_back_off(self):
+        coordinator = self.distributed()
+        listener = coordinator._listener
+        self.addCleanup(listener.close)
+        failing = FailingListener()
+        coordinator._listener = failing
+        # Wake the accept loop, which then goes on to the failing listener
+        Client(coordinator.address, authkey=AUTHKEY).close()
+        time.sleep(1)
+        self.assertLess(failing.attempts, 10)
+        coordinator.close()
+
+    def test_gives_up_without_workers(self):
+        coordinator = Coordinator(DOT, ("localhost", 0), AUTHKEY, task_timeout=0.5)
+        self.addCleanup(coordinator.close)
+        with self.assertRaises(RuntimeError):
+            self.run_stages(coordinator)
+
+    def test_stop_while_waiting_for_workers(self):
+        coordinator = self.distributed()
+        summaries = StageSummaries()
+        simulation = Simulation(6, 120, 20, seed=4, coordinator=coordinator)
+        stop = threading.Timer(0.5, setattr, (simulation, "stop_requested", True))
+        stop.start()
+        simulation.run(KauffmanNetwork(DOT), result_text=summaries)
+        stop.join()
+        self.assertEqual(simulation.stages_run, 0)
+        self.assertEqual(summaries.stages, [])
+
+    def test_recording_is_local_only(self):
+        coordinator = self.distributed()
+        with self.assertRaises(ValueError):
+            Simulation(1, 10, 10, record_path="runs", coordinator=coordinator)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+import pygraphviz as pgv
+
+from rbn.dot_writer import DotWriter, quote
+from rbn.result_graph import ResultGraph
+
+
+class TestDotWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "graph.dot")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_quote(self):
+        self.assertEqual("Database", quote("Database"))
+        self.assertEqual("1.5", quote(1.5))
+        self.assertEqual('"0_Database 1"', quote("0_Database 1"))
+        self.assertEqual('"say \\"hi\\""', quote('say "hi"'))
+        self.assertEqual('"node"', quote("node"))
+        self.assertEqual("<<B>x</B>>", quote("<<B>x</B>>"))
+
+    def test_graph_reads_back(self):
+        writer = DotWriter(self.path, strict=True, rankdir="LR")
+        writer.begin_subgraph("cluster_0", label="First stage")
+        writer.node("a b", label="<<B>A</B>>", color="#ff0000")
+        writer.node("c", label='quoted "c"')
+        writer.edge("a b", "c", style="invis")
+        writer.edge("a b", "c")
+        writer.end_subgraph()
+        writer.node("d")
+        writer.close()
+
+        graph = pgv.AGraph(self.path)
+        self.assertTrue(graph.is_strict())
+        self.assertEqual("LR", graph.graph_attr["rankdir"])
+        self.assertEqual(["a b", "c", "d"], sorted(graph.nodes()))
+        self.assertEqual([("a b", "c")], graph.edges())
+        self.assertEqual('quoted "c"', graph.get_node("c").attr["label"])
+        self.assertEqual("#ff0000", graph.get_node("a b").attr["color"])
+        (subgraph,) = graph.subgraphs()
+        self.assertEqual("cluster_0", subgraph.name)
+        self.assertEqual("First stage", subgraph.graph_attr["label"])
+
+    def test_repeated_edges_kept_unless_strict(self):
+        writer = DotWriter(self.path)
+        writer.edge("a", "b")
+        writer.edge("a", "b")
+        writer.close()
+        graph = pgv.AGraph(self.path)
+        self.assertFalse(graph.is_strict())
+        self.assertEqual(2, graph.number_of_edges())
+
+    def test_result_graph_streams_stages(self):
+        result_graph = ResultGraph(self.path)
+        result_graph.add_subgraph(0)
+        result_graph.add_node("A", 0, "A", 1.0, 2)
+        result_graph.add_edge(("A", "B"), 0)
+        result_graph.add_subgraph(1)
+        # The first stage is on disk before the simulation finishes
+        with open(self.path) as f:
+            self.assertIn('"0_A" -> "0_B"', f.read())
+        result_graph.add_node("A", 1, "A", 0.0, 2)
+        result_graph.add_info_box(1.0, 2, 3, 0.5)
+        result_graph.write(2)
+
+        graph = pgv.AGraph(self.path)
+        self.assertEqual(
+            ["align", "cluster_0", "cluster_1"],
+            sorted(subgraph.name for subgraph in graph.subgraphs()),
+        )
+        self.assertTrue(graph.is_strict())
+        self.assertIn("info_box", graph.nodes())
+        self.assertTrue(graph.has_edge("align_1", "invisible_1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+
+from rbn.failures import (
+    collapse_failure_sets,
+    count_failure_sets,
+    enumerate_failure_sets,
+    failure_mask,
+    impact_biases,
+    initialise_node_states,
+    sample_failure_sets,
+    TypeStratifiedSampler,
+)
+
+
+class TestFailures(unittest.TestCase):
+
+    def test_sample_failure_sets(self):
+        rng = np.random.default_rng(0)
+        for n, failures in [(10, 0), (10, 1), (100, 3), (10, 7), (5, 9)]:
+            sets = sample_failure_sets(n, failures, 500, rng)
+            self.assertEqual((500, min(n, failures)), sets.shape)
+            for row in sets:
+                self.assertEqual(sorted(set(row.tolist())), row.tolist())
+                self.assertTrue(all(0 <= node < n for node in row))
+
+    def test_collapse_failure_sets(self):
+        # Only 10 distinct single failures exist in a 10 node network
+        rng = np.random.default_rng(0)
+        sets, weights = collapse_failure_sets(sample_failure_sets(10, 1, 2000, rng))
+        self.assertEqual(10, len(sets))
+        self.assertEqual(2000, weights.sum())
+
+    def test_enumerate_failure_sets(self):
+        sets = enumerate_failure_sets(5, 2)
+        self.assertEqual(count_failure_sets(5, 2), len(sets))
+        self.assertEqual(10, len({tuple(row) for row in sets.tolist()}))
+        self.assertEqual((1, 0), enumerate_failure_sets(4, 0).shape)
+        self.assertEqual([[0, 1, 2]], enumerate_failure_sets(3, 5).tolist())
+
+    def test_failure_mask(self):
+        self.assertEqual(0, failure_mask(np.array([], dtype=np.intp)))
+        self.assertEqual(0b100101, failure_mask(np.array([0, 2, 5])))
+        self.assertEqual(1 << 100, failure_mask(np.array([100])))
+
+    def test_initialise_node_states(self):
+        healthy = np.ones(4, dtype=bool)
+        states = initialise_node_states(healthy, np.array([1, 3]))
+        self.assertEqual([True, False, True, False], states.tolist())
+        self.assertTrue(healthy.all())
+
+
+class TestTypeStratifiedSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.node_types = ["A"] * 3 + ["B"] * 5 + ["C"] * 2
+
+    def test_sets_are_distinct_nodes(self):
+        sampler = TypeStratifiedSampler(self.node_types, {"A": 3.0})
+        sets = sampler.sample(4, 500, np.random.default_rng(0))
+        self.assertEqual((500, 4), sets.shape)
+        for row in sets.tolist():
+            self.assertEqual(sorted(set(row)), row)
+
+    def test_stratified_counts_follow_hypergeometric(self):
+        sampler = TypeStratifiedSampler(self.node_types)
+        counts = sampler.sample_counts(4, 2100, np.random.default_rng(0))
+        self.assertTrue((counts.sum(axis=1) == 4).all())
+        # P(all three A fail) = C(7, 1) / C(10, 4) = 1 / 30, to within one run
+        self.assertAlmostEqual(70, (counts[:, 0] == 3).sum(), delta=1)
+        np.testing.assert_array_equal(
+            np.ones(2100), sampler.likelihood_ratios(np.zeros((2100, 4), dtype=int))
+        )
+
+    def test_reweighting_recovers_uniform_probabilities(self):
+        sampler = TypeStratifiedSampler(self.node_types, {"A": 4.0, "C": 0.5})
+        sets = sampler.sample(4, 50000, np.random.default_rng(1))
+        ratios = sampler.likelihood_ratios(sets)
+        all_a = np.isin(sets, [0, 1, 2]).sum(axis=1) == 3
+        # Biased towards A, the rare event is sampled far more often
+        self.assertGreater(all_a.mean(), 0.2)
+        self.assertAlmostEqual(1 / 30, (ratios * all_a).mean(), delta=0.002)
+        self.assertAlmostEqual(1, ratios.mean(), delta=0.02)
+
+    def test_impact_biases(self):
+        # A reads B, and B reads C: failing C reaches every node
+        dependents = [[] for _ in self.node_types]
+        for a in range(3):
+            for b in range(3, 8):
+                dependents[b].append(a)
+        for b in range(3, 8):
+            dependents[8 + b % 2].append(b)
+        biases = impact_biases(self.node_types, dependents)
+        self.assertLess(biases["A"], biases["B"])
+        self.assertLess(biases["B"], biases["C"])
+        self.assertEqual(
+            {"A": 1.0, "B": 1.0, "C": 1.0},
+            impact_biases(self.node_types, dependents, strength=0),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+
+from rbn.bdd import FALSE, TRUE, BDD
+from rbn.fixed_points import FixedPoints
+from rbn.kauffman import KauffmanNetwork
+
+DOT = """
+digraph Test {
+    A [func="one(B) & majority(C)", instances=2];
+    B [func="or(B, mod=2, group=1) | 50%", instances=4];
+    C [func="xor", instances=3];
+    D [func="copy"];
+    A -> B [label="1 to n"];
+    A -> C [label="1 to n"];
+    B -> B [label="1 to self"];
+    C -> D [label="1 to n"];
+    C -> A [label="1 to n"];
+    D -> D [label="1 to self"];
+}
+"""
+
+
+class TestBDD(unittest.TestCase):
+
+    def test_operations(self):
+        bdd = BDD(3)
+        x, y, z = bdd.var(0), bdd.var(1), bdd.var(2)
+        f = bdd.disjoin(bdd.conjoin(x, y), bdd.negate(z))
+        self.assertEqual(5, bdd.sat_count(f))
+        self.assertEqual(
+            5, sum(1 for s in bdd.solutions(f) if (s[0] and s[1]) or not s[2])
+        )
+        self.assertEqual(TRUE, bdd.disjoin(x, bdd.negate(x)))
+        self.assertEqual(FALSE, bdd.conjoin(f, bdd.negate(f)))
+        self.assertEqual(x, bdd.conjoin(x, bdd.disjoin(x, y)))
+
+    def test_symmetric(self):
+        bdd = BDD(4)
+        # At least three of four, with variable 1 counted twice
+        f = bdd.symmetric([(0, 1), (1, 2), (3, 1)], lambda count: count >= 3)
+        for s in bdd.solutions(f):
+            self.assertGreaterEqual(s[0] + 2 * s[1] + s[3], 3)
+        # Variable 1 and one of 0 and 3, with variable 2 free
+        self.assertEqual(3 * 2, bdd.sat_count(f))
+
+
+class TestFixedPoints(unittest.TestCase):
+
+    def test_matches_exhaustive_search(self):
+        network = KauffmanNetwork(DOT)
+        compiled = network.compile()
+        n = compiled.size()
+        states = (np.arange(1 << n)[:, np.newaxis] >> np.arange(n)) & 1 == 1
+        expected = {
+            tuple(state)
+            for state in states[(compiled.step_batch(states) == states).all(1)]
+        }
+        fixed_points = FixedPoints(compiled)
+        self.assertEqual(len(expected), fixed_points.count())
+        self.assertEqual(expected, {tuple(state) for state in fixed_points.states()})
+
+        normalized = fixed_points.normalized(network.get_type_reduction())
+        self.assertEqual(len(expected), sum(count for _, count in normalized))
+        reduction = network.get_type_reduction()
+        self.assertEqual(
+            {reduction.to_frozenset(reduction.reduce(list(s))) for s in expected},
+            {state for state, _ in normalized},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import io
+import random
+import unittest
+from collections import Counter
+
+from rbn.kauffman import KauffmanNetwork
+from rbn.network_generator import TOPOLOGIES, generate_network, write_dot
+
+FUNCTIONS = ["and", "nor", "xor", "majority"]
+
+
+class TestNetworkGenerator(unittest.TestCase):
+
+    def test_exact_in_degree(self):
+        for topology in TOPOLOGIES:
+            graph = generate_network(
+                200, 3, FUNCTIONS, topology=topology, rng=random.Random(7)
+            )
+            edges = graph.edges()
+            in_degrees = Counter(target for _, target in edges)
+            self.assertEqual(200, len(in_degrees), topology)
+            self.assertEqual({3}, set(in_degrees.values()), topology)
+            self.assertEqual(len(edges), len(set(edges)), topology)
+            self.assertTrue(all(source != target for source, target in edges))
+
+    def test_modular_inputs_stay_in_module(self):
+        graph = generate_network(
+            100,
+            2,
+            FUNCTIONS,
+            topology="modular",
+            modules=4,
+            intra=1.0,
+            rng=random.Random(3),
+        )
+        for source, target in graph.edges():
+            self.assertEqual(int(source[1:]) // 25, int(target[1:]) // 25)
+
+    def test_in_memory_network_matches_streamed_dot(self):
+        stream = io.StringIO()
+        write_dot(
+            stream, 30, 2, FUNCTIONS, 1, 3, topology="scale-free", rng=random.Random(11)
+        )
+        graph = generate_network(
+            30, 2, FUNCTIONS, 1, 3, topology="scale-free", rng=random.Random(11)
+        )
+        from_dot = KauffmanNetwork(stream.getvalue())
+        in_memory = KauffmanNetwork(graph)
+        self.assertEqual(
+            from_dot.get_expanded_node_list(), in_memory.get_expanded_node_list()
+        )
+        for node in from_dot.get_expanded_node_list():
+            self.assertEqual(
+                sorted(from_dot.get_node_inputs(node)),
+                sorted(in_memory.get_node_inputs(node)),
+            )
+            self.assertEqual(
+                from_dot.get_function_definition(node),
+                in_memory.get_function_definition(node),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import unittest
+
+import numpy as np
+
+from rbn.failures import enumerate_failure_sets
+from rbn.kauffman import KauffmanNetwork
+from rbn.recovery import (
+    RecoveryTimes,
+    analyse_recovery,
+    histogram_mean,
+    histogram_percentile,
+    initial_states,
+    recovery_times,
+    stage_attractors,
+    target_states,
+)
+from rbn.simulation import Simulation
+
+ECOMMERCE = os.path.join(os.path.dirname(__file__), "..", "examples", "ecommerce.dot")
+
+
+def first_healthy_step(compiled, state, num_steps):
+    state = state.tolist()
+    for step in range(num_steps + 1):
+        if all(state):
+            return step
+        state = compiled.step(state)
+    return num_steps + 1
+
+
+class TestRecovery(unittest.TestCase):
+
+    def setUp(self):
+        self.network = KauffmanNetwork(ECOMMERCE)
+        self.compiled = self.network.compile()
+        self.reduction = self.network.get_type_reduction()
+        self.rng = np.random.default_rng(4)
+
+    def test_initial_states(self):
+        states = initial_states(4, np.array([[0, 2], [1, 3]]))
+        np.testing.assert_array_equal(
+            states, [[False, True, False, True], [True, False, True, False]]
+        )
+
+    def test_matches_single_runs(self):
+        failure_sets = enumerate_failure_sets(self.compiled.size(), 2)
+        states = initial_states(self.compiled.size(), failure_sets)
+        times = recovery_times(
+            self.compiled,
+            self.reduction,
+            states,
+            np.ones(len(states)),
+            None,
+            self.rng,
+            10,
+        )
+        expected = np.bincount(
+            [first_healthy_step(self.compiled, state, 10) for state in states],
+            minlength=12,
+        )
+        np.testing.assert_array_equal(times.network, expected)
+        # Every type is healthy by the time the whole network is
+        for counts in times.by_type:
+            self.assertGreaterEqual(counts[:-1].sum(), times.network[:-1].sum())
+
+    def test_designated_attractor(self):
+        healthy = tuple((node_type, True) for node_type in sorted(self.reduction.types))
+        target = target_states(self.reduction, [(healthy,)])
+        self.assertTrue(target.all())
+        states = initial_states(self.compiled.size(), np.zeros((3, 0), dtype=int))
+        times = recovery_times(
+            self.compiled, self.reduction, states, np.ones(3), target, self.rng, 5
+        )
+        self.assertEqual(times.network[0], 3)
+
+    def test_histograms(self):
+        counts = np.array([5.0, 3.0, 0.0, 2.0])
+        self.assertEqual(histogram_percentile(counts, 0.5), 0)
+        self.assertEqual(histogram_percentile(counts, 0.8), 1)
+        # The last entry holds the runs that never recovered
+        self.assertIsNone(histogram_percentile(counts, 0.9))
+        self.assertAlmostEqual(histogram_mean(counts), 3 / 8)
+        self.assertIsNone(histogram_mean(np.array([0.0, 4.0])))
+
+    def test_stages(self):
+        simulation = Simulation(4, 300, 20, seed=2, cache_size=0)
+        compiled, reduction, symmetry = simulation.prepare(self.network)
+        stages = list(
+            analyse_recovery(simulation, compiled, reduction, symmetry, batch_size=100)
+        )
+        self.assertEqual([stage for stage, _, _ in stages], [0, 1, 2, 3])
+        self.assertEqual(simulation.stages_run, 4)
+        _, _, times = stages[0]
+        self.assertEqual(times.summary(), (1.0, 0.0, 0, 0, 0))
+        for stage, exhaustive, times in stages:
+            self.assertIsInstance(times, RecoveryTimes)
+            if not exhaustive:
+                self.assertEqual(times.runs, 300)
+        shares = [times.recovered_share() for _, _, times in stages]
+        self.assertEqual(shares, sorted(shares, reverse=True))
+
+    def test_stage_attractors_leave_simulation_rng(self):
+        def stage_times(find_attractors):
+            simulation = Simulation(4, 300, 20, seed=2, cache_size=0)
+            compiled, reduction, symmetry = simulation.prepare(self.network)
+            if find_attractors:
+                attractors = stage_attractors(
+                    simulation, compiled, reduction, symmetry, 50, self.rng
+                )
+                self.assertGreater(attractors.count(), 0)
+            return [
+                times.network.tolist()
+                for _, _, times in analyse_recovery(
+                    simulation, compiled, reduction, symmetry, batch_size=100
+                )
+            ]
+
+        self.assertEqual(stage_times(False), stage_times(True))
+
+
+if __name__ == "__main__":
+    unittest.main()
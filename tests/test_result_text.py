@@ -0,0 +1,48 @@
+import io
+import unittest
+
+from rbn.result_text import ResultText, format_duration
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgress(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.clock = FakeClock()
+        self.result_text = ResultText(True, 1.0, self.stream, self.clock)
+
+    def test_throttled_to_refresh_interval(self):
+        self.result_text.start_stage(3)
+        for runs in range(1, 40):
+            self.clock.now = runs * 0.1
+            self.result_text.print_progress(runs, 100, 2)
+        lines = self.stream.getvalue().split("\r")[1:]
+        # Redrawn at 1.0, 2.0 and 3.0 seconds
+        self.assertEqual(3, len(lines))
+        self.assertEqual(
+            "Stage 3: 10/100 runs, 10 runs/s, ETA 0:00:09, 2 attractors",
+            lines[0].rstrip(),
+        )
+
+    def test_silent_unless_enabled(self):
+        result_text = ResultText(stream=self.stream, clock=self.clock)
+        result_text.start_stage(0)
+        self.clock.now = 5.0
+        result_text.print_progress(10, 100, 1)
+        self.assertEqual("", self.stream.getvalue())
+
+    def test_format_duration(self):
+        self.assertEqual("1:01:01", format_duration(3661))
+        self.assertEqual("?", format_duration(float("inf")))
+
+
+if __name__ == "__main__":
+    unittest.main()
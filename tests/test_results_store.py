@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from rbn.kauffman import KauffmanNetwork
+from rbn.result_graph import ResultGraph
+from rbn.results_store import RecordingResultText, ResultsStore
+from rbn.simulation import Simulation
+from tests.test_simulation import DOT, StageSummaries
+
+
+class AttractorSummary(StageSummaries):
+    def print_attractor_summary(
+        self, attractors, runs_with_attractor, runs_no_attractor
+    ):
+        self.attractors = [
+            (attractors.get_hash(state), count, attractors.dominance(state))
+            for state, count in attractors.items()
+        ]
+        self.runs = (runs_with_attractor, runs_no_attractor)
+
+    def print_kauffman_parameters(self, K, MAX_K, N, P):
+        self.parameters = (K, MAX_K, N, P)
+
+
+class TestResultsStore(unittest.TestCase):
+
+    def setUp(self):
+        # The reports are written to the working directory
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        self.network = KauffmanNetwork(DOT)
+        self.store = ResultsStore("store")
+
+    def simulate(self, seed=3):
+        simulation = Simulation(6, 100, 20, seed=seed, sampling="stratified")
+        summaries = AttractorSummary()
+        recording = RecordingResultText(
+            summaries, self.network, simulation.parameters()
+        )
+        result_graph = ResultGraph("simulated.dot")
+        simulation.run(self.network, result_graph, recording)
+        result_graph.write(simulation.stages_run)
+        key = self.store.key(self.network, simulation.parameters())
+        self.store.save(key, recording.results)
+        return key, summaries
+
+    def test_rendering_matches_simulation(self):
+        key, simulated = self.simulate()
+        with open("attractors_graph.dot") as f:
+            attractor_graph = f.read()
+        os.remove("attractors_graph.dot")
+
+        rendered = AttractorSummary()
+        result_graph = ResultGraph("rendered.dot")
+        results = self.store.load(key)
+        results.render(result_graph, rendered)
+        result_graph.write(len(results.stages))
+
+        self.assertEqual(simulated.stages, rendered.stages)
+        self.assertEqual(simulated.health, rendered.health)
+        self.assertEqual(simulated.outage, rendered.outage)
+        self.assertEqual(simulated.attractors, rendered.attractors)
+        self.assertEqual(simulated.runs, rendered.runs)
+        self.assertEqual(simulated.parameters, rendered.parameters)
+        with open("simulated.dot") as simulated_graph, open("rendered.dot") as graph:
+            self.assertEqual(simulated_graph.read(), graph.read())
+        with open("attractors_graph.dot") as f:
+            self.assertEqual(attractor_graph, f.read())
+
+    def test_keys(self):
+        key, _ = self.simulate()
+        other_seed, _ = self.simulate(seed=4)
+        self.assertNotEqual(key, other_seed)
+        self.assertEqual(sorted([key, other_seed]), self.store.keys())
+        self.assertEqual(key, self.store.resolve(key[:6]))
+        self.assertIsNone(self.store.load("0" * 16))
+
+        # The fingerprint follows the network, not how its file is written
+        rewritten = KauffmanNetwork(self.network.to_dot())
+        parameters = Simulation(6, 100, 20, seed=3, sampling="stratified").parameters()
+        self.assertEqual(key, self.store.key(rewritten, parameters))
+        changed = KauffmanNetwork(DOT.replace('func="or"', 'func="and"'))
+        self.assertNotEqual(key, self.store.key(changed, parameters))
+
+
+if __name__ == "__main__":
+    unittest.main()
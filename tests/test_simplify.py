@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+
+from rbn.components import modular_attractors, normalized_attractor
+from rbn.kauffman import KauffmanNetwork
+
+DOT = """
+digraph Test {
+    Power [func="true"];
+    Switch [func="copy"];
+    Relay [func="copy", instances=2];
+    Lamp [func="majority", instances=2];
+    Fan [func="one(Power) & all(Lamp)"];
+    Log [func="or", instances=2];
+    Switch -> Switch [label="1 to self"];
+    Relay -> Switch [label="1 to n"];
+    Lamp -> Relay [label="1 to n"];
+    Fan -> Power [label="1 to n"];
+    Fan -> Lamp [label="1 to n"];
+    Log -> Fan [label="1 to n"];
+}
+"""
+
+
+class TestSimplifiedNetwork(unittest.TestCase):
+
+    def setUp(self):
+        self.network = KauffmanNetwork(DOT)
+        self.compiled = self.network.compile()
+
+    def names(self, nodes):
+        return sorted(self.compiled.names[node] for node in nodes)
+
+    def test_reductions(self):
+        simplified = self.network.simplify()
+        self.assertEqual(["Power 1"], self.names(simplified.constants))
+        self.assertEqual(["Switch 1"], self.names(simplified.frozen))
+        self.assertEqual(["Relay 1", "Relay 2"], self.names(simplified.aliases))
+        self.assertEqual(1, simplified.settle_steps)
+        self.assertFalse(simplified.pruned)
+        self.assertEqual(
+            [
+                "Switch 1",
+                "Lamp 1",
+                "Lamp 2",
+                "Fan 1",
+                "Log 1",
+                "Log 2",
+                "Power always healthy",
+            ],
+            simplified.network.names,
+        )
+
+    def test_unobserved_nodes_are_dropped(self):
+        simplified = self.network.simplify(observed_types=["Lamp"])
+        self.assertEqual(
+            ["Fan 1", "Log 1", "Log 2", "Power 1"], self.names(simplified.pruned)
+        )
+        self.assertEqual(
+            ["Lamp 1", "Lamp 2", "Relay 1", "Relay 2", "Switch 1"],
+            sorted(simplified.to_dict(simplified.reduce_state([True] * 9))),
+        )
+
+    def test_equivalent_once_settled(self):
+        simplified = self.network.simplify()
+        rng = np.random.default_rng(1)
+        for row in rng.random((32, self.compiled.size())) < 0.5:
+            state = row.tolist()
+            for _ in range(simplified.settle_steps):
+                state = self.compiled.step(state)
+            reduced = simplified.reduce_state(state)
+            for _ in range(5):
+                state = self.compiled.step(state)
+                reduced = simplified.network.step(reduced)
+                self.assertEqual(state, simplified.expand_state(reduced))
+
+    def test_same_attractors(self):
+        reduction = self.network.get_type_reduction()
+        simplified = self.network.simplify()
+        attractors, _, _ = modular_attractors(self.compiled)
+        reduced_attractors, _, _ = modular_attractors(simplified.network)
+        self.assertEqual(
+            {normalized_attractor(a, reduction)[1] for a in attractors},
+            {
+                normalized_attractor(a, reduction, simplified)[1]
+                for a in reduced_attractors
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
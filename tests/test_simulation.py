@@ -0,0 +1,238 @@
+import os
+import signal
+import tempfile
+import unittest
+
+import numpy as np
+
+from rbn.kauffman import KauffmanNetwork
+from rbn.result_text import AbstractResultText
+from rbn.simulation import HealthInterval, Simulation, stop_on_signals
+
+DOT = """
+digraph Test {
+    Frontend [func="majority", instances=3];
+    Backend [func="or", instances=4];
+    Database [func="copy", instances=4];
+    Frontend -> Backend [label="1 to n"];
+    Backend -> Database [label="1 to 1"];
+    Database -> Database [label="1 to self"];
+}
+"""
+
+
+class StageSummaries(AbstractResultText):
+    def __init__(self):
+        self.stages = []
+        self.health = []
+        self.outage = []
+
+    def print_stage_summary(
+        self,
+        stage,
+        average_type_health,
+        exhaustive=False,
+        runs=None,
+        width=None,
+        outage=0,
+    ):
+        self.stages.append((stage, exhaustive, runs, width))
+        self.health.append(average_type_health)
+        self.outage.append(outage)
+
+
+class TestHealthInterval(unittest.TestCase):
+
+    def test_matches_sample_statistics(self):
+        rng = np.random.default_rng(0)
+        interval = HealthInterval(["A", "A", "B"])
+        runs = rng.random((50, 3)) < 0.7
+        weights = rng.integers(1, 4, 50)
+        for states, weight in zip(runs, weights):
+            interval.add(states.tolist(), int(weight))
+
+        # Every run repeated as often as its weight
+        repeated = np.repeat(runs, weights, axis=0)
+        health = np.stack(
+            [repeated[:, :2].mean(axis=1), repeated[:, 2].astype(float)], axis=1
+        )
+        expected = 2 * 1.959964 * health.std(axis=0, ddof=1) / np.sqrt(len(health))
+        np.testing.assert_allclose(expected, interval.widths())
+
+    def test_too_few_runs(self):
+        interval = HealthInterval(["A"])
+        interval.add([True], 1)
+        self.assertTrue(np.isinf(interval.widths()).all())
+
+
+class TestAdaptiveRuns(unittest.TestCase):
+
+    def setUp(self):
+        # The attractor graph is written to the working directory
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        self.network = KauffmanNetwork(DOT)
+
+    def run_stages(self, **options):
+        summaries = StageSummaries()
+        simulation = Simulation(5, 100, 20, seed=1, symmetry=False, **options)
+        simulation.run(self.network, result_text=summaries)
+        return summaries.stages
+
+    def test_runs_until_target_width(self):
+        stages = self.run_stages(target_width=0.07, max_runs=300, batch_runs=50)
+        # Stages with at most max_runs failure sets stay exhaustive
+        self.assertEqual([True] * 4, [summary[1] for summary in stages[:4]])
+        stage, exhaustive, runs, width = stages[4]
+        self.assertFalse(exhaustive)
+        self.assertLessEqual(width, 0.07)
+        self.assertEqual(0, runs % 50)
+        self.assertLess(50, runs)
+        self.assertLess(runs, 300)
+
+    def test_stops_at_max_runs(self):
+        stages = self.run_stages(target_width=1e-6, max_runs=250, batch_runs=100)
+        for stage, exhaustive, runs, width in stages:
+            if not exhaustive:
+                self.assertEqual(250, runs)
+                self.assertGreater(width, 1e-6)
+
+
+class TestSampling(unittest.TestCase):
+
+    def setUp(self):
+        # The attractor graph is written to the working directory
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        self.network = KauffmanNetwork(DOT)
+
+    def last_stage(self, sampling):
+        summaries = StageSummaries()
+        simulation = Simulation(7, 150, 20, seed=2, symmetry=False, sampling=sampling)
+        simulation.run(self.network, result_text=summaries)
+        return summaries.stages[-1], summaries.health[-1], summaries.outage[-1]
+
+    def test_methods_estimate_the_same_health(self):
+        # Stage 6 samples 150 of the 462 ways to fail six nodes
+        (_, exhaustive, _, _), uniform, _ = self.last_stage("uniform")
+        self.assertFalse(exhaustive)
+        for sampling in ("stratified", "importance"):
+            _, health, outage = self.last_stage(sampling)
+            for node_type, value in uniform.items():
+                self.assertAlmostEqual(value, health[node_type], delta=0.1)
+            self.assertGreaterEqual(outage, 0)
+            self.assertLessEqual(outage, 1)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            Simulation(1, 10, 10, sampling="biased")
+
+
+class StopAfter(StageSummaries):
+    """Asks the simulation to stop once a stage has made enough runs."""
+
+    def __init__(self, simulation, stage, runs):
+        super().__init__()
+        self.simulation = simulation
+        self.stop_stage = stage
+        self.stop_runs = runs
+        self.interrupted = None
+
+    def start_stage(self, stage):
+        self.stage = stage
+
+    def print_progress(self, runs, expected_runs, attractor_count):
+        if self.stage == self.stop_stage and runs >= self.stop_runs:
+            self.simulation.stop()
+
+    def print_interrupted(self, stages_run, num_stages):
+        self.interrupted = (stages_run, num_stages)
+
+
+class TestStop(unittest.TestCase):
+
+    def setUp(self):
+        # The attractor graph is written to the working directory
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        self.network = KauffmanNetwork(DOT)
+
+    def test_partial_stage_is_summarized(self):
+        simulation = Simulation(7, 150, 20, seed=1, symmetry=False)
+        summaries = StopAfter(simulation, 5, 40)
+        simulation.run(self.network, result_text=summaries)
+        self.assertEqual(6, simulation.stages_run)
+        self.assertEqual((6, 7), summaries.interrupted)
+        stage, exhaustive, runs, width = summaries.stages[-1]
+        self.assertEqual((5, False, None), (stage, exhaustive, width))
+        # Repeated failure sets are simulated once for all their runs
+        self.assertGreaterEqual(runs, 40)
+        self.assertLess(runs, 150)
+        self.assertEqual(6, len(summaries.health))
+
+    def test_signal_stops_simulation(self):
+        class Stoppable:
+            stopped = False
+
+            def stop(self):
+                self.stopped = True
+
+        simulation = Stoppable()
+        previous = signal.getsignal(signal.SIGINT)
+        with stop_on_signals(simulation):
+            os.kill(os.getpid(), signal.SIGINT)
+            # The first signal only asks; a second one would interrupt
+            self.assertIs(previous, signal.getsignal(signal.SIGINT))
+        self.assertTrue(simulation.stopped)
+
+
+STOCHASTIC_DOT = """
+digraph Test {
+    Frontend [func="majority", instances=3];
+    Backend [func="random", instances=4];
+    Database [func="copy", instances=4];
+    Frontend -> Backend [label="1 to n"];
+    Backend -> Database [label="1 to 1"];
+    Database -> Database [label="1 to self"];
+}
+"""
+
+
+class TestSeeding(unittest.TestCase):
+
+    def setUp(self):
+        # The attractor graph is written to the working directory
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        self.network = KauffmanNetwork(STOCHASTIC_DOT)
+
+    def run_seeded(self, seed):
+        summaries = StageSummaries()
+        simulation = Simulation(4, 50, 10, seed=seed)
+        p, count = simulation.run(self.network, result_text=summaries)
+        return p, count, summaries.health
+
+    def test_random_type_condition_repeats(self):
+        self.network = KauffmanNetwork(
+            STOCHASTIC_DOT.replace(
+                "instances=4];", 'instances=4, type_condition="random"];', 1
+            )
+        )
+        self.assertEqual(self.run_seeded(5), self.run_seeded(5))
+
+    def test_seeded_stochastic_runs_repeat(self):
+        self.assertTrue(self.network.compile().stochastic)
+        self.assertEqual(self.run_seeded(3), self.run_seeded(3))
+        self.assertNotEqual(self.run_seeded(3)[0], self.run_seeded(4)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
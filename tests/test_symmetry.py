@@ -0,0 +1,121 @@
+import math
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from rbn.compiler import encode_state
+from rbn.failures import failure_mask
+from rbn.kauffman import KauffmanNetwork
+from rbn.simulation import Simulation
+
+DOT = """
+digraph Test {
+    A [func="one(B) & majority(C)", instances=2];
+    B [func="or", instances=4];
+    C [func="copy", instances=3];
+    D [func="xor", instances=6, type_condition="one(D, mod=2, group=0)"];
+    A -> B [label="1 to n"];
+    A -> C [label="1 to n"];
+    B -> D [label="1 to n"];
+    C -> C [label="1 to self"];
+    D -> D [label="1 to self"];
+}
+"""
+
+
+class TestInstanceSymmetry(unittest.TestCase):
+
+    def setUp(self):
+        self.network = KauffmanNetwork(DOT)
+        self.compiled = self.network.compile()
+        self.symmetry = self.network.get_symmetry()
+
+    def test_classes(self):
+        names = [
+            [self.compiled.names[node] for node in members]
+            for members in self.symmetry.classes
+        ]
+        self.assertIn(["A 1", "A 2"], names)
+        self.assertIn(["C 1", "C 2", "C 3"], names)
+        # The type condition only reads the even positions of D
+        self.assertIn(["D 1", "D 3", "D 5"], names)
+        self.assertIn(["D 2", "D 4", "D 6"], names)
+
+    def test_swaps_commute_with_step(self):
+        reduction = self.network.get_type_reduction()
+        rng = np.random.default_rng(1)
+        states = rng.random((64, self.compiled.size())) < 0.5
+        for members in self.symmetry.classes:
+            permutation = np.arange(self.compiled.size())
+            permutation[members] = np.roll(members, 1)
+            swapped = states[:, permutation]
+            np.testing.assert_array_equal(
+                self.compiled.step_batch(swapped),
+                self.compiled.step_batch(states)[:, permutation],
+            )
+            np.testing.assert_array_equal(
+                reduction.reduce_batch(swapped), reduction.reduce_batch(states)
+            )
+
+    def test_failure_orbits(self):
+        n = self.compiled.size()
+        for failures in range(6):
+            sets, weights = self.symmetry.enumerate_failure_orbits(failures)
+            self.assertEqual(self.symmetry.count_failure_orbits(failures), len(sets))
+            self.assertEqual(math.comb(n, failures), weights.sum())
+            np.testing.assert_array_equal(
+                sets, self.symmetry.canonical_failure_sets(sets)
+            )
+
+    def test_collapse_keeps_member_masks(self):
+        n = self.compiled.size()
+        rng = np.random.default_rng(2)
+        sampled = np.sort(rng.random((200, n)).argsort(axis=1)[:, :2], axis=1)
+        sets, weights, events = self.symmetry.collapse_failure_sets(sampled)
+        self.assertEqual(len(sampled), weights.sum())
+        self.assertEqual(
+            {failure_mask(failure_set) for failure_set in sampled},
+            {mask for masks in events for mask in masks},
+        )
+        for failure_set, masks in zip(sets, events):
+            members = np.array(
+                [[node for node in range(n) if mask >> node & 1] for mask in masks]
+            )
+            canonical = self.symmetry.canonical_failure_sets(members)
+            self.assertTrue((canonical == failure_set).all())
+
+    def test_canonical_code(self):
+        rng = np.random.default_rng(2)
+        for row in rng.random((16, self.compiled.size())) < 0.5:
+            state = row.tolist()
+            counts = self.symmetry.healthy_counts(state)
+            code = self.symmetry.canonical_code(encode_state(state))
+            changed = None
+            for _ in range(5):
+                changed = self.compiled.step_incremental(state, changed)
+                for node in changed:
+                    code ^= self.symmetry.toggle(node, state[node], counts)
+                self.assertEqual(
+                    self.symmetry.canonical_code(encode_state(state)), code
+                )
+
+    def test_simulation_matches_without_symmetry(self):
+        # The attractor graph is written to the working directory
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+
+        # Both simulate every failure set of the first stages exhaustively
+        results = []
+        for symmetry in (True, False):
+            simulation = Simulation(3, 200, 20, seed=1, symmetry=symmetry)
+            results.append(simulation.run(self.network))
+        self.assertAlmostEqual(results[0][0], results[1][0])
+        self.assertEqual(results[0][1], results[1][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
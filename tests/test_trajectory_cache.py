@@ -0,0 +1,57 @@
+import unittest
+
+from rbn.trajectory_cache import Trajectory, TrajectoryCache
+
+
+class TestTrajectoryCache(unittest.TestCase):
+
+    def setUp(self):
+        # Steps 1..5 visit a, b, c, d, e and step 6 returns to c
+        self.trajectory = Trajectory(
+            ["a", "b", "c", "d", "e"],
+            2,
+            [0, 1, 3, 6, 10, 15, 21],
+            [11, 12, 13, 14, 15, 13],
+            [True, False],
+        )
+
+    def test_attractor_sequence(self):
+        self.assertEqual(6, self.trajectory.steps())
+        self.assertEqual(["c", "d", "e"], self.trajectory.attractor_sequence())
+
+    def test_extend(self):
+        # Another run visits x, y and then lands on the state after step 2
+        extended = self.trajectory.extend(
+            ["x", "y", "b"], [0, 5, 10, 12], [21, 22, 12], 2
+        )
+        self.assertEqual(["x", "y", "b", "c", "d", "e"], extended.history)
+        self.assertEqual(["c", "d", "e"], extended.attractor_sequence())
+        self.assertEqual(7, extended.steps())
+        self.assertEqual([0, 5, 10, 12, 15, 19, 24, 30], extended.cumulative_on)
+        self.assertEqual([21, 22, 12, 13, 14, 15, 13], extended.codes)
+        self.assertIs(self.trajectory.final_state, extended.final_state)
+
+    def test_joins_without_repeat(self):
+        self.assertTrue(self.trajectory.joins_without_repeat(2, {"x", "b"}))
+        # A run that already saw "d" would close a different cycle
+        self.assertFalse(self.trajectory.joins_without_repeat(2, {"d", "b"}))
+
+    def test_record_stops_at_cycle_start(self):
+        cache = TrajectoryCache(10)
+        cache.record(self.trajectory)
+        self.assertEqual((self.trajectory, 1), cache.lookup(11))
+        self.assertEqual((self.trajectory, 3), cache.lookup(13))
+        self.assertIsNone(cache.lookup(14))
+
+    def test_least_recently_used_states_are_evicted(self):
+        cache = TrajectoryCache(3)
+        cache.record(self.trajectory)
+        cache.lookup(11)
+        cache.record(Trajectory(["z"], 0, [0, 1], [31], [True]))
+        self.assertIsNotNone(cache.lookup(11))
+        self.assertIsNone(cache.lookup(12))
+        self.assertEqual(3, len(cache))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from rbn.compiler import encode_state
+from rbn.trajectory_recorder import (
+    TrajectoryReader,
+    TrajectoryRecorder,
+    truncate_npy,
+)
+
+
+class TestTrajectoryRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.names = [f"N{i}" for i in range(10)]
+
+    def test_round_trip(self):
+        first = [[True] * 10, [False] + [True] * 9, [False] * 10]
+        second = [[i % 2 == 0 for i in range(10)]] * 2
+        recorder = TrajectoryRecorder(self.directory.name, self.names, 4, 20)
+        recorder.record_run(0, 0b1, 3, [encode_state(s) for s in first], True)
+        recorder.record_run(
+            1, 0b1000000010, 1, [encode_state(s) for s in second], False
+        )
+        recorder.close()
+
+        reader = TrajectoryReader(self.directory.name)
+        self.assertEqual(2, len(reader))
+        self.assertEqual(self.names, reader.node_names)
+        np.testing.assert_array_equal(np.array(first), reader.run_states(0))
+        np.testing.assert_array_equal(np.array(second), reader.run_states(1))
+        self.assertEqual([0], reader.failure_set(0).tolist())
+        self.assertEqual([1, 9], reader.failure_set(1).tolist())
+        self.assertEqual([1], reader.runs_for_stage(1).tolist())
+        self.assertEqual(3, reader.index[0]["weight"])
+        self.assertFalse(reader.index[1]["attractor_found"])
+        # Only the rows recorded are kept of the preallocated files
+        self.assertEqual((5, 2), reader.states.shape)
+        self.assertEqual((2, 2), reader.masks.shape)
+        states_file = os.path.join(self.directory.name, "states.npy")
+        self.assertEqual(
+            reader.states.offset + reader.states.nbytes, os.path.getsize(states_file)
+        )
+
+    def test_capacity(self):
+        recorder = TrajectoryRecorder(self.directory.name, self.names, 1, 2)
+        with self.assertRaises(ValueError):
+            recorder.record_run(0, 0, 1, [0, 1, 2], True)
+        recorder.record_run(0, 0, 1, [0, 1], True)
+        with self.assertRaises(ValueError):
+            recorder.record_run(0, 0, 1, [0], True)
+        recorder.close()
+
+    def test_truncate_large_shape(self):
+        # Fewer digits in the shape must not move the data
+        path = os.path.join(self.directory.name, "large.npy")
+        array = np.lib.format.open_memmap(
+            path, mode="w+", dtype=np.uint8, shape=(10**7, 3)
+        )
+        array[:2] = [[1, 2, 3], [4, 5, 6]]
+        del array
+        truncate_npy(path, 2)
+        np.testing.assert_array_equal(np.load(path), [[1, 2, 3], [4, 5, 6]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+from rbn.components import modular_attractors
+from rbn.kauffman import KauffmanNetwork
+from rbn.watch import IncrementalAttractors, NetworkChange, watch
+
+DOT = """
+digraph Test {
+    Source [func="copy", instances=2];
+    Relay [func="xor", instances=2];
+    Sink [func="majority", instances=3];
+    Monitor [func="nand"];
+    Source -> Source [label="1 to self"];
+    Relay -> Source [label="1 to n"];
+    Relay -> Relay [label="1 to n"];
+    Sink -> Relay [label="1 to n"];
+    Monitor -> Sink [label="1 to n"];
+}
+"""
+
+
+def cycles(attractors):
+    return {frozenset(attractor.codes) for attractor in attractors}
+
+
+class TestNetworkChange(unittest.TestCase):
+
+    def test_change_reaches_downstream_only(self):
+        old = KauffmanNetwork(DOT).compile()
+        new = KauffmanNetwork(DOT.replace('"xor"', '"or"')).compile()
+        change = NetworkChange(old, new)
+        self.assertTrue(change)
+        self.assertEqual(["Relay"], change.changed_types())
+        self.assertEqual(["Monitor", "Relay", "Sink"], change.affected_types())
+        self.assertEqual([], change.removed)
+
+    def test_unchanged(self):
+        old = KauffmanNetwork(DOT).compile()
+        new = KauffmanNetwork(DOT.replace("Test", "Renamed")).compile()
+        self.assertFalse(NetworkChange(old, new))
+
+
+class TestIncrementalAttractors(unittest.TestCase):
+
+    def test_matches_full_analysis(self):
+        analysis = IncrementalAttractors()
+        _, _, _, change, _ = analysis.update(KauffmanNetwork(DOT).compile())
+        self.assertIsNone(change)
+        edits = [
+            DOT.replace('Sink [func="majority"', 'Sink [func="or"'),
+            DOT.replace('Monitor -> Sink [label="1 to n"]', "Monitor -> Relay"),
+            DOT.replace('Source [func="copy"', 'Source [func="nand"'),
+        ]
+        reused = []
+        for edited in edits:
+            compiled = KauffmanNetwork(edited).compile()
+            attractors, _, exact, _, kept = analysis.update(compiled)
+            expected, _, _ = modular_attractors(compiled)
+            self.assertTrue(exact)
+            self.assertEqual(cycles(expected), cycles(attractors))
+            self.assertEqual(len(expected), len(attractors))
+            reused.append(kept)
+        # Source and Relay are upstream of the first two edits; the last
+        # one reaches every node
+        self.assertEqual([4, 4, 0], reused)
+
+
+class TestWatch(unittest.TestCase):
+
+    def test_yields_on_modification(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "network.dot")
+            with open(path, "w") as f:
+                f.write(DOT)
+            sleeps = []
+
+            def sleep(_):
+                # Modify the file once, between the second and third check
+                sleeps.append(None)
+                if len(sleeps) == 2:
+                    with open(path, "a") as f:
+                        f.write("\n")
+
+            changes = watch(path, 0, sleep)
+            next(changes)
+            next(changes)
+            self.assertEqual(2, len(sleeps))
+
+
+if __name__ == "__main__":
+    unittest.main()